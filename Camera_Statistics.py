@@ -12,34 +12,29 @@ Modules Imported:
 - os: Provides functions to interact with the operating system.
 - pandas: Used for data manipulation and analysis.
 - tkinter: Provides classes for creating graphical user interfaces.
-- openpyxl.styles: Used for styling Excel files.
-- shutil: Offers a number of high-level operations on files and collections of files.
-- subprocess: Allows spawning new processes, connecting to their input/output/error pipes, and obtaining their return codes.
 - PIL (Pillow): Adds image processing capabilities to Python.
+- matrox_data: GUI-free core with the classification, statistics and extraction logic.
 
 Global Variables:
 -----------------
 - directorio_actual: Stores the path of the current directory where the script is located.
+- INTERVALO_SONDEO_MS: How often (in milliseconds) the GUI reads the progress of background jobs.
+- ruta_reglas: Optional 'reglas.json' next to the script with the classification rules.
+- ruta_limites: Optional 'limites.json' next to the script with the specification limits used for the Cpk.
+- transporte_camaras: Camera transport loaded from the optional 'transporte.json' next to the script (see
+  matrox_data.transporte); by default the '\\\\ip\\mtxuser' share with 'net use'.
 - carpeta_seleccionada: Global variable to store the selected folder.
 - ruta_archivo_estadisticos: Global variable to store the path of the statistical file.
+- monitor_camaras: Single connection monitor of the connected cameras (see matrox_data.monitor).
 
 Functions:
 ----------
-- clasificar_archivos(carpeta_principal)
-    Classifies files into subfolders based on their extensions.
-
-    Parameters:
-    - carpeta_principal (str): The main directory to classify files.
+- ejecutar_trabajo(titulo, funcion, *args, al_terminar=None, al_error=None, **kwargs)
+    Runs a long operation in a worker thread with a progress window and a cancel button.
 
 - seleccionar_carpeta_principal()
     Opens a file dialog to select the main folder and calls the classification function.
 
-- buscar_subcarpetas_txt(carpeta)
-    Searches for all subfolders named 'TXT' within the specified directory.
-
-    Parameters:
-    - carpeta (str): The directory to search for 'TXT' subfolders.
-
 - generar_estadisticos()
     Generates statistics from text files in the selected folder using file dialogs.
 
@@ -57,16 +52,14 @@ Functions:
 
 """
 import os
-import threading
-import time
 import pandas as pd
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from openpyxl.styles import PatternFill
-from datetime import datetime
-import shutil
-import subprocess
+from concurrent.futures import CancelledError
 from PIL import Image, ImageTk
+from matrox_data import (agregados, clasificacion, datos_especificos, estadisticos, extraccion, flujo, monitor, reglas, tendencias, trabajos,
+                         transporte)
+from matrox_data.analizador import POLITICAS_REPETIDAS
 
 # Obtener la ruta del directorio actual donde se encuentra el script
 directorio_actual = os.path.dirname(os.path.abspath(__file__))
@@ -75,43 +68,101 @@ directorio_actual = os.path.dirname(os.path.abspath(__file__))
 carpeta_seleccionada = None
 ruta_archivo_estadisticos = None  # Variable global para almacenar la ruta del archivo de estadísticos
 idioma = "ES"
+# Reglas de clasificación configurables (si no existe el archivo se clasifica por extensión)
+ruta_reglas = os.path.join(directorio_actual, "reglas.json")
+# Límites de especificación para el Cpk del libro de agregados (sin el archivo no se calcula el Cpk)
+ruta_limites = os.path.join(directorio_actual, "limites.json")
+# Transporte de las cámaras: recurso compartido de Windows, carpeta montada, cliente SMB o simulador local
+ruta_transporte = os.path.join(directorio_actual, "transporte.json")
+transporte_camaras = transporte.cargar_transporte(ruta_transporte if os.path.isfile(ruta_transporte) else None)
+# Intervalo con el que la interfaz lee el progreso de los trabajos en segundo plano
+INTERVALO_SONDEO_MS = 100
+# Monitor único de la conexión de todas las cámaras conectadas
+monitor_camaras = None
+
+# Función para ejecutar una operación larga en segundo plano con una ventana de progreso y un botón para cancelar
+def ejecutar_trabajo(titulo, funcion, *args, al_terminar=None, al_error=None, **kwargs):
+    ventana_progreso = tk.Toplevel(root)
+    ventana_progreso.title(titulo)
+    ventana_progreso.geometry("320x150")
+    ventana_progreso.resizable(False, False)
+    ventana_progreso.attributes('-topmost', True)
+
+    if(idioma=="EN"):
+        etiqueta_progreso = ttk.Label(ventana_progreso, text="Processing...")
+    else:
+        etiqueta_progreso = ttk.Label(ventana_progreso, text="Procesando...")
+    etiqueta_progreso.pack(pady=10)
+    barra_progreso = ttk.Progressbar(ventana_progreso, orient='horizontal', length=260, mode='determinate')
+    barra_progreso.pack(pady=5)
+
+    # La operación se ejecuta en un hilo y envía su progreso por una cola
+    trabajo = trabajos.iniciar_trabajo(funcion, *args, **kwargs)
+
+    def cancelar():
+        trabajos.cancelar_trabajo(trabajo)
+        boton_cancelar.config(state='disabled')
+        if(idioma=="EN"):
+            etiqueta_progreso.config(text="Cancelling...")
+        else:
+            etiqueta_progreso.config(text="Cancelando...")
+
+    if(idioma=="EN"):
+        boton_cancelar = ttk.Button(ventana_progreso, text="Cancel", command=cancelar)
+    else:
+        boton_cancelar = ttk.Button(ventana_progreso, text="Cancelar", command=cancelar)
+    boton_cancelar.pack(pady=10)
+    ventana_progreso.protocol("WM_DELETE_WINDOW", cancelar)
+
+    # Leer el progreso a intervalos fijos desde el hilo de la interfaz
+    def sondear():
+        progreso, terminado = trabajos.leer_trabajo(trabajo)
+        if progreso is not None and not trabajo['cancelado'].is_set():
+            hechos, total = progreso
+            if total:
+                barra_progreso.config(mode='determinate', maximum=total, value=hechos)
+                etiqueta_progreso.config(text=f"{hechos} / {total}")
+            else:
+                # Sin total conocido solo se muestra cuántos archivos se llevan
+                barra_progreso.config(mode='indeterminate')
+                barra_progreso.step()
+                etiqueta_progreso.config(text=f"{hechos}")
+        if not terminado:
+            root.after(INTERVALO_SONDEO_MS, sondear)
+            return
 
-# Función para clasificar archivos en subcarpetas según su extensión
-def clasificar_archivos(carpeta_principal):
-    carpetas = ['png', 'jpg', 'txt']
-    # Recorrer la estructura de directorios de la carpeta principal
-    for carpeta, _, archivos in os.walk(carpeta_principal):
-        for archivo in archivos:
-            archivo_path = os.path.join(carpeta, archivo)
-            # Obtener la extensión del archivo
-            extension = archivo.split('.')[-1].lower()
-            # Verificar si la extensión está en la lista de extensiones a clasificar
-            if extension in carpetas:
-                # Crear la subcarpeta si no existe
-                subcarpeta = os.path.join(carpeta, extension.lower())
-                if not os.path.exists(subcarpeta):
-                    os.makedirs(subcarpeta)
-                # Mover el archivo a la subcarpeta correspondiente
-                shutil.move(archivo_path, os.path.join(subcarpeta, archivo))
+        ventana_progreso.destroy()
+        error = trabajo['error']
+        if isinstance(error, CancelledError):
+            if(idioma=="EN"):
+                messagebox.showinfo(titulo, "The operation was cancelled.")
+            else:
+                messagebox.showinfo(titulo, "La operación se ha cancelado.")
+        elif error is not None:
+            if al_error is not None:
+                al_error(error)
+            else:
+                messagebox.showerror("Error", f"{type(error).__name__}: {error}")
+        elif al_terminar is not None:
+            al_terminar(trabajo['resultado'])
+
+    root.after(INTERVALO_SONDEO_MS, sondear)
 
 # Función para seleccionar una carpeta principal y clasificar sus archivos
 def seleccionar_carpeta_principal():
     carpeta_principal = filedialog.askdirectory()
     if carpeta_principal:
-        clasificar_archivos(carpeta_principal)
-        if(idioma == "EN"):
-            mensaje_label.config(text="Archivos clasificados correctamente.")
-        else:
-            mensaje_label.config(text="Files classified correctly.")
+        reglas_clasificacion = reglas.cargar_reglas(ruta_reglas if os.path.isfile(ruta_reglas) else None)
 
-# Función para buscar todas las subcarpetas llamadas 'TXT'
-def buscar_subcarpetas_txt(carpeta):
-    subcarpetas_txt = []
-    for root, dirs, _ in os.walk(carpeta):
-        for dir_name in dirs:
-            if dir_name.lower() == 'txt':
-                subcarpetas_txt.append(os.path.join(root, dir_name))
-    return subcarpetas_txt
+        def al_terminar(plan):
+            if(idioma == "EN"):
+                mensaje_label.config(text="Archivos clasificados correctamente.")
+            else:
+                mensaje_label.config(text="Files classified correctly.")
+
+        ejecutar_trabajo("Classify Files" if idioma == "EN" else "Clasificar Archivos",
+                         clasificacion.clasificar_archivos, carpeta_principal, reglas_clasificacion,
+                         al_terminar=al_terminar)
 
 # Función para generar estadísticas de archivos de texto en la carpeta seleccionada
 def generar_estadisticos():
@@ -123,121 +174,85 @@ def generar_estadisticos():
         carpeta_seleccionada = filedialog.askdirectory(title="Seleccionar Carpeta")
 
     if carpeta_seleccionada:
-        # Buscar todas las subcarpetas llamadas 'TXT'
-        subcarpetas_txt = buscar_subcarpetas_txt(carpeta_seleccionada)
-        if subcarpetas_txt:
-            # Mostrar mensaje informativo y procesar archivos .txt
-            if (idioma == "EN"):
-                messagebox.showinfo("Generate Statistics", f"Statistics are generated from the folder: {carpeta_seleccionada}")
-            else:
-                messagebox.showinfo("Generar Estadísticos",
-                                    f"Se generarán estadísticos de la carpeta: {carpeta_seleccionada}")
-            valores = []
-            for subcarpeta_txt in subcarpetas_txt:
-                for root, _, archivos in os.walk(subcarpeta_txt):
-                    for archivo in archivos:
-                        if archivo.endswith('.txt'):
-                            datos = {}
-                            ruta_archivo = os.path.join(root, archivo)
-                            with open(ruta_archivo, 'r') as file:
-                                contenido = file.readlines()
- 
-                                recipe_id = None
-                                exposure_time = None
-                                image_time_stamp = None  # Agregar para almacenar el Image Time Stamp
-                                blob_data = {}
-                                for i in range(1, 7):
-                                    blob_key = f'Blob {i}'
-                                    blob_data[blob_key] = {
-                                        'Enabled': False,
-                                        'Threshold': None,
-                                        'Min': None,
-                                        'Max': None,
-                                        'Area': None
-                                    }
- 
-                                for line in contenido:
-                                    if "Recipe ID" in line:
-                                        recipe_id = int(line.split(': ')[1])
-                                    elif "Exposure Time" in line:
-                                        exposure_time = int(line.split(': ')[1])
-                                    elif "Image Time Stamp" in line:  # Buscar el Image Time Stamp
-                                        image_time_stamp = line.split(': ')[1].strip()
-                                    elif "Blob" in line and "Enabled: True" in line:
-                                        blob_number = int(line.split()[1])
-                                        blob_data[f'Blob {blob_number}']['Enabled'] = True
-                                    elif "Blob" in line and "Threshold" in line:
-                                        blob_number = int(line.split()[1])
-                                        blob_data[f'Blob {blob_number}']['Threshold'] = int(line.split(': ')[1])
-                                    elif "Blob" in line and "Min" in line:
-                                        blob_number = int(line.split()[1])
-                                        blob_data[f'Blob {blob_number}']['Min'] = int(line.split(': ')[1])
-                                    elif "Blob" in line and "Max" in line:
-                                        blob_number = int(line.split()[1])
-                                        blob_data[f'Blob {blob_number}']['Max'] = int(line.split(': ')[1])
-                                    elif "Blob" in line and "Area" in line:
-                                        blob_number = int(line.split()[1])
-                                        blob_data[f'Blob {blob_number}']['Area'] = int(line.split(': ')[1])
- 
-                                if recipe_id is not None and exposure_time is not None and image_time_stamp is not None:
-                                    camara = archivo[:19]
-                                    datos = {'Camara': camara, 'Archivo': archivo, 'Recipe ID': recipe_id, 'Exposure Time': exposure_time, 'Image Time Stamp': image_time_stamp}
-                                    for blob_key, blob_info in blob_data.items():
-                                        if blob_info['Enabled']:
-                                            datos.update({
-                                                f'{blob_key} Threshold': blob_info['Threshold'],
-                                                f'{blob_key} Min': blob_info['Min'],
-                                                f'{blob_key} Max': blob_info['Max'],
-                                                f'{blob_key} Area': blob_info['Area']
-                                            })
-                                    valores.append(datos)
- 
-            # Crear un DataFrame de Pandas con los valores de Recipe ID, Exposure Time, Image Time Stamp, Blob 1 Threshold, Blob 1 Min, Blob 1 Max y Blob 1 Area
-            df = pd.DataFrame(valores)
-            # Obtener el nombre de la carpeta seleccionada
-            nombre_carpeta = os.path.basename(carpeta_seleccionada)
- 
-            # Guardar el DataFrame en un archivo de Excel con el nombre de la carpeta en la raíz de la carpeta seleccionada
-            ruta_excel = os.path.join(carpeta_seleccionada, f'{nombre_carpeta}.xlsx')
- 
-            # Agregar la columna con los nombres de los archivos .txt
-            df['Archivo'] = [os.path.basename(path) for path in df['Archivo']]
- 
-            # Escribir el DataFrame en el archivo Excel con filtro en la primera fila
-            with pd.ExcelWriter(ruta_excel, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, header=True)
-                # Ajustar automáticamente el tamaño de las columnas al contenido
-                for column in writer.sheets['Sheet1'].columns:
-                    max_length = 0
-                    column = list(column)
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(cell.value)
-                        except:
-                            pass
-                    adjusted_width = (max_length + 2) * 1.2
-                    writer.sheets['Sheet1'].column_dimensions[column[0].column_letter].width = adjusted_width
- 
-                # Resaltar en rojo las columnas que tienen campos vacíos
-                for col in writer.sheets['Sheet1'].iter_cols():
-                    for cell in col:
-                        if cell.value is None or cell.value == '':
-                            cell.fill = PatternFill(start_color="F08080", end_color="F08080", fill_type="solid")
- 
+        # Ventana con el mensaje informativo y las opciones, todas desactivadas: sin marcar ninguna se genera solo el
+        # Excel de estadísticos leyendo los archivos en serie, como siempre
+        ventana_opciones = tk.Toplevel(root)
+        ventana_opciones.title("Generate Statistics" if idioma == "EN" else "Generar Estadísticos")
+        ventana_opciones.resizable(False, False)
+        ventana_opciones.attributes('-topmost', True)
+        if (idioma == "EN"):
+            etiqueta_carpeta = ttk.Label(ventana_opciones, wraplength=360,
+                                         text=f"Statistics are generated from the folder: {carpeta_seleccionada}")
+            textos_opciones = ("Parallel reading (all processors)", "Incremental (new or changed files only)",
+                               "Aggregates per camera and recipe", "Trends and drifts per camera")
+        else:
+            etiqueta_carpeta = ttk.Label(ventana_opciones, wraplength=360,
+                                         text=f"Se generarán estadísticos de la carpeta: {carpeta_seleccionada}")
+            textos_opciones = ("Lectura en paralelo (todos los procesadores)",
+                               "Incremental (solo archivos nuevos o modificados)", "Agregados por cámara y receta",
+                               "Tendencias y derivas por cámara")
+        etiqueta_carpeta.pack(padx=20, pady=10)
+
+        variables_opciones = [tk.IntVar() for _ in textos_opciones]
+        for texto, variable in zip(textos_opciones, variables_opciones):
+            ttk.Checkbutton(ventana_opciones, text=texto, variable=variable).pack(anchor="w", padx=20)
+
+        def al_terminar(ruta_excel, agregados_generados, tendencias_generadas):
+            global ruta_archivo_estadisticos
             # Almacenar la ruta del archivo generado
             ruta_archivo_estadisticos = ruta_excel
             actualizar_etiqueta_ruta()
             if(idioma=="EN"):
-                messagebox.showinfo("Generate Statistics", f"Statistics generated and saved in '{ruta_excel}'")
+                mensaje = f"Statistics generated and saved in '{ruta_excel}'"
+                if agregados_generados:
+                    mensaje += f"\nAggregates per camera and recipe in '{agregados.ruta_agregados(ruta_excel)}'"
+                if tendencias_generadas:
+                    mensaje += f"\nTrends and drifts per camera in '{tendencias.ruta_tendencias(ruta_excel)}'"
+                messagebox.showinfo("Generate Statistics", mensaje)
             else:
-                messagebox.showinfo("Generar Estadísticos", f"Estadísticos generados y guardados en '{ruta_excel}'")
-        else:
+                mensaje = f"Estadísticos generados y guardados en '{ruta_excel}'"
+                if agregados_generados:
+                    mensaje += f"\nAgregados por cámara y receta en '{agregados.ruta_agregados(ruta_excel)}'"
+                if tendencias_generadas:
+                    mensaje += f"\nTendencias y derivas por cámara en '{tendencias.ruta_tendencias(ruta_excel)}'"
+                messagebox.showinfo("Generar Estadísticos", mensaje)
+
+        def al_error(error):
+            if not isinstance(error, FileNotFoundError):
+                messagebox.showerror("Error", f"{type(error).__name__}: {error}")
             # Mostrar mensaje de error si no se encuentra ninguna subcarpeta 'TXT'
-            if(idioma=="EN"):
+            elif(idioma=="EN"):
                 messagebox.showerror("Error", "No 'TXT' subfolders were found in the selected folder.")
             else:
                 messagebox.showerror("Error", "No se encontraron subcarpetas 'TXT' en la carpeta seleccionada.")
+
+        def generar():
+            paralelo, incremental, con_agregados, con_tendencias = (bool(variable.get()) for variable in variables_opciones)
+            ventana_opciones.destroy()
+            # Las subcarpetas 'TXT' y sus archivos se buscan en un solo recorrido de la carpeta
+            # Guardar el archivo de Excel con el nombre de la carpeta en la raíz de la carpeta seleccionada
+            # y, si se han marcado, junto a él los libros de agregados por cámara y Recipe ID y de tendencias por cámara
+            limites = None
+            if con_agregados:
+                try:
+                    limites = agregados.cargar_limites(ruta_limites if os.path.isfile(ruta_limites) else None)
+                except (OSError, ValueError) as e:
+                    if (idioma == "EN"):
+                        messagebox.showerror("Error", f"The file '{ruta_limites}' could not be read: {e}")
+                    else:
+                        messagebox.showerror("Error", f"No se pudo leer el archivo '{ruta_limites}': {e}")
+                    return
+            ejecutar_trabajo("Generate Statistics" if idioma == "EN" else "Generar Estadísticos",
+                             estadisticos.generar_estadisticos, carpeta_seleccionada, procesos=None if paralelo else 1,
+                             incremental=incremental, agregados=con_agregados, limites=limites, tendencias=con_tendencias,
+                             al_terminar=lambda ruta_excel: al_terminar(ruta_excel, con_agregados, con_tendencias),
+                             al_error=al_error)
+
+        if (idioma == "EN"):
+            boton_generar = ttk.Button(ventana_opciones, text="Accept", command=generar)
+        else:
+            boton_generar = ttk.Button(ventana_opciones, text="Aceptar", command=generar)
+        boton_generar.pack(pady=10)
  
  
 # Función para abrir el archivo de estadísticos
@@ -266,7 +281,7 @@ def actualizar_etiqueta_ruta():
 def generar_estadisticos_datos_especificos():
     # Función para procesar los parámetros ingresados y buscar el texto en los archivos .txt
     def procesar_parametros():
-        parametros = ["Recipe ID", "Exposure Time", "Image Time Stamp"] + entrada_parametros.get().split(';')
+        parametros = datos_especificos.normalizar_parametros(entrada_parametros.get())
 
         if(idioma=="EN"):
             carpeta_seleccionada = filedialog.askdirectory(title="Select Folder")
@@ -289,73 +304,26 @@ def generar_estadisticos_datos_especificos():
                 messagebox.showerror("Error", "Debes seleccionar una carpeta.")
                 return
 
-        archivos_encontrados = []
-        nombres_archivos = []  # Lista para almacenar los nombres de los archivos .txt encontrados
-        camaras_encontradas =[]
-        for root, _, archivos in os.walk(carpeta_seleccionada):
-            for archivo in archivos:
-                if archivo.endswith('.txt'):
-                    ruta_archivo = os.path.join(root, archivo)
-                    with open(ruta_archivo, 'r') as file:
-                        contenido = file.read()
-                        if all(parametro in contenido for parametro in parametros):
-                            archivos_encontrados.append(ruta_archivo)
-                            nombres_archivos.append(archivo)
-                            camaras_encontradas.append(archivo[:19])
- 
-        if not archivos_encontrados:
-            if(idioma=="EN"):
-                messagebox.showinfo("Result", "No matches were found.")
+        # Política para los parámetros que aparecen varias veces en un archivo: primera, última o todas
+        repetidas = POLITICAS_REPETIDAS[max(combo_repetidas.current(), 0)]
+
+        def al_terminar(ruta_excel):
+            if ruta_excel is None:
+                if(idioma=="EN"):
+                    messagebox.showinfo("Result", "No matches were found.")
+                else:
+                    messagebox.showinfo("Resultado", "No se encontraron coincidencias.")
                 return
+
+            if(idioma=="EN"):
+                messagebox.showinfo("Result", f"Statistics generated and saved in '{ruta_excel}'")
             else:
-                messagebox.showinfo("Resultado", "No se encontraron coincidencias.")
-                return
- 
-        generar_excel(archivos_encontrados, nombres_archivos, parametros, carpeta_seleccionada, camaras_encontradas)
- 
-    # Función para generar un archivo Excel con los datos de los archivos encontrados
-    def generar_excel(archivos, nombres_archivos, parametros, carpeta_seleccionada, camaras_encontradas):
-                             
-        datos = {'Camaras': camaras_encontradas, 'Archivo': nombres_archivos}  # Inicializar el diccionario con los nombres de los archivos .txt
-        for parametro in parametros:
-            datos[parametro] = []
- 
-        for archivo in archivos:
-            with open(archivo, 'r') as file:
-                contenido = file.readlines()
-                for linea in contenido:
-                    for parametro in parametros:
-                        if parametro in linea:
-                            valor = linea.split(': ')[1].strip()
-                            datos[parametro].append(valor)
-
-        nombre_carpeta = os.path.basename(carpeta_seleccionada)
-        df = pd.DataFrame(datos)
-        ruta_excel = os.path.join(carpeta_seleccionada, f'{nombre_carpeta}_datos_especificos.xlsx')
-        df.to_excel(ruta_excel, index=False, header=True)
-
-        for column in df.columns:
-            max_length = max(df[column].astype(str).map(len).max(), len(column)) + 2
-            df[column] = df[column].apply(lambda x: x.ljust(max_length))
-
-        with pd.ExcelWriter(ruta_excel, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, header=True)
-            for column in writer.sheets['Sheet1'].columns:
-                max_length = 0
-                column = list(column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = (max_length + 2) * 1.2
-                writer.sheets['Sheet1'].column_dimensions[column[0].column_letter].width = adjusted_width
+                messagebox.showinfo("Resultado", f"Estadísticos generados y guardados en '{ruta_excel}'")
 
-        if(idioma=="EN"):
-            messagebox.showinfo("Result", f"Statistics generated and saved in '{ruta_excel}'")
-        else:
-            messagebox.showinfo("Resultado", f"Estadísticos generados y guardados en '{ruta_excel}'")
+        # Buscar los parámetros en los archivos .txt y generar el Excel en segundo plano
+        ejecutar_trabajo("Result" if idioma == "EN" else "Resultado",
+                         datos_especificos.generar_estadisticos_datos_especificos, carpeta_seleccionada, parametros,
+                         repetidas=repetidas, al_terminar=al_terminar)
 
     ventana_parametros = tk.Toplevel()
     if(idioma=="EN"):
@@ -363,7 +331,7 @@ def generar_estadisticos_datos_especificos():
     else:
         ventana_parametros.title("Generar Estadísticos de Datos Específicos")
 
-    ventana_parametros.geometry("400x200")
+    ventana_parametros.geometry("400x280")
 
     if (idioma == "EN"):
         etiqueta_parametros = ttk.Label(ventana_parametros, text="Parameters (separated by ';'):")
@@ -372,6 +340,13 @@ def generar_estadisticos_datos_especificos():
         entrada_parametros = ttk.Entry(ventana_parametros, width=50)
         entrada_parametros.pack(pady=10)
 
+        etiqueta_repetidas = ttk.Label(ventana_parametros, text="Repeated parameters in a file:")
+        etiqueta_repetidas.pack()
+        combo_repetidas = ttk.Combobox(ventana_parametros, state="readonly",
+                                       values=["First value", "Last value", "All values as columns"])
+        combo_repetidas.current(0)
+        combo_repetidas.pack(pady=10)
+
         boton_procesar = ttk.Button(ventana_parametros, text="Process", command=procesar_parametros)
         boton_procesar.pack(pady=10)
     else:
@@ -381,22 +356,27 @@ def generar_estadisticos_datos_especificos():
         entrada_parametros = ttk.Entry(ventana_parametros, width=50)
         entrada_parametros.pack(pady=10)
 
+        etiqueta_repetidas = ttk.Label(ventana_parametros, text="Parámetros repetidos en un archivo:")
+        etiqueta_repetidas.pack()
+        combo_repetidas = ttk.Combobox(ventana_parametros, state="readonly",
+                                       values=["Primer valor", "Último valor", "Todos los valores como columnas"])
+        combo_repetidas.current(0)
+        combo_repetidas.pack(pady=10)
+
         boton_procesar = ttk.Button(ventana_parametros, text="Procesar", command=procesar_parametros)
         boton_procesar.pack(pady=10)
 
 
 def obtener_datos_camara():
-    global ventana_archivos, conjunto_ip, ventana_estado, monitor_conexion, conjunto_estacion
+    global ventana_archivos, conjunto_ip, ventana_estado, conjunto_estacion
     ventana_estado = None
     ventana_archivos = None
     conjunto_ip = []
     conjunto_estacion = []
-    monitor_running = False
-    monitor_conexion = None
     direccion_ip_global = None
 
     def procesar_direccion_ip(direccion_ip=None):
-        global direccion_ip_global, monitor_conexion, monitor_running, conjunto_ip, conjunto_estacion
+        global direccion_ip_global, conjunto_ip, conjunto_estacion
 
         if not direccion_ip:
             direccion_ip = entrada_ip.get()
@@ -408,34 +388,16 @@ def obtener_datos_camara():
                 conjunto_ip[0] = direccion_ip
 
         if direccion_ip:
-            ping_exit_code = subprocess.call(['ping', '-n', '1', direccion_ip], stdout=subprocess.DEVNULL)
-            if ping_exit_code == 0:
-                try:
-                    comando = f"net use \\\\{direccion_ip}\\IPC$ /user:NAM\\mtxuser Matrox"
-                    subprocess.run(comando, shell=True, check=True)
-                    if(idioma=="EN"):
-                        print(f"Conexión SMB establecida con {direccion_ip}")
-                    else:
-                        print(f"SMB connection established with {direccion_ip}")
-
-                    if ventana_archivos is None:
-                        abrir_ventana_seleccion_archivos()
-
-                    if ventana_estado is None:
-                        mostrar_ventana_estado(direccion_ip)
-
-                    monitor_running = True
-                    if monitor_conexion is None or not monitor_conexion.is_alive():
-                        monitor_conexion = threading.Thread(target=monitorizar_conexion, args=(direccion_ip,))
-                        monitor_conexion.start()
-
-                except subprocess.CalledProcessError as e:
-                    if(idioma=="EN"):
-                        messagebox.showerror("Error", f"Failed to establish SMB connection to {direccion_ip}: {str(e)}")
-                    else:
-                        messagebox.showerror("Error",
-                                             f"No se pudo establecer la conexión SMB con {direccion_ip}: {str(e)}")
-                    abrir_ventana_credenciales(direccion_ip)
+            # Ping y 'net use' con tiempo máximo; si la cámara ya tiene sesión SMB se reutiliza
+            resultado = extraccion.conectar_camara(direccion_ip, transporte=transporte_camaras)
+            if resultado in (extraccion.CONEXION_NUEVA, extraccion.CONEXION_REUTILIZADA):
+                camara_conectada(direccion_ip)
+            elif resultado == extraccion.CONEXION_ERROR_CREDENCIALES:
+                if(idioma=="EN"):
+                    messagebox.showerror("Error", f"Failed to establish SMB connection to {direccion_ip}.")
+                else:
+                    messagebox.showerror("Error", f"No se pudo establecer la conexión SMB con {direccion_ip}.")
+                abrir_ventana_credenciales(direccion_ip)
             else:
                 if(idioma=="EN"):
                     messagebox.showerror("Error", f"Could not ping IP address {direccion_ip}.")
@@ -446,8 +408,23 @@ def obtener_datos_camara():
                 messagebox.showerror("Error", "You must enter a valid IP address.")
             else:
                 messagebox.showerror("Error", "Debes ingresar una dirección IP válida.")
+    # Abrir las ventanas de archivos y de estado y monitorizar la cámara una vez conectada
+    def camara_conectada(direccion_ip):
+        if(idioma=="EN"):
+            print(f"SMB connection established with {direccion_ip}")
+        else:
+            print(f"Conexión SMB establecida con {direccion_ip}")
+
+        if ventana_archivos is None:
+            abrir_ventana_seleccion_archivos()
+
+        if ventana_estado is None:
+            mostrar_ventana_estado(direccion_ip)
+
+        monitorizar_conexion(direccion_ip)
+
     def mostrar_ventana_estado(direccion_ip):
-        global ventana_estado, direccion_ip_global
+        global ventana_estado, direccion_ip_global, estado_label
 
         if ventana_estado is None:
             ventana_estado = tk.Toplevel(root)
@@ -456,7 +433,7 @@ def obtener_datos_camara():
             else:
                 ventana_estado.title("Estado de Conexión")
 
-            ventana_estado.geometry("300x150")
+            ventana_estado.geometry("300x250")
             ventana_estado.resizable(False, False)
 
             if(idioma=="EN"):
@@ -466,16 +443,22 @@ def obtener_datos_camara():
             estado_label.pack(pady=20)
 
             def cerrar_conexion():
-                global monitor_running, ventana_estado
-                monitor_running = False
-                comando_desconectar = f"net use \\\\{direccion_ip}\\IPC$ /delete"
-                subprocess.run(comando_desconectar, shell=True, check=True)
+                global monitor_camaras, ventana_estado
+                # El monitor es común a todas las cámaras: se quita solo esta y se detiene cuando no queda ninguna
+                if monitor_camaras is not None:
+                    monitor.quitar_camara(monitor_camaras, direccion_ip)
+                    if not monitor.estado_camaras(monitor_camaras):
+                        monitor.detener_monitor(monitor_camaras)
+                        monitor_camaras = None
+                transporte_camaras['desconectar'](direccion_ip)
                 if(idioma=="EN"):
                     print(f"SMB connection closed with {direccion_ip}")
                 else:
                     print(f"Conexión SMB cerrada con {direccion_ip}")
 
                 ventana_estado.destroy()
+                # La próxima cámara conectada vuelve a abrir la ventana de estado
+                ventana_estado = None
 
                 if(idioma=="EN"):
                     messagebox.showinfo("Connection Closed", f"Closed connection with {direccion_ip}.")
@@ -508,33 +491,50 @@ def obtener_datos_camara():
             else:
                 estado_label.config(text=f"Dirección IP: {direccion_ip}\nEstado: Conectado")
 
+    # Texto de la ventana de estado: una línea por cámara con su estado y su última latencia
+    def texto_estado_camaras():
+        nombres_estado = {
+            monitor.CONECTADO: "Connected" if idioma == "EN" else "Conectado",
+            monitor.DESCONECTADO: "Disconnected" if idioma == "EN" else "Desconectado",
+            monitor.DESCONOCIDO: "Checking" if idioma == "EN" else "Comprobando",
+        }
+        lineas = []
+        for direccion_ip, camara in monitor.estado_camaras(monitor_camaras).items():
+            latencia = f" ({camara['latencia'] * 1000:.0f} ms)" if camara['latencia'] is not None else ""
+            lineas.append(f"{direccion_ip}: {nombres_estado[camara['estado']]}{latencia}")
+        return "\n".join(lineas)
+
+    # Añadir la cámara al monitor único, que comprueba todas las cámaras a la vez en un solo hilo
     def monitorizar_conexion(direccion_ip):
-        global direccion_ip_global, ventana_estado
-
-        while monitor_running:
-            ping_exit_code = subprocess.call(['ping', '-n', '1', direccion_ip], stdout=subprocess.DEVNULL)
-            if ping_exit_code != 0:
-                if direccion_ip == direccion_ip_global:
-                    if(idioma=="EN"):
-                        estado_label.config(text=f"IP Address: {direccion_ip}\nStatus: Disconnected")
-                        messagebox.showwarning("Connection Lost", f"The connection to {direccion_ip} has been lost.")
-                    else:
-                        estado_label.config(text=f"Dirección IP: {direccion_ip}\nEstado: Desconectado")
-                        messagebox.showwarning("Conexión Perdida", f"Se ha perdido la conexión con {direccion_ip}.")
-
-                    ventana_estado.destroy()
-                    break
-
-            time.sleep(5)
+        global monitor_camaras
+        if monitor_camaras is None:
+            monitor_camaras = monitor.iniciar_monitor()
+            root.after(INTERVALO_SONDEO_MS, revisar_monitor)
+        monitor.agregar_camara(monitor_camaras, direccion_ip)
+
+    # Leer los cambios de estado del monitor desde el hilo de la interfaz
+    def revisar_monitor():
+        if monitor_camaras is None:
+            return
+        cambios = monitor.leer_cambios(monitor_camaras)
+        if cambios and ventana_estado is not None and ventana_estado.winfo_exists():
+            estado_label.config(text=texto_estado_camaras())
+        for direccion_ip, _, estado in cambios:
+            if estado == monitor.DESCONECTADO:
+                if(idioma=="EN"):
+                    messagebox.showwarning("Connection Lost", f"The connection to {direccion_ip} has been lost.")
+                else:
+                    messagebox.showwarning("Conexión Perdida", f"Se ha perdido la conexión con {direccion_ip}.")
+        root.after(INTERVALO_SONDEO_MS, revisar_monitor)
 
     def abrir_ventana_seleccion_archivos():
-        global ventana_archivos, progress_bar, progress_label, ventana_archivos
+        global ventana_archivos
         ventana_archivos = tk.Toplevel(root)
         if(idioma=="EN"):
             ventana_archivos.title("Select the files to copy:")
         else:
             ventana_archivos.title("Seleccionar Archivos a copiar")
-        ventana_archivos.geometry("300x350")
+        ventana_archivos.geometry("300x510")
         ventana_archivos.resizable(False, False)
         # Configurar la ventana para que siempre se muestre al frente
         ventana_archivos.attributes('-topmost', True)
@@ -545,17 +545,13 @@ def obtener_datos_camara():
             etiqueta_instrucciones = ttk.Label(ventana_archivos, text="Selecciona los archivos a copiar:")
         etiqueta_instrucciones.pack(pady=10)
 
-        var_jpg = tk.IntVar()
-        check_jpg = ttk.Checkbutton(ventana_archivos, text="JPG", variable=var_jpg)
-        check_jpg.pack()
-
-        var_png = tk.IntVar()
-        check_png = ttk.Checkbutton(ventana_archivos, text="PNG", variable=var_png)
-        check_png.pack()
-
-        var_txt = tk.IntVar()
-        check_txt = ttk.Checkbutton(ventana_archivos, text="TXT", variable=var_txt)
-        check_txt.pack()
+        # Una casilla por tipo de archivo que se puede extraer
+        variables_extensiones = {}
+        for extension in (".jpg", ".png", ".txt", ".bmp", ".mim", ".csv"):
+            variables_extensiones[extension] = tk.IntVar()
+            check_extension = ttk.Checkbutton(ventana_archivos, text=extension[1:].upper(),
+                                              variable=variables_extensiones[extension])
+            check_extension.pack()
 
         # Instrucciones combo box
         if(idioma=="EN"):
@@ -572,24 +568,35 @@ def obtener_datos_camara():
 
         combo_inspeccion.pack(pady=10)
 
-        # Widget de progreso inicialmente oculto
+        # Sincronizar: copia espejo por cámara en la que solo se copian los archivos nuevos o modificados
+        var_sincronizar = tk.IntVar()
+        if(idioma=="EN"):
+            check_sincronizar = ttk.Checkbutton(ventana_archivos, text="Sync (new files only)", variable=var_sincronizar)
+        else:
+            check_sincronizar = ttk.Checkbutton(ventana_archivos, text="Sincronizar (solo archivos nuevos)",
+                                                variable=var_sincronizar)
+        check_sincronizar.pack()
+
+        # Clasificar y generar estadísticos mientras se descargan los archivos
+        var_procesar = tk.IntVar()
         if(idioma=="EN"):
-            progress_label = ttk.Label(ventana_archivos, text="Extraction Progress:")
+            check_procesar = ttk.Checkbutton(ventana_archivos, text="Classify and generate statistics",
+                                             variable=var_procesar)
         else:
-            progress_label = ttk.Label(ventana_archivos, text="Progreso de Extracción:")
-        progress_label.pack(pady=10)
-        progress_label.pack_forget()
-        progress_bar = ttk.Progressbar(ventana_archivos, orient='horizontal', length=100, mode='determinate')
-        progress_bar.pack(pady=10)
-        progress_bar.pack_forget()  # Ocultar inicialmente el widget de progress
+            check_procesar = ttk.Checkbutton(ventana_archivos, text="Clasificar y generar estadísticos",
+                                             variable=var_procesar)
+        check_procesar.pack(pady=(0, 10))
 
         if(idioma=="EN"):
             boton_extraer = ttk.Button(ventana_archivos, text="Extract Files",
-                                   command=lambda: extraer_archivos(var_jpg, var_png, var_txt, combo_inspeccion.get()))
+                                   command=lambda: extraer_archivos(variables_extensiones, combo_inspeccion.get(),
+                                                                    var_sincronizar.get(), var_procesar.get()))
         else:
             boton_extraer = ttk.Button(ventana_archivos, text="Extraer Archivos",
-                                       command=lambda: extraer_archivos(var_jpg, var_png, var_txt,
-                                                                        combo_inspeccion.get()))
+                                       command=lambda: extraer_archivos(variables_extensiones,
+                                                                        combo_inspeccion.get(),
+                                                                        var_sincronizar.get(),
+                                                                        var_procesar.get()))
         boton_extraer.pack(pady=10)
         if(idioma=="EN"):
             boton_cerrar = ttk.Button(ventana_archivos, text="Close", command=ventana_archivos.destroy)
@@ -598,8 +605,8 @@ def obtener_datos_camara():
             boton_cerrar = ttk.Button(ventana_archivos, text="Cerrar", command=ventana_archivos.destroy)
             boton_cerrar.pack(pady=10)
 
-    def extraer_archivos(var_jpg, var_png, var_txt, inspeccion=None):
-        global conjunto_ip, progess_bar, progress_label, ventana_archivos
+    def extraer_archivos(variables_extensiones, inspeccion=None, sincronizar=False, procesar=False):
+        global conjunto_ip, ventana_archivos
         estacion = None
 
         # Condicion para cuando se selecciona Todas las inspecciones
@@ -618,17 +625,8 @@ def obtener_datos_camara():
         if not carpeta_destino_padre:
             return
 
-        extensiones_seleccionadas = []
-        if var_jpg.get():
-            extensiones_seleccionadas.append(".jpg")
-        if var_png.get():
-            extensiones_seleccionadas.append(".png")
-        if var_txt.get():
-            extensiones_seleccionadas.append(".txt")
-
-        progress_label.pack()
-        progress_bar['value'] = 0
-        progress_bar.pack()  # Mostrar el widget de progreso
+        extensiones_seleccionadas = [extension for extension, variable in variables_extensiones.items()
+                                     if variable.get()]
 
         if not extensiones_seleccionadas:
             if(idioma=="EN"):
@@ -638,57 +636,42 @@ def obtener_datos_camara():
                 messagebox.showwarning("Warning", "No file type has been selected to copy.")
                 return
 
-        for ip in conjunto_ip:
-            i = 0
+        camaras = []
+        for i, ip in enumerate(conjunto_ip):
             if conjunto_estacion != []:
                 estacion = conjunto_estacion[i]
             else:
                 estacion = "Estacion"
+            camaras.append((ip, estacion))
 
-            ruta_origen = f"\\\\{ip}\\mtxuser"
-
-            # Crear nombre de la carpeta con "valor en columna"m "-", "dirección IP", "fecha"
-            now = datetime.now()
-            fecha = now.strftime("%Y-%m-%d_%H-%M-%S")
-            nombre_carpeta = f"{estacion}-{ip}-{fecha}"
-
-            # Ruta completa de la carpeta destino
-            carpeta_destino = os.path.join(carpeta_destino_padre, nombre_carpeta)
-
-            # Crear la carpeta si no existe
-            if not os.path.exists(carpeta_destino):
-                os.makedirs(carpeta_destino)
-
-            total_archivos = sum(len(files) for _, _, files in os.walk(ruta_origen))
-            progress_bar['maximum'] = total_archivos
-
-            # Copiar archivos según la inspección seleccionada
-            for raiz, dirs, archivos in os.walk(ruta_origen):
-                for archivo in archivos:
-                    if any(archivo.lower().endswith(ext) for ext in extensiones_seleccionadas):
-                        if inspeccion is None or inspeccion.lower() in archivo.lower():
-                            ruta_completa_origen = os.path.join(raiz, archivo)
-                            ruta_completa_destino = os.path.join(carpeta_destino, archivo)
-                            try:
-                                shutil.copy2(ruta_completa_origen, ruta_completa_destino)
-                                if(idioma=="EN"):
-                                    print(f"File copied: {ruta_completa_origen} -> {ruta_completa_destino}")
-                                else:
-                                    print(f"Archivo copiado: {ruta_completa_origen} -> {ruta_completa_destino}")
-                                progress_bar['value'] += 1
-                                ventana_archivos.update_idletasks()  # Actualizar la ventana para mostrar el progreso
-
-                            except Exception as e:
-                                if(idioma=="EN"):
-                                    print(f"Error copying file {ruta_completa_origen}: {str(e)}")
-                                else:
-                                    print(f"Error al copiar el archivo {ruta_completa_origen}: {str(e)}")
-            i = i + 1
-        if(idioma=="EN"):
-            messagebox.showinfo("Complete Extraction", "Files extracted successfully.")
+        # Las cámaras que han fallado no detienen las demás: se indican al terminar
+        def al_terminar(resultado):
+            errores = extraccion.errores_extraccion(resultado)
+            if errores:
+                lineas = "\n".join(f"{direccion_ip}: {error}" for direccion_ip, error in errores.items())
+                if(idioma=="EN"):
+                    messagebox.showwarning("Extraction Finished with Errors",
+                                           f"These cameras could not be extracted:\n{lineas}")
+                else:
+                    messagebox.showwarning("Extracción con Errores",
+                                           f"No se pudieron extraer estas cámaras:\n{lineas}")
+            elif(idioma=="EN"):
+                messagebox.showinfo("Complete Extraction", "Files extracted successfully.")
+            else:
+                messagebox.showinfo("Extracción Completa", "Archivos extraídos correctamente.")
+
+        # Copiar archivos de todas las cámaras a la vez según la inspección seleccionada, en segundo plano
+        titulo = "Extraction Progress" if idioma == "EN" else "Progreso de Extracción"
+        if procesar:
+            # Los archivos se clasifican y los .txt se analizan durante la descarga (sin sincronización)
+            reglas_clasificacion = reglas.cargar_reglas(ruta_reglas if os.path.isfile(ruta_reglas) else None)
+            ejecutar_trabajo(titulo, flujo.extraer_y_procesar, camaras, carpeta_destino_padre,
+                             extensiones_seleccionadas, inspeccion, reglas_clasificacion,
+                             transporte=transporte_camaras, al_terminar=al_terminar)
         else:
-            messagebox.showinfo("Extracción Completa", "Archivos extraídos correctamente.")
-        progress_bar.pack_forget()  # Ocultar el widget de progreso al finalizar
+            ejecutar_trabajo(titulo, extraccion.extraer_archivos_camaras, camaras, carpeta_destino_padre,
+                             extensiones_seleccionadas, inspeccion, sincronizar=bool(sincronizar),
+                             transporte=transporte_camaras, al_terminar=al_terminar)
 
     def abrir_ventana_credenciales(direccion_ip):
         ventana_credenciales = tk.Toplevel(root)
@@ -733,31 +716,20 @@ def obtener_datos_camara():
             boton_guardar.pack(pady=20)
 
     def autenticar_conexion(direccion_ip, usuario, contrasena):
-        try:
-            comando = f"net use \\\\{direccion_ip}\\IPC$ /user:{usuario} {contrasena}"
-            subprocess.run(comando, shell=True, check=True)
+        resultado = extraccion.conectar_camara(direccion_ip, usuario, contrasena, transporte=transporte_camaras)
+        if resultado in (extraccion.CONEXION_NUEVA, extraccion.CONEXION_REUTILIZADA):
+            camara_conectada(direccion_ip)
+        elif resultado == extraccion.CONEXION_ERROR_CREDENCIALES:
             if(idioma=="EN"):
-                print(f"SMB connection established with {direccion_ip}")
+                messagebox.showerror("Error", f"Failed to establish SMB connection to {direccion_ip}.")
             else:
-                print(f"Conexión SMB establecida con {direccion_ip}")
-
-            if ventana_archivos is None:
-                abrir_ventana_seleccion_archivos()
-
-            if ventana_estado is None:
-                mostrar_ventana_estado(direccion_ip)
-
-            monitor_running = True
-            if monitor_conexion is None or not monitor_conexion.is_alive():
-                monitor_conexion = threading.Thread(target=monitorizar_conexion, args=(direccion_ip,))
-                monitor_conexion.start()
-
-        except subprocess.CalledProcessError as e:
+                messagebox.showerror("Error", f"No se pudo establecer la conexión SMB con {direccion_ip}.")
+            abrir_ventana_credenciales(direccion_ip)
+        else:
             if(idioma=="EN"):
-                messagebox.showerror("Error", f"Failed to establish SMB connection to {direccion_ip}: {str(e)}")
+                messagebox.showerror("Error", f"Could not ping IP address {direccion_ip}.")
             else:
-                messagebox.showerror("Error", f"No se pudo establecer la conexión SMB con {direccion_ip}: {str(e)}")
-            abrir_ventana_credenciales(direccion_ip)
+                messagebox.showerror("Error", f"No se pudo hacer ping a la dirección IP {direccion_ip}.")
 
     def mostrar_ventana_ip():
         ventana_ip = tk.Toplevel(root)
@@ -870,19 +842,47 @@ def obtener_datos_camara():
                 boton_seleccionar.pack(pady=10)
 
         def procesar_seleccion():
-            global conjunto_ip, conjunto_estacion
-            conjunto_ip = selected_ips
-            conjunto_estacion = [ip_estacion_dict[ip] for ip in conjunto_ip]
             seleccionar_ips.destroy()
+            if not selected_ips:
+                return
 
-            if(idioma=="EN"):
-                messagebox.showinfo("Complete Selection",
-                                f"Selected IPs: {conjunto_ip}\nSelected stations: {conjunto_estacion}")
-            else:
-                messagebox.showinfo("Selección Completa",
-                                    f"IPs seleccionadas: {conjunto_ip}\nEstaciones seleccionadas: {conjunto_estacion}")
-            for ip in conjunto_ip:
-                procesar_direccion_ip(ip)
+            # Al terminar: resumen por estación, y solo las cámaras alcanzables quedan para la extracción
+            def al_terminar(resultados):
+                global conjunto_ip, conjunto_estacion
+                conjunto_ip = [ip for ip, resultado in resultados.items()
+                               if resultado != extraccion.CONEXION_SIN_RESPUESTA]
+                conjunto_estacion = [ip_estacion_dict[ip] for ip in conjunto_ip]
+                if(idioma=="EN"):
+                    nombres_resultado = {
+                        extraccion.CONEXION_NUEVA: "connected",
+                        extraccion.CONEXION_REUTILIZADA: "connected (existing session)",
+                        extraccion.CONEXION_SIN_RESPUESTA: "unreachable",
+                        extraccion.CONEXION_ERROR_CREDENCIALES: "authentication failed",
+                    }
+                else:
+                    nombres_resultado = {
+                        extraccion.CONEXION_NUEVA: "conectada",
+                        extraccion.CONEXION_REUTILIZADA: "conectada (sesión existente)",
+                        extraccion.CONEXION_SIN_RESPUESTA: "sin respuesta",
+                        extraccion.CONEXION_ERROR_CREDENCIALES: "error de autenticación",
+                    }
+                resumen = "\n".join(f"{ip_estacion_dict[ip]} ({ip}): {nombres_resultado[resultado]}"
+                                    for ip, resultado in resultados.items())
+                if(idioma=="EN"):
+                    messagebox.showinfo("Complete Selection", f"Connection of the selected stations:\n{resumen}")
+                else:
+                    messagebox.showinfo("Selección Completa", f"Conexión de las estaciones seleccionadas:\n{resumen}")
+
+                for ip, resultado in resultados.items():
+                    if resultado in (extraccion.CONEXION_NUEVA, extraccion.CONEXION_REUTILIZADA):
+                        camara_conectada(ip)
+                    elif resultado == extraccion.CONEXION_ERROR_CREDENCIALES:
+                        abrir_ventana_credenciales(ip)
+
+            # Todas las cámaras seleccionadas se conectan a la vez en segundo plano
+            titulo = "Connecting Cameras" if idioma == "EN" else "Conectando Cámaras"
+            ejecutar_trabajo(titulo, extraccion.conectar_camaras, list(selected_ips), transporte=transporte_camaras,
+                             al_terminar=al_terminar)
 
         if(idioma=="EN"):
             ttk.Button(seleccionar_ips, text="Accept", command=procesar_seleccion).pack(pady=10)
@@ -966,89 +966,90 @@ def actualizar_texto_elementos():
         boton_obtener_datos.config(text="Obtener datos de la cámara")
         encabezadoIdioma_label.config(text="Cambiar idioma:")
 
-# Configuración de la ventana principal
-root = tk.Tk()
-root.title("Inspection Tools Statistics V1.01")
-root.geometry("450x550")  # Establecer el tamaño inicial de la ventana
-root.resizable(False, False)  # Evitar que la ventana se redimensione
+if __name__ == "__main__":
+    # Configuración de la ventana principal
+    root = tk.Tk()
+    root.title("Inspection Tools Statistics V1.01")
+    root.geometry("450x550")  # Establecer el tamaño inicial de la ventana
+    root.resizable(False, False)  # Evitar que la ventana se redimensione
 
-# Estilo de Material Design
-style = ttk.Style()
-style.theme_use("clam")  # Elige el estilo Material Design
-style.configure("TLabel", foreground="black", background="#f0f0f0", font=('Roboto', 10))
-style.configure("TButton", padding=10, relief="flat", background="#3f51b5", foreground="white", font=('Roboto', 8, 'bold'), width=30)
-style.map("TButton", background=[('active', '#283593')])
+    # Estilo de Material Design
+    style = ttk.Style()
+    style.theme_use("clam")  # Elige el estilo Material Design
+    style.configure("TLabel", foreground="black", background="#f0f0f0", font=('Roboto', 10))
+    style.configure("TButton", padding=10, relief="flat", background="#3f51b5", foreground="white", font=('Roboto', 8, 'bold'), width=30)
+    style.map("TButton", background=[('active', '#283593')])
 
-# Nuevo estilo para los botones en la ventana principal con letra más pequeña
-style.configure("BotonesVentanaPrincipal.TButton", font=('Roboto', 7, 'bold'))
+    # Nuevo estilo para los botones en la ventana principal con letra más pequeña
+    style.configure("BotonesVentanaPrincipal.TButton", font=('Roboto', 7, 'bold'))
 
-# Etiqueta para mostrar las instrucciones
-instrucciones_label = ttk.Label(root, text="———————————| INSTRUCCIONES |—————————————\n\n1. Seleccionar la carpeta para seleccionar los archivos a clasificar.\n2. Dependiendo de los datos de interes, dar click en el boton de 'Generar\n    Estadistico' o si se necesita algún otro dato dar click en el botón\n    'Estadisticos Datos Especificos'.")
-instrucciones_label.place(x=10, y=380)
+    # Etiqueta para mostrar las instrucciones
+    instrucciones_label = ttk.Label(root, text="———————————| INSTRUCCIONES |—————————————\n\n1. Seleccionar la carpeta para seleccionar los archivos a clasificar.\n2. Dependiendo de los datos de interes, dar click en el boton de 'Generar\n    Estadistico' o si se necesita algún otro dato dar click en el botón\n    'Estadisticos Datos Especificos'.")
+    instrucciones_label.place(x=10, y=380)
 
-# Combinar la ruta del directorio actual con el nombre de la imagen
-ruta_imagen_matrox = os.path.join(directorio_actual, "matrox.png")
-# Cargar imagen Matrox en la ventana principal
-imagen_matrox = tk.PhotoImage(file=ruta_imagen_matrox)
+    # Combinar la ruta del directorio actual con el nombre de la imagen
+    ruta_imagen_matrox = os.path.join(directorio_actual, "matrox.png")
+    # Cargar imagen Matrox en la ventana principal
+    imagen_matrox = tk.PhotoImage(file=ruta_imagen_matrox)
 
-# Widget para mostrar la imagen Matrox en la ventana principal
-matrox_label = tk.Label(root, image=imagen_matrox)
-matrox_label.place(x=390, y=5)
+    # Widget para mostrar la imagen Matrox en la ventana principal
+    matrox_label = tk.Label(root, image=imagen_matrox)
+    matrox_label.place(x=390, y=5)
 
-# Combinar la ruta del directorio actual con el nombre de la imagen
-ruta_imagen_vista = os.path.join(directorio_actual, "vista.png")
-# Cargar imagen Vista en la ventana principal
-imagen_vista = tk.PhotoImage(file=ruta_imagen_vista)
+    # Combinar la ruta del directorio actual con el nombre de la imagen
+    ruta_imagen_vista = os.path.join(directorio_actual, "vista.png")
+    # Cargar imagen Vista en la ventana principal
+    imagen_vista = tk.PhotoImage(file=ruta_imagen_vista)
 
-# Widget para mostrar la imagen Vista en la ventana principal
-imagen_label = tk.Label(root, image=imagen_vista)
-imagen_label.pack(side="top", padx=20, pady=15, anchor="nw")
+    # Widget para mostrar la imagen Vista en la ventana principal
+    imagen_label = tk.Label(root, image=imagen_vista)
+    imagen_label.pack(side="top", padx=20, pady=15, anchor="nw")
 
-# Etiqueta para mostrar las encabezado de los botones
-encabezado_label = ttk.Label(root, text="—————————————| FUNCIONES |——————————————")
-encabezado_label.pack(pady=10, anchor="w", padx=15)
+    # Etiqueta para mostrar las encabezado de los botones
+    encabezado_label = ttk.Label(root, text="—————————————| FUNCIONES |——————————————")
+    encabezado_label.pack(pady=10, anchor="w", padx=15)
 
-# Botón para generar estadísticos
-estadisticos_button = ttk.Button(root, text="Generar Estadísticos Blobs", command=generar_estadisticos, style="TButton")
-estadisticos_button.place(x=230, y=107)
+    # Botón para generar estadísticos
+    estadisticos_button = ttk.Button(root, text="Generar Estadísticos Blobs", command=generar_estadisticos, style="TButton")
+    estadisticos_button.place(x=230, y=107)
 
-# Botón para clasificar
-seleccionar_button = ttk.Button(root, text="Clasificar Extensiones", command=seleccionar_carpeta_principal, style="TButton")
-seleccionar_button.pack(pady=10, anchor="w", padx=15)
+    # Botón para clasificar
+    seleccionar_button = ttk.Button(root, text="Clasificar Extensiones", command=seleccionar_carpeta_principal, style="TButton")
+    seleccionar_button.pack(pady=10, anchor="w", padx=15)
 
-# Botón para abrir el archivo de estadísticos
-abrir_estadisticos_button = ttk.Button(root, text="Abrir Estadísticos", command=abrir_estadisticos, style="TButton")
-abrir_estadisticos_button.pack(pady=5, anchor="w", padx=115)
+    # Botón para abrir el archivo de estadísticos
+    abrir_estadisticos_button = ttk.Button(root, text="Abrir Estadísticos", command=abrir_estadisticos, style="TButton")
+    abrir_estadisticos_button.pack(pady=5, anchor="w", padx=115)
 
-# Etiqueta para mostrar las encabezado de los botones
-encabezadoSPECIAL_label = ttk.Label(root, text="—————————| FUNCIONES ESPECIALES |————————————")
-encabezadoSPECIAL_label.pack(pady=10, anchor="w", padx=15)
+    # Etiqueta para mostrar las encabezado de los botones
+    encabezadoSPECIAL_label = ttk.Label(root, text="—————————| FUNCIONES ESPECIALES |————————————")
+    encabezadoSPECIAL_label.pack(pady=10, anchor="w", padx=15)
 
-# Botón para generar estadísticos de datos específicos
-estadisticos_especificos_button = ttk.Button(root, text="Estadísticos Datos Específicos", command=generar_estadisticos_datos_especificos, style="TButton")
-estadisticos_especificos_button.pack(pady=5, anchor="w", padx=115)
+    # Botón para generar estadísticos de datos específicos
+    estadisticos_especificos_button = ttk.Button(root, text="Estadísticos Datos Específicos", command=generar_estadisticos_datos_especificos, style="TButton")
+    estadisticos_especificos_button.pack(pady=5, anchor="w", padx=115)
 
-# Etiqueta para mostrar mensajes
-mensaje_label = ttk.Label(root, text="", style="TLabel")
-mensaje_label.pack()
+    # Etiqueta para mostrar mensajes
+    mensaje_label = ttk.Label(root, text="", style="TLabel")
+    mensaje_label.pack()
 
-# Etiqueta para mostrar la ruta del archivo de estadísticos
-etiqueta_ruta = ttk.Label(root, text="", style="TLabel")
-etiqueta_ruta.place(x=1000, y=1000)
+    # Etiqueta para mostrar la ruta del archivo de estadísticos
+    etiqueta_ruta = ttk.Label(root, text="", style="TLabel")
+    etiqueta_ruta.place(x=1000, y=1000)
 
-# Botón para obtener datos de la cámara con estilo personalizado
-boton_obtener_datos = ttk.Button(root, text="Obtener datos de la cámara", command=obtener_datos_camara, style="TButton")
-boton_obtener_datos.pack(pady=5, anchor="w", padx=115)
+    # Botón para obtener datos de la cámara con estilo personalizado
+    boton_obtener_datos = ttk.Button(root, text="Obtener datos de la cámara", command=obtener_datos_camara, style="TButton")
+    boton_obtener_datos.pack(pady=5, anchor="w", padx=115)
 
-# Etiqueta para mostrar las encabezado del boton cambiar idioma
-encabezadoIdioma_label = ttk.Label(root, text="Cambiar idioma:")
-encabezadoIdioma_label.place(relx=1.0, rely=1.0, x=-100, y=-25, anchor="se")
+    # Etiqueta para mostrar las encabezado del boton cambiar idioma
+    encabezadoIdioma_label = ttk.Label(root, text="Cambiar idioma:")
+    encabezadoIdioma_label.place(relx=1.0, rely=1.0, x=-100, y=-25, anchor="se")
 
 
-# Botón para cambiar el idioma de la aplicación
-boton_cambiar_idioma = ttk.Button(root, text="English", command=cambiar_idioma, style="TButton", width=10)
-boton_cambiar_idioma.place(relx=1.0, rely=1.0, x=-10, y=-10, anchor="se")
+    # Botón para cambiar el idioma de la aplicación
+    boton_cambiar_idioma = ttk.Button(root, text="English", command=cambiar_idioma, style="TButton", width=10)
+    boton_cambiar_idioma.place(relx=1.0, rely=1.0, x=-10, y=-10, anchor="se")
 
 
-# Mostrar la ventana principal
-root.mainloop()
+    # Mostrar la ventana principal
+    root.mainloop()
@@ -0,0 +1,89 @@
+"""
+Matrox Data
+===========
+
+GUI-free core of the Camera Statistics tool. It can be imported without a display and without Tk or PIL,
+so the same parsing, classification, statistics and extraction logic used by Camera_Statistics.py can run
+in batch jobs.
+
+Modules:
+--------
+- agregados: Vectorized per-camera and per-recipe summary with Cpk and Pass/Fail rates.
+- almacen: SQLite store of the parsed results with indexed queries by camera, recipe, time and result.
+- analizador: Single-pass parser of the Matrox result .txt files.
+- bloques: Memory-bounded build of the statistics workbook from typed chunks spilled to temporary files.
+- cache_columnar: Typed Parquet/Feather cache of the parsed results.
+- clasificacion: Classifies files into subfolders based on their extensions.
+- estadisticos: Generates the blob statistics workbook from the 'TXT' subfolders.
+- datos_especificos: Generates the workbook of user-specified parameters.
+- escaner: Single os.scandir directory scanner shared by the other modules.
+- excel: Writes the statistics workbooks without per-cell loops.
+- extraccion: Connects to the cameras and copies their result files.
+- flujo: Extraction that classifies and parses the files while they download.
+- manifiesto: Per-file manifest used by the incremental statistics mode.
+- monitor: Single asyncio monitor of the camera connections with latency history.
+- particiones: Splits the output by camera, day or row count into sheets, workbooks or gzipped CSV files.
+- registros: Compact statistics DataFrame (categorical and small nullable integer columns).
+- reglas: Configurable classification and extraction rules.
+- tendencias: Time-indexed rolling statistics and EWMA/CUSUM drift detection per camera.
+- trabajos: Background jobs with throttled progress and cancellation.
+- transporte: Mounted path, SMB client and local simulator access to the cameras.
+- cli: Command line entry point, run as 'python -m matrox_data'.
+"""
+from .agregados import calcular_agregados, calcular_tasas_inspeccion, cargar_limites, guardar_agregados
+from .almacen import abrir_almacen, consultar_parametros, consultar_resultados, ingerir_carpeta
+from .analizador import (
+    POLITICAS_REPETIDAS,
+    Registro,
+    analizar_pares_clave_valor,
+    analizar_registro,
+    analizar_resultados,
+    leer_archivo_resultados,
+    leer_pares_clave_valor,
+    leer_registro_resultados,
+    registro_a_fila,
+)
+from .cache_columnar import cargar_cache, guardar_cache, tipar_resultados
+from .clasificacion import clasificar_archivos, ejecutar_plan, planificar_clasificacion
+from .datos_especificos import (
+    PARAMETROS_BASE,
+    buscar_datos_especificos,
+    generar_estadisticos_datos_especificos,
+    generar_excel_datos_especificos,
+    normalizar_parametros,
+)
+from .estadisticos import (
+    buscar_subcarpetas_txt,
+    calcular_estadisticos,
+    calcular_estadisticos_incremental,
+    escanear_archivos_txt,
+    exportar_excel_desde_cache,
+    generar_estadisticos,
+    generar_estadisticos_con_resumen,
+    generar_estadisticos_por_bloques,
+)
+from .escaner import escanear
+from .excel import MAX_FILAS_EXCEL, guardar_excel_estadisticos, guardar_excel_por_bloques
+from .extraccion import (
+    conectar_smb,
+    desconectar_smb,
+    errores_extraccion,
+    extraer_archivos_camara,
+    extraer_archivos_camaras,
+    hacer_ping,
+    sincronizar_camara,
+)
+from .flujo import extraer_y_procesar
+from .monitor import detener_monitor, estado_camaras, iniciar_monitor, leer_cambios, sondear_tcp
+from .particiones import guardar_particiones, particionar
+from .registros import compactar_tipos, tabla_registros
+from .reglas import REGLAS_POR_DEFECTO, cargar_reglas, compilar_filtro, compilar_reglas, destino_archivo
+from .tendencias import calcular_tendencias, guardar_tendencias, indexar_por_tiempo, resumir_derivas
+from .trabajos import cancelar_trabajo, iniciar_trabajo, leer_trabajo
+from .transporte import (
+    cargar_transporte,
+    crear_transporte,
+    transporte_montado,
+    transporte_simulado,
+    transporte_smb,
+)
@@ -0,0 +1,149 @@
+"""
+Aggregate Statistics
+====================
+
+Summary of the blob statistics per camera and Recipe ID, computed with vectorized pandas groupby operations
+instead of Excel formulas over the raw rows.
+
+For every group and every 'Blob N Threshold/Min/Max/Area' column the summary has the count, mean, standard
+deviation, minimum, percentiles and maximum, and the Cpk against the specification limits when they are given.
+A second table has the number of files and the Pass/Fail rates of each group, taken from the file names. The
+limits are loaded from a JSON file such as:
+
+    {"Area": {"lie": 100, "lse": 900}, "Blob 1 Threshold": {"lse": 200}}
+
+where a key is a full column name or a field (Threshold, Min, Max, Area) that applies to every blob; the full
+column name wins. 'lie' and 'lse' are the lower and upper specification limits; with only one of them the Cpk
+is the one-sided index.
+
+Functions:
+----------
+- cargar_limites(ruta=None)
+    Loads the specification limits of a JSON file, or no limits if ruta is None. Raises ValueError if the file
+    is not a JSON object.
+
+- calcular_agregados(df, limites=None, grupos=GRUPOS_AGREGADOS, percentiles=PERCENTILES)
+    Returns one row per group and blob column with N, Media, Desviacion, Min, the percentiles, Max, LIE, LSE
+    and Cpk.
+
+- calcular_tasas_inspeccion(df, grupos=GRUPOS_AGREGADOS)
+    Returns the number of files, Pass, Fail and their percentages per group.
+
+- ruta_agregados(ruta_excel)
+    Returns the summary workbook path, '<workbook>_agregados.xlsx'.
+
+- guardar_agregados(df, ruta_excel, limites=None)
+    Writes both tables as the 'Agregados' and 'Pass_Fail' sheets of the summary workbook and returns its path.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache_columnar import PATRON_COLUMNA_BLOB
+from .excel import escribir_hoja_estadisticos, motor_excel
+from .reglas import PATRON_RESULTADO
+
+GRUPOS_AGREGADOS = ('Camara', 'Recipe ID')
+PERCENTILES = (0.05, 0.5, 0.95)
+
+
+# Función para cargar los límites de especificación de un archivo JSON
+def cargar_limites(ruta=None):
+    if ruta is None:
+        return {}
+    with open(ruta, 'r', encoding='utf-8') as file:
+        limites = json.load(file)
+    if not isinstance(limites, dict):
+        raise ValueError(f"The specification limits in '{ruta}' must be a JSON object, "
+                         'e.g. {"Area": {"lie": 100, "lse": 900}}.')
+    return limites
+
+
+# Función para obtener los límites de una columna: primero por nombre completo y si no por campo del blob
+def limites_columna(limites, columna):
+    if columna in limites:
+        return limites[columna]
+    return limites.get(columna.rsplit(' ', 1)[-1], {})
+
+
+# Función para preparar las columnas de agrupación (la cámara son los 19 primeros caracteres del archivo)
+def columnas_grupo(df, grupos):
+    df = df.copy()
+    if 'Camara' in grupos and 'Camara' not in df.columns:
+        df['Camara'] = df['Archivo'].str[:19]
+    return df
+
+
+# Función para calcular los agregados por grupo y columna de blob en una sola pasada vectorizada
+def calcular_agregados(df, limites=None, grupos=GRUPOS_AGREGADOS, percentiles=PERCENTILES):
+    grupos = list(grupos)
+    limites = limites or {}
+    columnas = [columna for columna in df.columns if PATRON_COLUMNA_BLOB.fullmatch(columna)]
+    nombres_percentiles = [f'P{round(percentil * 100):02d}' for percentil in percentiles]
+    columnas_salida = (grupos + ['Medida', 'N', 'Media', 'Desviacion', 'Min'] + nombres_percentiles
+                       + ['Max', 'LIE', 'LSE', 'Cpk'])
+    if df.empty or not columnas:
+        return pd.DataFrame(columns=columnas_salida)
+
+    df = columnas_grupo(df, grupos)
+    valores = df[columnas].apply(pd.to_numeric, errors='coerce').astype('float64')
+    agrupados = valores.groupby([df[grupo] for grupo in grupos], sort=True, dropna=False, observed=True)
+
+    # Cada estadístico se calcula para todas las columnas a la vez y se apila a formato largo
+    estadisticos = {
+        'N': agrupados.count(),
+        'Media': agrupados.mean(),
+        'Desviacion': agrupados.std(),
+        'Min': agrupados.min(),
+        'Max': agrupados.max(),
+    }
+    for nombre, percentil in zip(nombres_percentiles, percentiles):
+        estadisticos[nombre] = agrupados.quantile(percentil)
+    resultado = pd.concat({nombre: tabla.stack() for nombre, tabla in estadisticos.items()}, axis=1)
+    resultado.index = resultado.index.set_names(grupos + ['Medida'])
+    resultado = resultado.reset_index()
+    resultado['N'] = resultado['N'].astype('int64')
+
+    # Cpk = min(LSE - media, media - LIE) / (3 * desviación); con un solo límite, el índice de ese lado
+    resultado['LIE'] = resultado['Medida'].map(lambda columna: limites_columna(limites, columna).get('lie'))
+    resultado['LSE'] = resultado['Medida'].map(lambda columna: limites_columna(limites, columna).get('lse'))
+    resultado[['LIE', 'LSE']] = resultado[['LIE', 'LSE']].astype('float64')
+    tres_sigma = 3 * resultado['Desviacion'].where(resultado['Desviacion'] > 0)
+    cpk_superior = (resultado['LSE'] - resultado['Media']) / tres_sigma
+    cpk_inferior = (resultado['Media'] - resultado['LIE']) / tres_sigma
+    resultado['Cpk'] = np.fmin(cpk_superior, cpk_inferior)
+    return resultado[columnas_salida]
+
+
+# Función para calcular el número de archivos y las tasas de Pass/Fail por grupo a partir del nombre del archivo
+def calcular_tasas_inspeccion(df, grupos=GRUPOS_AGREGADOS):
+    grupos = list(grupos)
+    columnas_salida = grupos + ['Archivos', 'Pass', 'Fail', '% Pass', '% Fail']
+    if df.empty:
+        return pd.DataFrame(columns=columnas_salida)
+
+    df = columnas_grupo(df, grupos)
+    resultado = df['Archivo'].str.extract(PATRON_RESULTADO.pattern, expand=False).str.capitalize()
+    tasas = pd.crosstab([df[grupo] for grupo in grupos], resultado).reindex(columns=['Pass', 'Fail'], fill_value=0)
+    tasas.columns.name = None
+    archivos = df.groupby(grupos, sort=True, dropna=False, observed=True).size()
+    tasas = tasas.reindex(archivos.index, fill_value=0)
+    tasas.insert(0, 'Archivos', archivos)
+    tasas['% Pass'] = 100 * tasas['Pass'] / tasas['Archivos']
+    tasas['% Fail'] = 100 * tasas['Fail'] / tasas['Archivos']
+    return tasas.reset_index()[columnas_salida]
+
+
+# Función para obtener la ruta del libro de agregados: '<libro>_agregados.xlsx'
+def ruta_agregados(ruta_excel):
+    return os.path.splitext(ruta_excel)[0] + '_agregados.xlsx'
+
+
+# Función para escribir los agregados y las tasas de inspección en un libro aparte
+def guardar_agregados(df, ruta_excel, limites=None):
+    with pd.ExcelWriter(ruta_excel, engine=motor_excel()) as writer:
+        escribir_hoja_estadisticos(writer, calcular_agregados(df, limites), 'Agregados', resaltar_vacios=False)
+        escribir_hoja_estadisticos(writer, calcular_tasas_inspeccion(df), 'Pass_Fail', resaltar_vacios=False)
+    return ruta_excel
@@ -0,0 +1,297 @@
+"""
+Result Store
+============
+
+Local SQLite database with the parsed results of every ingested inspection folder, so questions such as "all
+Fail results of camera X with Recipe 12 last week" are answered with an indexed query instead of a new scan
+and parse of every .txt file.
+
+Each file is read once at ingest time with the same parser as the statistics workbook, and stored as:
+
+- archivos: path, size and modification time, camera (first 19 characters of the name), Recipe ID, Exposure
+  Time, Image Time Stamp (the original text and a sortable 'YYYY-MM-DD HH:MM:SS.ffffff' time) and the
+  Pass/Fail result taken from the file name. Indexed by camera, Recipe ID, result and time.
+- blobs: Threshold, Min, Max and Area of every enabled blob.
+- pares: every 'key: value' line, for the specific data queries.
+
+Ingesting a folder again only reads the files that are new or changed, and files deleted from disk stay in the
+store, so it keeps the whole history. The queries return DataFrames with the same columns as the statistics
+workbook and the specific data workbook, so they can be written with the same functions.
+
+Functions:
+----------
+- abrir_almacen(ruta)
+    Opens the store (creating its tables and indexes if needed) and returns the sqlite3 connection.
+
+- ingerir_carpeta(ruta, carpeta, procesos=1, tamano_lote=TAMANO_LOTE, progreso=None, cancelado=None,
+                  formato_tiempo=FORMATO_TIEMPO)
+    Stores the new or changed .txt files under the 'TXT' subfolders of a folder. Returns a dict with the
+    number of files read, reused and incomplete. Image Time Stamp is read with 'formato_tiempo' like the day
+    partitions (see matrox_data.particiones.convertir_tiempos); files whose time stamp does not match it are
+    stored without a sortable time.
+
+- consultar_resultados(ruta, camara=None, recipe=None, desde=None, hasta=None, resultado=None, limite=None)
+    Returns the statistics rows (Camara, Archivo, Recipe ID, Exposure Time, Image Time Stamp and the blob
+    columns) of the stored files that match every given filter, ordered by time (files without time last).
+
+- consultar_parametros(ruta, parametros, repetidas='primera', camara=None, recipe=None, desde=None, hasta=None,
+                       resultado=None, limite=None)
+    Returns the specific data rows (Camaras, Archivo and the parameters) of the matching files that have every
+    parameter, like generar_estadisticos_datos_especificos. The files without some parameter are left out in the
+    query itself, so 'limite' counts only the returned rows.
+
+The filters are: camara, a camera name prefix or a list of them; recipe, one Recipe ID or a list of them;
+desde and hasta, the time range [desde, hasta) as anything pandas.Timestamp accepts; resultado, 'Pass' or 'Fail'.
+"""
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from .analizador import POLITICAS_REPETIDAS, analizar_pares_clave_valor, analizar_resultados
+from .datos_especificos import columnas_datos_especificos, construir_fila, normalizar_parametros
+from .estadisticos import TAMANO_LOTE, escanear_archivos_txt, leer_resultados
+from .particiones import FORMATO_TIEMPO, convertir_tiempos
+from .reglas import PATRON_RESULTADO
+from .trabajos import comprobar_cancelacion
+
+VERSION_ALMACEN = 1
+ALMACEN_POR_DEFECTO = 'resultados.sqlite'
+# Archivos leídos entre cada escritura en la base de datos
+BLOQUE_INGESTA = 20000
+FORMATO_ORDENABLE = '%Y-%m-%d %H:%M:%S.%f'
+# Mayor que cualquier carácter de un nombre de cámara, para buscar un prefijo como un rango del índice
+FIN_PREFIJO = '\U0010ffff'
+CAMPOS_BLOB = ('Threshold', 'Min', 'Max', 'Area')
+# Orden de las consultas: por tiempo, con los archivos sin tiempo (incompletos o con otro formato) al final
+ORDEN_ARCHIVOS = 'a.tiempo IS NULL, a.tiempo, a.id'
+
+ESQUEMA_ALMACEN = """
+CREATE TABLE IF NOT EXISTS archivos (
+    id INTEGER PRIMARY KEY,
+    ruta TEXT NOT NULL UNIQUE,
+    tamano INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    camara TEXT NOT NULL,
+    archivo TEXT NOT NULL,
+    completo INTEGER NOT NULL,
+    recipe_id INTEGER,
+    exposure_time INTEGER,
+    image_time_stamp TEXT,
+    tiempo TEXT,
+    resultado TEXT
+);
+CREATE INDEX IF NOT EXISTS archivos_camara ON archivos (camara, tiempo);
+CREATE INDEX IF NOT EXISTS archivos_recipe ON archivos (recipe_id, tiempo);
+CREATE INDEX IF NOT EXISTS archivos_resultado ON archivos (resultado, tiempo);
+CREATE INDEX IF NOT EXISTS archivos_tiempo ON archivos (tiempo);
+CREATE TABLE IF NOT EXISTS blobs (
+    archivo_id INTEGER NOT NULL,
+    blob INTEGER NOT NULL,
+    threshold INTEGER,
+    min INTEGER,
+    max INTEGER,
+    area INTEGER,
+    PRIMARY KEY (archivo_id, blob)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS pares (
+    archivo_id INTEGER NOT NULL,
+    clave TEXT NOT NULL,
+    orden INTEGER NOT NULL,
+    valor TEXT,
+    PRIMARY KEY (archivo_id, clave, orden)
+) WITHOUT ROWID;
+"""
+
+
+# Función para abrir el almacén y crear sus tablas e índices si no existen
+def abrir_almacen(ruta):
+    conexion = sqlite3.connect(ruta)
+    conexion.execute('PRAGMA journal_mode=WAL')
+    conexion.execute('PRAGMA synchronous=NORMAL')
+    version = conexion.execute('PRAGMA user_version').fetchone()[0]
+    if version not in (0, VERSION_ALMACEN):
+        conexion.close()
+        raise ValueError(f"Unsupported result store version {version} in '{ruta}'.")
+    conexion.executescript(ESQUEMA_ALMACEN)
+    conexion.execute(f'PRAGMA user_version={VERSION_ALMACEN}')
+    return conexion
+
+
+# Función para leer un archivo una sola vez y obtener su fila de estadísticos y todos sus pares 'clave: valor'
+def leer_registro(ruta_archivo):
+    with open(ruta_archivo, 'r') as file:
+        contenido = file.read()
+    return analizar_resultados(contenido, os.path.basename(ruta_archivo)), analizar_pares_clave_valor(contenido, 'todas')
+
+
+# Función para leer un lote de registros (se ejecuta en los procesos del pool)
+def leer_lote_registros(rutas, incompletos=True):
+    return [leer_registro(ruta_archivo) for ruta_archivo in rutas]
+
+
+# Función para convertir Image Time Stamp a un texto ordenable; None si no sigue el formato
+def normalizar_tiempos(tiempos, formato_tiempo=FORMATO_TIEMPO):
+    fechas = convertir_tiempos(tiempos, formato_tiempo)
+    return [None if pd.isna(texto) else texto for texto in fechas.dt.strftime(FORMATO_ORDENABLE)]
+
+
+# Función para escribir en el almacén un bloque de archivos leídos, sustituyendo sus versiones anteriores
+def escribir_registros(conexion, archivos, registros, formato_tiempo=FORMATO_TIEMPO):
+    with conexion:
+        anteriores = [(archivo.ruta,) for archivo in archivos]
+        conexion.executemany('DELETE FROM blobs WHERE archivo_id = (SELECT id FROM archivos WHERE ruta = ?)',
+                             anteriores)
+        conexion.executemany('DELETE FROM pares WHERE archivo_id = (SELECT id FROM archivos WHERE ruta = ?)',
+                             anteriores)
+        conexion.executemany('DELETE FROM archivos WHERE ruta = ?', anteriores)
+
+        # Los identificadores se reservan de una vez para insertar las tres tablas con executemany
+        siguiente = conexion.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM archivos').fetchone()[0]
+        tiempos = normalizar_tiempos([datos['Image Time Stamp'] if datos else None for datos, _ in registros],
+                                     formato_tiempo)
+        filas_archivos, filas_blobs, filas_pares = [], [], []
+        for identificador, archivo, (datos, pares), tiempo in zip(range(siguiente, siguiente + len(archivos)),
+                                                                 archivos, registros, tiempos):
+            coincidencia = PATRON_RESULTADO.search(archivo.nombre)
+            resultado = coincidencia[1].capitalize() if coincidencia else None
+            if datos is None:
+                filas_archivos.append((identificador, archivo.ruta, archivo.tamano, archivo.mtime, archivo.nombre[:19],
+                                       archivo.nombre, 0, None, None, None, None, resultado))
+            else:
+                filas_archivos.append((identificador, archivo.ruta, archivo.tamano, archivo.mtime, datos['Camara'],
+                                       archivo.nombre, 1, datos['Recipe ID'], datos['Exposure Time'],
+                                       datos['Image Time Stamp'], tiempo, resultado))
+                numeros_blob = sorted({int(columna.split(' ')[1]) for columna in datos
+                                       if columna.startswith('Blob ')})
+                filas_blobs.extend((identificador, numero_blob)
+                                   + tuple(datos[f'Blob {numero_blob} {campo}'] for campo in CAMPOS_BLOB)
+                                   for numero_blob in numeros_blob)
+            filas_pares.extend((identificador, clave, orden, valor)
+                               for clave, valores in pares.items() for orden, valor in enumerate(valores))
+
+        conexion.executemany('INSERT INTO archivos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', filas_archivos)
+        conexion.executemany('INSERT INTO blobs VALUES (?, ?, ?, ?, ?, ?)', filas_blobs)
+        conexion.executemany('INSERT INTO pares VALUES (?, ?, ?, ?)', filas_pares)
+
+
+# Función para guardar en el almacén los archivos nuevos o modificados de una carpeta de inspección
+def ingerir_carpeta(ruta, carpeta, procesos=1, tamano_lote=TAMANO_LOTE, progreso=None, cancelado=None,
+                    formato_tiempo=FORMATO_TIEMPO):
+    subcarpetas_txt, archivos_txt = escanear_archivos_txt(carpeta)
+    if not subcarpetas_txt:
+        raise FileNotFoundError(f"No 'TXT' subfolders were found in '{carpeta}'.")
+
+    with closing(abrir_almacen(ruta)) as conexion:
+        anteriores = {ruta_archivo: (tamano, mtime) for ruta_archivo, tamano, mtime
+                      in conexion.execute('SELECT ruta, tamano, mtime FROM archivos')}
+        archivos = [archivo._replace(ruta=os.path.abspath(archivo.ruta)) for archivo in archivos_txt]
+        pendientes = [archivo for archivo in archivos
+                      if anteriores.get(archivo.ruta) != (archivo.tamano, archivo.mtime)]
+
+        # Cada bloque se guarda al terminar de leerlo: si se cancela, lo ya leído queda en el almacén
+        incompletos = 0
+        for inicio in range(0, len(pendientes), BLOQUE_INGESTA):
+            comprobar_cancelacion(cancelado)
+            bloque = pendientes[inicio:inicio + BLOQUE_INGESTA]
+            progreso_bloque = None
+            if progreso is not None:
+                def progreso_bloque(leidos, total, inicio=inicio):
+                    progreso(inicio + leidos, len(pendientes))
+            registros = leer_resultados([archivo.ruta for archivo in bloque], procesos, tamano_lote, True,
+                                        progreso_bloque, cancelado, leer_lote_registros)
+            escribir_registros(conexion, bloque, registros, formato_tiempo)
+            incompletos += sum(datos is None for datos, _ in registros)
+    return {'leidos': len(pendientes), 'reutilizados': len(archivos) - len(pendientes), 'incompletos': incompletos}
+
+
+# Función para construir la condición SQL de los filtros de consulta
+def condiciones_consulta(camara=None, recipe=None, desde=None, hasta=None, resultado=None):
+    condiciones, valores = [], []
+    if camara is not None:
+        prefijos = [camara] if isinstance(camara, str) else list(camara)
+        condiciones.append('(' + ' OR '.join(['(a.camara >= ? AND a.camara < ?)'] * len(prefijos)) + ')')
+        for prefijo in prefijos:
+            valores.extend([prefijo, prefijo + FIN_PREFIJO])
+    if recipe is not None:
+        recetas = [recipe] if isinstance(recipe, (int, str)) else list(recipe)
+        condiciones.append(f"a.recipe_id IN ({', '.join(['?'] * len(recetas))})")
+        valores.extend(int(receta) for receta in recetas)
+    if desde is not None:
+        condiciones.append('a.tiempo >= ?')
+        valores.append(pd.Timestamp(desde).strftime(FORMATO_ORDENABLE))
+    if hasta is not None:
+        condiciones.append('a.tiempo < ?')
+        valores.append(pd.Timestamp(hasta).strftime(FORMATO_ORDENABLE))
+    if resultado is not None:
+        condiciones.append('a.resultado = ?')
+        valores.append(resultado.capitalize())
+    return ' AND '.join(condiciones) or '1', valores
+
+
+# Función para obtener los archivos que cumplen los filtros como subconsulta ordenada por tiempo (sin tiempo al final)
+# Con 'parametros' solo se incluyen los archivos que tienen todos ellos, antes de aplicar el límite
+def consulta_archivos(completos, limite, parametros=None, **filtros):
+    condicion, valores = condiciones_consulta(**filtros)
+    if completos:
+        condicion += ' AND a.completo = 1'
+    if parametros:
+        # Cada EXISTS usa la clave primaria (archivo_id, clave) de 'pares'
+        condicion += ' AND EXISTS (SELECT 1 FROM pares p WHERE p.archivo_id = a.id AND p.clave = ?)' * len(parametros)
+        valores = valores + list(parametros)
+    consulta = f'SELECT a.* FROM archivos a WHERE {condicion} ORDER BY {ORDEN_ARCHIVOS}'
+    if limite is not None:
+        consulta += f' LIMIT {int(limite)}'
+    return consulta, valores
+
+
+# Función para consultar las filas de estadísticos de los archivos que cumplen los filtros
+def consultar_resultados(ruta, camara=None, recipe=None, desde=None, hasta=None, resultado=None, limite=None):
+    consulta, valores = consulta_archivos(True, limite, camara=camara, recipe=recipe, desde=desde, hasta=hasta,
+                                          resultado=resultado)
+    with closing(abrir_almacen(ruta)) as conexion:
+        archivos = pd.read_sql_query(
+            f'SELECT id, camara AS "Camara", archivo AS "Archivo", recipe_id AS "Recipe ID", '
+            f'exposure_time AS "Exposure Time", image_time_stamp AS "Image Time Stamp" FROM ({consulta})',
+            conexion, params=valores)
+        blobs = pd.read_sql_query(
+            f'SELECT b.archivo_id AS id, b.blob, b.threshold AS "Threshold", b.min AS "Min", b.max AS "Max", '
+            f'b.area AS "Area" FROM ({consulta}) a JOIN blobs b ON b.archivo_id = a.id', conexion, params=valores)
+
+    # Una columna por blob y campo, en el mismo orden que el Excel de estadísticos
+    tabla_blobs = blobs.pivot(index='id', columns='blob', values=list(CAMPOS_BLOB))
+    tabla_blobs = tabla_blobs.reorder_levels([1, 0], axis=1)
+    tabla_blobs = tabla_blobs[[(numero_blob, campo) for numero_blob in sorted(blobs['blob'].unique())
+                               for campo in CAMPOS_BLOB]].astype('Int64')
+    tabla_blobs.columns = [f'Blob {numero_blob} {campo}' for numero_blob, campo in tabla_blobs.columns]
+    return archivos.join(tabla_blobs, on='id').drop(columns='id')
+
+
+# Función para consultar los valores de los parámetros indicados en los archivos que cumplen los filtros
+def consultar_parametros(ruta, parametros, repetidas='primera', camara=None, recipe=None, desde=None, hasta=None,
+                         resultado=None, limite=None):
+    if repetidas not in POLITICAS_REPETIDAS:
+        raise ValueError(f"Unknown repeated key policy '{repetidas}', use one of {POLITICAS_REPETIDAS}.")
+    parametros = normalizar_parametros(parametros)
+    consulta, valores = consulta_archivos(False, limite, parametros, camara=camara, recipe=recipe, desde=desde,
+                                          hasta=hasta, resultado=resultado)
+    with closing(abrir_almacen(ruta)) as conexion:
+        cursor = conexion.execute(
+            f"SELECT a.id, a.archivo, p.clave, p.valor FROM ({consulta}) a JOIN pares p ON p.archivo_id = a.id "
+            f"AND p.clave IN ({', '.join(['?'] * len(parametros))}) ORDER BY {ORDEN_ARCHIVOS}, p.clave, p.orden",
+            valores + parametros)
+        registros = {}
+        for identificador, archivo, clave, valor in cursor:
+            registros.setdefault(identificador, (archivo, {}))[1].setdefault(clave, []).append(valor)
+
+    # Misma política de claves repetidas y mismas columnas que la búsqueda en la carpeta; la consulta ya ha dejado
+    # fuera los archivos a los que les falta algún parámetro
+    filas = []
+    for archivo, pares in registros.values():
+        if repetidas == 'primera':
+            pares = {clave: valores_clave[0] for clave, valores_clave in pares.items()}
+        elif repetidas == 'ultima':
+            pares = {clave: valores_clave[-1] for clave, valores_clave in pares.items()}
+        filas.append(construir_fila(archivo, pares, parametros, repetidas))
+    return pd.DataFrame(filas, columns=columnas_datos_especificos(filas, parametros))
@@ -0,0 +1,166 @@
+"""
+Result File Parser
+==================
+
+Single-pass parser of the Matrox result .txt files.
+
+Every line is split once at the first ': ' and the text before it is looked up in a dispatch table that maps
+'Recipe ID', 'Exposure Time', 'Image Time Stamp' and 'Blob N Enabled/Threshold/Min/Max/Area' to where the value
+is stored. Keys are resolved with a precompiled regular expression the first time they are seen and cached, so
+the lines are neither tested against a chain of substring checks nor split more than once. Any number of blobs
+is supported.
+
+Each file is returned as a compact Registro (file name, Recipe ID, Exposure Time, Image Time Stamp and a tuple of
+(number, Threshold, Min, Max, Area) per enabled blob) instead of a dict keyed by strings such as
+'Blob 3 Threshold', so parsed results take less memory and are cheaper to send between processes. The dict row
+of the statistics workbook is still available for the code that stores rows (the incremental manifest).
+
+Functions:
+----------
+- analizar_registro(contenido, archivo)
+    Parses the content of one result file and returns its Registro, or None if it is incomplete.
+
+- leer_registro_resultados(ruta_archivo)
+    Reads and parses one result file into a Registro.
+
+- registro_a_fila(registro)
+    Returns the dict row (Camara, Archivo, Recipe ID, Exposure Time, Image Time Stamp, Blob N ...) of a Registro.
+
+- analizar_resultados(contenido, archivo)
+    Parses the content of one result file and returns its row, or None if it is incomplete.
+
+- leer_archivo_resultados(ruta_archivo)
+    Reads and parses one result file.
+
+- analizar_pares_clave_valor(contenido, repetidas='primera')
+    Returns a key -> value dict of every 'key: value' line of a result file. Keys that appear more than once
+    keep the first value ('primera'), the last one ('ultima') or a list with all of them ('todas').
+
+- leer_pares_clave_valor(ruta_archivo, repetidas='primera')
+    Reads one result file and returns its key -> value dict.
+"""
+import os
+import re
+from collections import namedtuple
+
+PATRON_CLAVE_BLOB = re.compile(r'Blob[ \t]+(\d+)[ \t]+(Enabled|Threshold|Min|Max|Area)')
+
+INDICE_CAMPO_BLOB = {'Enabled': 0, 'Threshold': 1, 'Min': 2, 'Max': 3, 'Area': 4}
+CONVERSORES_CABECERA = {'Recipe ID': int, 'Exposure Time': int, 'Image Time Stamp': str.strip}
+MAX_CLAVES_CACHE = 4096
+# Qué hacer con una clave que aparece varias veces en un archivo: primer valor, último valor o todos
+POLITICAS_REPETIDAS = ('primera', 'ultima', 'todas')
+
+# Registro compacto de un archivo: 'blobs' es una tupla de (número, Threshold, Min, Max, Area) por blob activo
+Registro = namedtuple('Registro', ['archivo', 'recipe_id', 'exposure_time', 'image_time_stamp', 'blobs'])
+
+# Tabla de despacho: texto antes de ': ' -> (número de blob o None, índice del campo o clave de cabecera),
+# o False si la línea no interesa
+_destinos_clave = {}
+
+
+# Función para resolver a dónde va el valor de una clave que no está en la tabla de despacho
+def _resolver_clave(clave):
+    clave_limpia = clave.strip()
+    if clave_limpia in CONVERSORES_CABECERA:
+        destino = (None, clave_limpia)
+    else:
+        coincidencia = PATRON_CLAVE_BLOB.fullmatch(clave_limpia)
+        if coincidencia:
+            destino = (int(coincidencia[1]), INDICE_CAMPO_BLOB[coincidencia[2]])
+        else:
+            destino = False
+    if len(_destinos_clave) < MAX_CLAVES_CACHE:
+        _destinos_clave[clave] = destino
+    return destino
+
+
+# Función para analizar el contenido de un archivo de resultados en una sola pasada y obtener su registro compacto
+def analizar_registro(contenido, archivo):
+    destinos_clave = _destinos_clave
+    cabecera = {}
+    # Por cada blob: [Enabled, Threshold, Min, Max, Area]
+    blobs = {}
+    for linea in contenido.splitlines():
+        clave, separador, valor = linea.partition(': ')
+        if not separador:
+            continue
+        destino = destinos_clave.get(clave)
+        if destino is None:
+            destino = _resolver_clave(clave)
+        if not destino:
+            continue
+
+        numero_blob, campo = destino
+        if numero_blob is None:
+            cabecera[campo] = CONVERSORES_CABECERA[campo](valor)
+            continue
+        blob = blobs.get(numero_blob)
+        if blob is None:
+            blob = blobs[numero_blob] = [False, None, None, None, None]
+        if campo == 0:
+            blob[0] = blob[0] or valor.strip() == 'True'
+        else:
+            blob[campo] = int(valor)
+
+    if len(cabecera) < len(CONVERSORES_CABECERA):
+        return None
+
+    return Registro(archivo, cabecera['Recipe ID'], cabecera['Exposure Time'], cabecera['Image Time Stamp'],
+                    tuple((numero_blob, *blobs[numero_blob][1:]) for numero_blob in sorted(blobs)
+                          if blobs[numero_blob][0]))
+
+
+# Función para obtener la fila de estadísticos de un registro como diccionario
+def registro_a_fila(registro):
+    datos = {'Camara': registro.archivo[:19], 'Archivo': registro.archivo, 'Recipe ID': registro.recipe_id,
+             'Exposure Time': registro.exposure_time, 'Image Time Stamp': registro.image_time_stamp}
+    for numero_blob, threshold, minimo, maximo, area in registro.blobs:
+        datos[f'Blob {numero_blob} Threshold'] = threshold
+        datos[f'Blob {numero_blob} Min'] = minimo
+        datos[f'Blob {numero_blob} Max'] = maximo
+        datos[f'Blob {numero_blob} Area'] = area
+    return datos
+
+
+# Función para analizar el contenido de un archivo de resultados y obtener su fila de estadísticos
+def analizar_resultados(contenido, archivo):
+    registro = analizar_registro(contenido, archivo)
+    return None if registro is None else registro_a_fila(registro)
+
+
+# Función para leer un archivo de resultados y obtener su registro compacto
+def leer_registro_resultados(ruta_archivo):
+    with open(ruta_archivo, 'r') as file:
+        contenido = file.read()
+    return analizar_registro(contenido, os.path.basename(ruta_archivo))
+
+
+# Función para leer un archivo de resultados y obtener sus valores de Recipe ID, Exposure Time, Image Time Stamp y Blobs
+def leer_archivo_resultados(ruta_archivo):
+    registro = leer_registro_resultados(ruta_archivo)
+    return None if registro is None else registro_a_fila(registro)
+
+
+# Función para obtener todas las líneas 'clave: valor' de un archivo como diccionario
+def analizar_pares_clave_valor(contenido, repetidas='primera'):
+    if repetidas not in POLITICAS_REPETIDAS:
+        raise ValueError(f"Unknown repeated key policy '{repetidas}', use one of {POLITICAS_REPETIDAS}.")
+    pares = {}
+    for linea in contenido.splitlines():
+        clave, separador, valor = linea.partition(': ')
+        if not separador:
+            continue
+        if repetidas == 'primera':
+            pares.setdefault(clave.strip(), valor.strip())
+        elif repetidas == 'ultima':
+            pares[clave.strip()] = valor.strip()
+        else:
+            pares.setdefault(clave.strip(), []).append(valor.strip())
+    return pares
+
+
+# Función para leer un archivo de resultados y obtener sus pares 'clave: valor'
+def leer_pares_clave_valor(ruta_archivo, repetidas='primera'):
+    with open(ruta_archivo, 'r') as file:
+        return analizar_pares_clave_valor(file.read(), repetidas)
@@ -0,0 +1,91 @@
+"""
+Chunked Statistics Build
+========================
+
+Memory-bounded build of the statistics workbook, for folders with more files than fit in memory as one DataFrame.
+
+The parsed files arrive as compact records (see analizador.Registro) and every 'filas_bloque' of them become a
+DataFrame with registros.tabla_registros, the same function and column types as the in-memory build. Each chunk
+is spilled to a temporary file, so only one chunk is held in memory at a time. Once every file has been read the
+final column set is known (a blob that only appears in later files adds its columns to every row), and the
+workbook is written chunk by chunk in constant-memory mode, splitting the rows into 'Sheet1', 'Sheet2', ... like
+the in-memory build.
+
+Functions:
+----------
+- guardar_bloques(lotes, ruta_excel, filas_bloque=FILAS_BLOQUE, filas_hoja=MAX_FILAS_EXCEL, resaltar_vacios=True)
+    Writes the workbook from an iterable of lists of Registro and returns the number of rows written.
+"""
+import os
+import tempfile
+
+import pandas as pd
+
+from .excel import MAX_FILAS_EXCEL, calcular_anchos_columnas, guardar_excel_por_bloques
+from .registros import tabla_registros
+
+# Filas que se leen y se guardan juntas; la memoria usada depende de este valor y no del número de archivos
+FILAS_BLOQUE = 50000
+
+
+# Función para leer de nuevo los bloques guardados con todas las columnas en el orden final
+def cargar_bloques(rutas_bloques, columnas):
+    for ruta_bloque in rutas_bloques:
+        bloque = pd.read_pickle(ruta_bloque)
+        faltan = [columna for columna in columnas if columna not in bloque.columns]
+        for columna in faltan:
+            # Solo pueden faltar columnas de blobs, que son enteros
+            bloque[columna] = pd.array([pd.NA] * len(bloque), dtype='Int16')
+        yield bloque[columnas]
+        os.remove(ruta_bloque)
+
+
+# Función para construir el libro de estadísticos bloque a bloque a partir de listas de registros compactos
+def guardar_bloques(lotes, ruta_excel, filas_bloque=FILAS_BLOQUE, filas_hoja=MAX_FILAS_EXCEL, resaltar_vacios=True):
+    filas_hoja = min(filas_hoja, MAX_FILAS_EXCEL)
+    pendientes = []
+    # Las columnas y los anchos de cada hoja se acumulan bloque a bloque para escribir el libro con los valores
+    # finales; cada hoja tiene sus propios anchos, como en el libro construido en memoria
+    columnas = {}
+    anchos_hojas = []
+    rutas_bloques = []
+    filas = 0
+
+    with tempfile.TemporaryDirectory(prefix='matrox_bloques_') as carpeta_temporal:
+        def guardar_bloque():
+            inicio = filas - len(pendientes)
+            bloque = tabla_registros(pendientes)
+            pendientes.clear()
+            columnas.update(dict.fromkeys(bloque.columns))
+            # Las filas del bloque se reparten entre las hojas en las que se escribirán
+            desde = 0
+            while desde < len(bloque):
+                hoja = (inicio + desde) // filas_hoja
+                hasta = min(len(bloque), (hoja + 1) * filas_hoja - inicio)
+                if hoja == len(anchos_hojas):
+                    anchos_hojas.append({})
+                anchos = anchos_hojas[hoja]
+                for columna, ancho in zip(bloque.columns, calcular_anchos_columnas(bloque.iloc[desde:hasta])):
+                    anchos[columna] = max(anchos.get(columna, 0), ancho)
+                desde = hasta
+            ruta_bloque = os.path.join(carpeta_temporal, f'{len(rutas_bloques):06d}.pkl')
+            bloque.to_pickle(ruta_bloque)
+            rutas_bloques.append(ruta_bloque)
+
+        for lote in lotes:
+            for registro in lote:
+                pendientes.append(registro)
+                filas += 1
+                if len(pendientes) == filas_bloque:
+                    guardar_bloque()
+        if pendientes or not rutas_bloques:
+            guardar_bloque()
+
+        # Las columnas en el orden en que aparecen por primera vez, como en el DataFrame completo; una columna que
+        # no tiene valores en una hoja toma el ancho de su nombre
+        columnas = list(columnas)
+        anchos = [[anchos_hoja.get(columna, (len(columna) + 2) * 1.2) for columna in columnas]
+                  for anchos_hoja in anchos_hojas or [{}]]
+        guardar_excel_por_bloques(cargar_bloques(rutas_bloques, columnas), ruta_excel, columnas, anchos, filas_hoja,
+                                  resaltar_vacios)
+    return filas
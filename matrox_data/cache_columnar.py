@@ -0,0 +1,73 @@
+"""
+Columnar Cache
+==============
+
+Typed columnar copy (Parquet or Feather) of the parsed results, saved next to the Excel output.
+
+Loading the cache takes milliseconds, so later runs and analysis tools can use it instead of reloading the
+workbook, and the workbook itself can be exported from it at any time. Writing and reading the cache needs
+the optional 'pyarrow' package.
+
+Functions:
+----------
+- tipar_resultados(df)
+    Returns a copy with nullable Int64 columns for the Recipe ID, Exposure Time and blob values that are not
+    integer yet (object or float64). Integer and categorical columns, such as the compact ones of
+    matrox_data.registros, and Image Time Stamp are kept as they are.
+
+- ruta_cache(ruta_excel, formato='parquet')
+    Returns the cache path that belongs to a workbook.
+
+- guardar_cache(df, ruta)
+    Writes the DataFrame with its column types as Parquet or Feather depending on the extension of 'ruta'.
+
+- cargar_cache(ruta)
+    Loads a cache written by guardar_cache, with Recipe ID as a category like the compact DataFrame.
+"""
+import os
+import re
+
+import pandas as pd
+
+FORMATOS_CACHE = {'parquet': '.parquet', 'feather': '.feather'}
+COLUMNAS_ENTERAS = ('Recipe ID', 'Exposure Time')
+PATRON_COLUMNA_BLOB = re.compile(r'Blob \d+ (Threshold|Min|Max|Area)')
+
+
+# Función para convertir a enteros las columnas conocidas que aún no lo son; las ya tipadas no se tocan
+def tipar_resultados(df):
+    df = df.copy()
+    for columna in df.columns:
+        tipo = df[columna].dtype
+        if (columna in COLUMNAS_ENTERAS or PATRON_COLUMNA_BLOB.fullmatch(columna)) \
+                and not (pd.api.types.is_integer_dtype(tipo) or isinstance(tipo, pd.CategoricalDtype)):
+            df[columna] = pd.to_numeric(df[columna], errors='coerce').astype('Int64')
+    return df
+
+
+# Función para obtener la ruta del caché asociado a un archivo Excel
+def ruta_cache(ruta_excel, formato='parquet'):
+    return os.path.splitext(ruta_excel)[0] + FORMATOS_CACHE[formato]
+
+
+# Función para guardar el DataFrame en formato columnar, conservando los tipos de sus columnas
+def guardar_cache(df, ruta):
+    df = tipar_resultados(df)
+    if ruta.endswith(FORMATOS_CACHE['feather']):
+        df.reset_index(drop=True).to_feather(ruta)
+    else:
+        df.to_parquet(ruta, index=False)
+    return ruta
+
+
+# Función para cargar el caché columnar
+def cargar_cache(ruta):
+    if ruta.endswith(FORMATOS_CACHE['feather']):
+        df = pd.read_feather(ruta)
+    else:
+        df = pd.read_parquet(ruta)
+    # Las categorías de enteros de Recipe ID no se conservan igual (Parquet las devuelve como int64 o float64 y
+    # Feather como categorías int64); se crean de nuevo con el tipo Int64
+    if 'Recipe ID' in df.columns:
+        df['Recipe ID'] = df['Recipe ID'].astype('Int64').astype('category')
+    return df
@@ -0,0 +1,100 @@
+"""
+File Classification
+===================
+
+GUI-free classification of files into subfolders named after their extension (or the configured rules).
+
+Classification runs in two phases. First a single scan of the tree (see matrox_data.escaner) builds a move
+plan from the file rules (see matrox_data.reglas), skipping the 'png', 'jpg', 'txt', ... subfolders that are
+already the result of a previous classification. Then the plan is executed by a thread pool that renames the
+files in batches (a rename within the same file system, falling back to shutil.move across file systems) and
+reports progress. The plan alone can be obtained as a dry run.
+
+Functions:
+----------
+- planificar_clasificacion(carpeta_principal, reglas=None)
+    Returns the list of (source, destination) moves without touching any file. 'reglas' are compiled rules
+    from reglas.cargar_reglas(); the default rules classify png, jpg, txt, bmp, mim and csv by extension.
+
+- ejecutar_plan(plan, hilos=HILOS_CLASIFICAR, progreso=None, cancelado=None)
+    Performs the moves and returns how many files were moved. progreso(moved, total) is called after each batch.
+    Once the 'cancelado' event is set the batches not yet started are dropped and CancelledError is raised.
+
+- clasificar_archivos(carpeta_principal, reglas=None, hilos=HILOS_CLASIFICAR, progreso=None, simulacion=False, cancelado=None)
+    Plans and performs the classification (only plans it with simulacion=True) and returns the plan.
+"""
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import escaner
+from . import reglas as reglas_archivos
+from .trabajos import comprobar_cancelacion
+
+HILOS_CLASIFICAR = 8
+# Movimientos por tarea enviada al pool de hilos
+TAMANO_LOTE_MOVIMIENTOS = 256
+
+
+# Función para construir el plan de movimientos recorriendo el árbol una sola vez
+def planificar_clasificacion(carpeta_principal, reglas=None):
+    if reglas is None:
+        reglas = reglas_archivos.cargar_reglas()
+    carpetas_destino = reglas['carpetas_destino']
+
+    # Las subcarpetas destino de las reglas ya están clasificadas y no se recorren
+    def podar(carpeta):
+        return carpeta.nombre.lower() in carpetas_destino
+
+    plan = []
+    for entrada in escaner.escanear(carpeta_principal, podar=podar, estado=False):
+        # Obtener la subcarpeta destino según la primera regla que se cumple
+        destino = reglas_archivos.destino_archivo(reglas, entrada.nombre)
+        if destino is not None:
+            plan.append((entrada.ruta, os.path.join(entrada.carpeta, destino, entrada.nombre)))
+    return plan
+
+
+# Función para mover un lote de archivos (se ejecuta en los hilos del pool)
+def mover_lote(movimientos):
+    movidos = 0
+    for origen, destino in movimientos:
+        try:
+            os.replace(origen, destino)
+        except OSError:
+            # Distinto sistema de archivos u otro error de rename: mover copiando
+            shutil.move(origen, destino)
+        movidos += 1
+    return movidos
+
+
+# Función para ejecutar el plan de movimientos con un pool de hilos
+def ejecutar_plan(plan, hilos=HILOS_CLASIFICAR, progreso=None, cancelado=None):
+    # Crear cada subcarpeta destino una sola vez antes de mover
+    for subcarpeta in {os.path.dirname(destino) for _, destino in plan}:
+        os.makedirs(subcarpeta, exist_ok=True)
+
+    total = len(plan)
+    movidos = 0
+    lotes = [plan[i:i + TAMANO_LOTE_MOVIMIENTOS] for i in range(0, total, TAMANO_LOTE_MOVIMIENTOS)]
+    with ThreadPoolExecutor(max_workers=max(hilos, 1)) as executor:
+        futuros = [executor.submit(mover_lote, lote) for lote in lotes]
+        for futuro in as_completed(futuros):
+            if cancelado is not None and cancelado.is_set():
+                for pendiente in futuros:
+                    pendiente.cancel()
+                comprobar_cancelacion(cancelado)
+            movidos += futuro.result()
+            if progreso is not None:
+                progreso(movidos, total)
+    return movidos
+
+
+# Función para clasificar archivos en subcarpetas según su extensión
+def clasificar_archivos(carpeta_principal, reglas=None, hilos=HILOS_CLASIFICAR, progreso=None, simulacion=False,
+                        cancelado=None):
+    plan = planificar_clasificacion(carpeta_principal, reglas)
+    if not simulacion:
+        comprobar_cancelacion(cancelado)
+        ejecutar_plan(plan, hilos, progreso, cancelado)
+    return plan
@@ -0,0 +1,420 @@
+"""
+Command Line Interface
+======================
+
+Batch entry point of the Camera Statistics tool, run as 'python -m matrox_data'.
+
+Commands:
+---------
+- stats CARPETA [CARPETA ...] [--out DIR] [--resumen ARCHIVO] [--procesos N] [--tamano-lote N] [--incremental]
+  [--cache {feather,parquet}] [--sin-excel] [--particion {camara,dia,filas}] [--salida {hojas,libros,csv}]
+  [--filas-particion N] [--agregados] [--limites ARCHIVO] [--tendencias] [--ventana VENTANA]
+  [--formato-tiempo FORMATO] [--bloques N]
+    Generates the blob statistics workbook of each folder, like the "Generar Estadísticos" button.
+    With --incremental only new or changed files are parsed, using the manifest saved next to the workbook.
+    With --out the workbooks are named after each folder, so folders with the same name are rejected.
+    Prints a JSON summary with one entry per folder. Exit code 0 if every folder succeeded,
+    1 if at least one failed and 2 on invalid arguments.
+    With --cache the typed Parquet/Feather cache is saved next to the workbook; --sin-excel skips the workbook.
+    With --particion the output is split by camera, day or row count into sheets, workbooks or gzipped CSV
+    files; results larger than one sheet are always split by rows.
+    With --agregados the per-camera and per-recipe summary with Cpk and Pass/Fail rates is written to
+    '<carpeta>_agregados.xlsx'; --limites loads the specification limits from a JSON file.
+    With --tendencias the rolling mean and deviation over --ventana and the EWMA/CUSUM drift flags of each camera
+    are written to '<carpeta>_tendencias.xlsx'.
+    --formato-tiempo is the format of Image Time Stamp for --particion dia and --tendencias (ISO 8601 by default).
+    With --bloques N the workbook is built N rows at a time, so memory does not grow with the number of files;
+    it only writes the workbook split into sheets by rows and cannot be combined with the other outputs.
+
+- clasificar CARPETA [CARPETA ...] [--hilos N] [--simulacion] [--reglas ARCHIVO]
+    Classifies the files of each folder into subfolders by extension, like the "Clasificar Archivos" button.
+    With --simulacion the planned moves are listed and nothing is moved. --reglas loads the rules from a JSON file.
+
+- excel CACHE [CACHE ...]
+    Exports the statistics workbook from columnar caches written with --cache.
+
+- extraer IP [IP ...] --destino DIR [--extensiones EXT ...] [--inspeccion TEXTO] [--sincronizar]
+  [--transporte {montado,smb,simulado}] [--ruta RUTA] [--recurso NOMBRE] [--latencia S] [--ancho-banda B/S]
+  [--usuario USUARIO] [--contrasena CONTRASENA] [--hilos N] [--hilos-por-camara N]
+    Connects the cameras and copies their files, like the "Extraer" window, through the chosen transport (see
+    matrox_data.transporte): a mounted path template (--ruta, e.g. '/mnt/camaras/{ip}'), the pure-Python SMB
+    client, or the local simulator over the folder --ruta with --latencia and --ancho-banda. Prints a JSON summary
+    with the connection result, folder and error of each camera, the copied files and the throughput, to measure
+    and tune it. A camera that fails does not stop the others; the exit code is 1 if any camera failed.
+
+- ingerir CARPETA [CARPETA ...] [--almacen ARCHIVO] [--procesos N] [--formato-tiempo FORMATO]
+    Stores the parsed .txt files of each folder in the SQLite result store (see matrox_data.almacen); only new or
+    changed files are read. --formato-tiempo is the format of Image Time Stamp, as in stats. Prints a JSON summary
+    with one entry per folder.
+
+- consultar [--almacen ARCHIVO] [--camara PREFIJO ...] [--recipe N ...] [--desde FECHA] [--hasta FECHA]
+  [--resultado {Pass,Fail}] [--parametros P;Q] [--repetidas {primera,ultima,todas}] [--limite N] [--out ARCHIVO]
+    Queries the result store and writes the statistics rows (or, with --parametros, the specific data rows) of
+    the matching files as CSV to the standard output, or to --out as .csv, .xlsx or .parquet.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from . import (agregados, almacen, cache_columnar, clasificacion, estadisticos, extraccion, particiones, reglas,
+               tendencias, transporte)
+from .analizador import POLITICAS_REPETIDAS
+from .bloques import FILAS_BLOQUE
+from .excel import MAX_FILAS_EXCEL, guardar_excel_estadisticos
+
+SALIDA_OK = 0
+SALIDA_ERROR = 1
+SALIDA_ARGUMENTOS = 2
+
+
+# Función para generar los estadísticos de una carpeta y devolver su resumen
+def procesar_carpeta_estadisticos(carpeta, carpeta_salida=None, procesos=1, tamano_lote=estadisticos.TAMANO_LOTE,
+                                  **opciones):
+    resumen = {'carpeta': carpeta, 'estado': 'ok', 'filas': 0, 'excel': None, 'cache': None, 'agregados': None,
+               'tendencias': None, 'derivas': 0, 'segundos': 0.0, 'error': None}
+    inicio = time.perf_counter()
+    try:
+        # Los mismos pasos que generar_estadisticos; las opciones son las suyas (incremental, cache, particion...)
+        ruta_excel = estadisticos.ruta_excel_estadisticos(carpeta, carpeta_salida)
+        resumen.update(estadisticos.generar_estadisticos_con_resumen(carpeta, ruta_excel, procesos=procesos,
+                                                                     tamano_lote=tamano_lote, **opciones))
+    except FileNotFoundError as e:
+        resumen.update(estado='sin_txt', error=str(e))
+    except Exception as e:
+        resumen.update(estado='error', error=f'{type(e).__name__}: {e}')
+    finally:
+        resumen['segundos'] = round(time.perf_counter() - inicio, 3)
+    return resumen
+
+
+# Función para buscar las carpetas distintas que escribirían el mismo Excel en la carpeta de salida
+def carpetas_con_salida_repetida(carpetas, carpeta_salida):
+    carpetas_por_ruta = {}
+    for carpeta in carpetas:
+        ruta_excel = os.path.normcase(estadisticos.ruta_excel_estadisticos(carpeta, carpeta_salida))
+        carpetas_por_ruta.setdefault(ruta_excel, {}).setdefault(os.path.abspath(carpeta), carpeta)
+    return [list(repetidas.values()) for repetidas in carpetas_por_ruta.values() if len(repetidas) > 1]
+
+
+# Función para ejecutar el comando 'stats' sobre todas las carpetas indicadas
+def comando_stats(args):
+    if args.out:
+        # Con --out el Excel se llama como la carpeta: dos carpetas con el mismo nombre se sobrescribirían
+        for repetidas in carpetas_con_salida_repetida(args.carpetas, args.out):
+            print(f"[error] {', '.join(repetidas)} would all be written to "
+                  f"'{estadisticos.ruta_excel_estadisticos(repetidas[0], args.out)}'; run them with different --out "
+                  "folders.", file=sys.stderr)
+            return SALIDA_ARGUMENTOS
+        os.makedirs(args.out, exist_ok=True)
+
+    if args.bloques and (args.incremental or args.cache or args.sin_excel or args.agregados or args.tendencias
+                         or args.particion not in (None, 'filas') or args.salida != 'hojas'):
+        print("[error] --bloques only writes the statistics workbook split into sheets by rows.", file=sys.stderr)
+        return SALIDA_ARGUMENTOS
+
+    procesos = args.procesos or None
+    try:
+        limites = agregados.cargar_limites(args.limites) if args.agregados else None
+    except (OSError, ValueError) as e:
+        print(f"[error] --limites {args.limites}: {type(e).__name__}: {e}", file=sys.stderr)
+        return SALIDA_ARGUMENTOS
+    resumenes = []
+    for carpeta in args.carpetas:
+        resumen = procesar_carpeta_estadisticos(
+            carpeta, args.out, procesos, args.tamano_lote, incremental=args.incremental, cache=args.cache,
+            excel=not args.sin_excel, particion=args.particion, salida=args.salida,
+            filas_particion=args.filas_particion, agregados=args.agregados, limites=limites,
+            tendencias=args.tendencias, ventana=args.ventana, formato_tiempo=args.formato_tiempo,
+            filas_bloque=args.bloques)
+        resumenes.append(resumen)
+        print(f"[{resumen['estado']}] {carpeta} ({resumen['filas']} filas, {resumen['segundos']} s)", file=sys.stderr)
+
+    salida = json.dumps(resumenes, ensure_ascii=False, indent=2)
+    if args.resumen:
+        with open(args.resumen, 'w', encoding='utf-8') as file:
+            file.write(salida)
+    else:
+        print(salida)
+
+    return SALIDA_OK if all(resumen['estado'] == 'ok' for resumen in resumenes) else SALIDA_ERROR
+
+
+# Función para ejecutar el comando 'excel': exportar a Excel los cachés columnares indicados
+def comando_excel(args):
+    codigo = SALIDA_OK
+    for ruta_cache in args.caches:
+        try:
+            ruta_excel = estadisticos.exportar_excel_desde_cache(ruta_cache)
+            print(ruta_excel)
+        except Exception as e:
+            print(f"[error] {ruta_cache}: {type(e).__name__}: {e}", file=sys.stderr)
+            codigo = SALIDA_ERROR
+    return codigo
+
+
+# Función para ejecutar el comando 'clasificar': clasificar por extensión los archivos de cada carpeta
+def comando_clasificar(args):
+    reglas_clasificacion = reglas.cargar_reglas(args.reglas)
+    resumenes = []
+    for carpeta in args.carpetas:
+        inicio = time.perf_counter()
+        plan = clasificacion.clasificar_archivos(carpeta, reglas_clasificacion, args.hilos, simulacion=args.simulacion)
+        if args.simulacion:
+            for origen, destino in plan:
+                print(f"{origen} -> {destino}", file=sys.stderr)
+        resumenes.append({'carpeta': carpeta, 'archivos': len(plan), 'simulacion': args.simulacion,
+                          'segundos': round(time.perf_counter() - inicio, 3)})
+    print(json.dumps(resumenes, ensure_ascii=False, indent=2))
+    return SALIDA_OK
+
+
+# Función para crear el transporte indicado en la línea de comandos
+def crear_transporte_cli(args):
+    if args.transporte == 'simulado':
+        if not args.ruta:
+            raise ValueError("The 'simulado' transport needs --ruta with one subfolder per IP.")
+        return transporte.transporte_simulado(args.ruta, args.latencia, args.ancho_banda)
+    if args.transporte == 'smb':
+        return transporte.transporte_smb(args.recurso)
+    return transporte.transporte_montado(args.ruta or transporte.PLANTILLA_UNC)
+
+
+# Función para ejecutar el comando 'extraer': conectar las cámaras y copiar sus archivos midiendo el rendimiento
+def comando_extraer(args):
+    try:
+        transporte_camaras = crear_transporte_cli(args)
+    except (ValueError, ImportError) as e:
+        print(f"[error] {type(e).__name__}: {e}", file=sys.stderr)
+        return SALIDA_ERROR
+    os.makedirs(args.destino, exist_ok=True)
+
+    inicio = time.perf_counter()
+    conexiones = extraccion.conectar_camaras(args.ips, args.usuario, args.contrasena, transporte=transporte_camaras)
+    segundos_conexion = time.perf_counter() - inicio
+    camaras = [(ip, args.estacion) for ip, resultado in conexiones.items()
+               if resultado != extraccion.CONEXION_SIN_RESPUESTA]
+
+    copiados = [0]
+
+    def progreso(hechos, total):
+        copiados[0] = hechos
+
+    # Los mensajes de cada copia van a la salida de error para dejar solo el resumen JSON en la salida estándar
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        carpetas = extraccion.extraer_archivos_camaras(camaras, args.destino, args.extensiones, args.inspeccion,
+                                                       progreso, args.hilos_por_camara, args.hilos, args.sincronizar,
+                                                       transporte=transporte_camaras)
+    segundos = time.perf_counter() - inicio
+
+    errores = extraccion.errores_extraccion(carpetas)
+    resumen = {
+        'transporte': transporte_camaras['nombre'],
+        'camaras': {ip: {'conexion': resultado, 'carpeta': None if ip in errores else carpetas.get(ip),
+                         'error': errores.get(ip)} for ip, resultado in conexiones.items()},
+        'archivos': copiados[0],
+        'segundos_conexion': round(segundos_conexion, 3),
+        'segundos': round(segundos, 3),
+        'archivos_por_segundo': round(copiados[0] / segundos, 1) if segundos else None,
+    }
+    print(json.dumps(resumen, ensure_ascii=False, indent=2))
+    return SALIDA_OK if camaras and len(camaras) == len(conexiones) and not errores else SALIDA_ERROR
+
+
+# Función para ejecutar el comando 'ingerir': guardar en el almacén los archivos de cada carpeta
+def comando_ingerir(args):
+    resumenes = []
+    for carpeta in args.carpetas:
+        resumen = {'carpeta': carpeta, 'estado': 'ok', 'leidos': 0, 'reutilizados': 0, 'incompletos': 0,
+                   'segundos': 0.0, 'error': None}
+        inicio = time.perf_counter()
+        try:
+            resumen.update(almacen.ingerir_carpeta(args.almacen, carpeta, args.procesos or None,
+                                                   formato_tiempo=args.formato_tiempo))
+        except FileNotFoundError as e:
+            resumen.update(estado='sin_txt', error=str(e))
+        except Exception as e:
+            resumen.update(estado='error', error=f'{type(e).__name__}: {e}')
+        resumen['segundos'] = round(time.perf_counter() - inicio, 3)
+        resumenes.append(resumen)
+        print(f"[{resumen['estado']}] {carpeta} ({resumen['leidos']} leídos, {resumen['segundos']} s)", file=sys.stderr)
+    print(json.dumps(resumenes, ensure_ascii=False, indent=2))
+    return SALIDA_OK if all(resumen['estado'] == 'ok' for resumen in resumenes) else SALIDA_ERROR
+
+
+# Función para ejecutar el comando 'consultar': filtrar el almacén y escribir las filas encontradas
+def comando_consultar(args):
+    if not os.path.isfile(args.almacen):
+        print(f"[error] The result store '{args.almacen}' does not exist.", file=sys.stderr)
+        return SALIDA_ERROR
+    filtros = {'camara': args.camara, 'recipe': args.recipe, 'desde': args.desde, 'hasta': args.hasta,
+               'resultado': args.resultado, 'limite': args.limite}
+    inicio = time.perf_counter()
+    if args.parametros:
+        df = almacen.consultar_parametros(args.almacen, args.parametros, args.repetidas, **filtros)
+    else:
+        df = almacen.consultar_resultados(args.almacen, **filtros)
+    print(f"[ok] {len(df)} filas ({round(time.perf_counter() - inicio, 3)} s)", file=sys.stderr)
+
+    if not args.out:
+        df.to_csv(sys.stdout, index=False)
+    elif args.out.endswith('.xlsx'):
+        # Como en los Excel de la interfaz, solo se resaltan los vacíos de los estadísticos de blobs
+        guardar_excel_estadisticos(df, args.out, resaltar_vacios=not args.parametros)
+    elif args.out.endswith('.parquet'):
+        cache_columnar.guardar_cache(df, args.out)
+    else:
+        df.to_csv(args.out, index=False)
+    return SALIDA_OK
+
+
+# Función para validar una fecha de la línea de comandos (--desde, --hasta); argparse muestra el error y sale con 2
+def fecha_argumento(texto):
+    try:
+        fecha = pd.Timestamp(texto)
+    except ValueError:
+        fecha = pd.NaT
+    if pd.isna(fecha):
+        raise argparse.ArgumentTypeError(f"invalid date '{texto}', use e.g. '2024-05-01' or '2024-05-01 08:00'")
+    return texto
+
+
+# Función para construir el analizador de argumentos de la línea de comandos
+def crear_parser():
+    parser = argparse.ArgumentParser(prog='python -m matrox_data',
+                                     description='Herramientas de estadísticas de cámaras Matrox sin interfaz gráfica.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_stats = subparsers.add_parser('stats', help='Generar el Excel de estadísticos de blobs de cada carpeta.')
+    parser_stats.add_argument('carpetas', nargs='+', metavar='CARPETA',
+                              help="Carpeta raíz de inspección que contiene subcarpetas 'TXT'.")
+    parser_stats.add_argument('--out', metavar='DIR',
+                              help="Carpeta donde guardar los Excel (por defecto, la raíz de cada carpeta).")
+    parser_stats.add_argument('--resumen', metavar='ARCHIVO',
+                              help='Guardar el resumen JSON en un archivo en lugar de mostrarlo por la salida estándar.')
+    parser_stats.add_argument('--procesos', type=int, default=1, metavar='N',
+                              help='Procesos para leer los archivos en paralelo (0 = uno por CPU, por defecto 1).')
+    parser_stats.add_argument('--tamano-lote', type=int, default=estadisticos.TAMANO_LOTE, metavar='N',
+                              help=f'Archivos por lote enviado a cada proceso (por defecto {estadisticos.TAMANO_LOTE}).')
+    parser_stats.add_argument('--incremental', action='store_true',
+                              help='Leer solo los archivos nuevos o modificados usando el manifiesto junto al Excel.')
+    parser_stats.add_argument('--cache', choices=sorted(cache_columnar.FORMATOS_CACHE),
+                              help='Guardar también un caché columnar tipado junto al Excel (requiere pyarrow).')
+    parser_stats.add_argument('--sin-excel', action='store_true',
+                              help='No escribir el Excel (útil junto con --cache).')
+    parser_stats.add_argument('--particion', choices=particiones.CRITERIOS_PARTICION,
+                              help='Dividir la salida por cámara, por día de Image Time Stamp o por número de filas.')
+    parser_stats.add_argument('--salida', choices=particiones.SALIDAS_PARTICION, default='hojas',
+                              help="Escribir las particiones como hojas de un libro, como libros separados o como CSV "
+                                   "comprimidos en la carpeta '<carpeta>_partes' (por defecto hojas).")
+    parser_stats.add_argument('--filas-particion', type=int, default=MAX_FILAS_EXCEL, metavar='N',
+                              help='Filas máximas por hoja o archivo (por defecto el límite de Excel).')
+    parser_stats.add_argument('--agregados', action='store_true',
+                              help="Escribir también '<carpeta>_agregados.xlsx' con media, desviación, percentiles, "
+                                   "Cpk y tasas de Pass/Fail por cámara y Recipe ID.")
+    parser_stats.add_argument('--limites', metavar='ARCHIVO',
+                              help='Archivo JSON con los límites de especificación para el Cpk (con --agregados).')
+    parser_stats.add_argument('--tendencias', action='store_true',
+                              help="Escribir también '<carpeta>_tendencias.xlsx' con medias y desviaciones móviles y "
+                                   "las derivas EWMA/CUSUM de Exposure Time y del área de los blobs por cámara.")
+    parser_stats.add_argument('--ventana', default=tendencias.VENTANA, metavar='VENTANA',
+                              help=f'Ventana de tiempo de las medias móviles (por defecto {tendencias.VENTANA}).')
+    parser_stats.add_argument('--formato-tiempo', default=particiones.FORMATO_TIEMPO, metavar='FORMATO',
+                              help="Formato de Image Time Stamp para --particion dia y --tendencias, igual para todas "
+                                   "las filas (p. ej. '%%d/%%m/%%Y %%H:%%M'; por defecto ISO8601).")
+    parser_stats.add_argument('--bloques', type=int, metavar='N',
+                              help='Construir el Excel por bloques de N filas para limitar la memoria usada '
+                                   f'(p. ej. {FILAS_BLOQUE}); solo escribe el libro de estadísticos.')
+    parser_stats.set_defaults(funcion=comando_stats)
+
+    parser_clasificar = subparsers.add_parser('clasificar', help='Clasificar los archivos en subcarpetas por extensión.')
+    parser_clasificar.add_argument('carpetas', nargs='+', metavar='CARPETA', help='Carpeta principal a clasificar.')
+    parser_clasificar.add_argument('--hilos', type=int, default=clasificacion.HILOS_CLASIFICAR, metavar='N',
+                                   help=f'Hilos para mover archivos (por defecto {clasificacion.HILOS_CLASIFICAR}).')
+    parser_clasificar.add_argument('--simulacion', action='store_true',
+                                   help='Solo mostrar los movimientos planificados, sin mover nada.')
+    parser_clasificar.add_argument('--reglas', metavar='ARCHIVO',
+                                   help='Archivo JSON con las reglas de clasificación (por defecto, por extensión).')
+    parser_clasificar.set_defaults(funcion=comando_clasificar)
+
+    parser_excel = subparsers.add_parser('excel', help='Exportar a Excel un caché columnar generado con --cache.')
+    parser_excel.add_argument('caches', nargs='+', metavar='CACHE', help='Archivo .parquet o .feather.')
+    parser_excel.set_defaults(funcion=comando_excel)
+
+    parser_extraer = subparsers.add_parser('extraer', help='Copiar los archivos de las cámaras midiendo el rendimiento.')
+    parser_extraer.add_argument('ips', nargs='+', metavar='IP', help='Dirección IP de la cámara.')
+    parser_extraer.add_argument('--destino', required=True, metavar='DIR', help='Carpeta donde copiar los archivos.')
+    parser_extraer.add_argument('--estacion', default='Estacion', metavar='NOMBRE',
+                                help='Nombre de estación de las carpetas de extracción (por defecto Estacion).')
+    parser_extraer.add_argument('--extensiones', nargs='+', default=['.txt'], metavar='EXT',
+                                help='Extensiones a copiar (por defecto .txt).')
+    parser_extraer.add_argument('--inspeccion', metavar='TEXTO',
+                                help="Copiar solo los archivos cuyo nombre contiene el resultado (p. ej. 'Pass').")
+    parser_extraer.add_argument('--sincronizar', action='store_true',
+                                help='Copiar solo los archivos nuevos o modificados en la copia espejo de cada cámara.')
+    parser_extraer.add_argument('--transporte', choices=transporte.TIPOS_TRANSPORTE, default='montado',
+                                help='Acceso a las cámaras (por defecto montado).')
+    parser_extraer.add_argument('--ruta', metavar='RUTA',
+                                help="Plantilla de la carpeta montada con {ip} (por defecto el recurso UNC), o carpeta "
+                                     "con una subcarpeta por IP para el transporte simulado.")
+    parser_extraer.add_argument('--recurso', default='mtxuser', metavar='NOMBRE',
+                                help='Recurso compartido para el transporte smb (por defecto mtxuser).')
+    parser_extraer.add_argument('--latencia', type=float, default=0.0, metavar='S',
+                                help='Segundos añadidos a cada petición del transporte simulado.')
+    parser_extraer.add_argument('--ancho-banda', type=float, metavar='B/S',
+                                help='Bytes por segundo de cada cámara en el transporte simulado (por defecto sin límite).')
+    parser_extraer.add_argument('--usuario', default=transporte.USUARIO_CAMARA, metavar='USUARIO',
+                                help='Usuario de las cámaras.')
+    parser_extraer.add_argument('--contrasena', default=transporte.CONTRASENA_CAMARA, metavar='CONTRASENA',
+                                help='Contraseña de las cámaras.')
+    parser_extraer.add_argument('--hilos', type=int, default=extraccion.HILOS_EXTRACCION, metavar='N',
+                                help=f'Copias simultáneas en total (por defecto {extraccion.HILOS_EXTRACCION}).')
+    parser_extraer.add_argument('--hilos-por-camara', type=int, default=extraccion.HILOS_POR_CAMARA, metavar='N',
+                                help=f'Copias simultáneas por cámara (por defecto {extraccion.HILOS_POR_CAMARA}).')
+    parser_extraer.set_defaults(funcion=comando_extraer)
+
+    parser_ingerir = subparsers.add_parser('ingerir', help='Guardar los resultados de cada carpeta en el almacén SQLite.')
+    parser_ingerir.add_argument('carpetas', nargs='+', metavar='CARPETA',
+                                help="Carpeta raíz de inspección que contiene subcarpetas 'TXT'.")
+    parser_ingerir.add_argument('--almacen', default=almacen.ALMACEN_POR_DEFECTO, metavar='ARCHIVO',
+                                help=f'Base de datos SQLite del almacén (por defecto {almacen.ALMACEN_POR_DEFECTO}).')
+    parser_ingerir.add_argument('--procesos', type=int, default=1, metavar='N',
+                                help='Procesos para leer los archivos en paralelo (0 = uno por CPU, por defecto 1).')
+    parser_ingerir.add_argument('--formato-tiempo', default=particiones.FORMATO_TIEMPO, metavar='FORMATO',
+                                help="Formato de Image Time Stamp, igual para todas las filas (p. ej. "
+                                     "'%%d/%%m/%%Y %%H:%%M'; por defecto ISO8601).")
+    parser_ingerir.set_defaults(funcion=comando_ingerir)
+
+    parser_consultar = subparsers.add_parser('consultar', help='Consultar los resultados guardados en el almacén.')
+    parser_consultar.add_argument('--almacen', default=almacen.ALMACEN_POR_DEFECTO, metavar='ARCHIVO',
+                                  help=f'Base de datos SQLite del almacén (por defecto {almacen.ALMACEN_POR_DEFECTO}).')
+    parser_consultar.add_argument('--camara', nargs='+', metavar='PREFIJO',
+                                  help="Prefijo del nombre de la cámara (p. ej. 'CAM01').")
+    parser_consultar.add_argument('--recipe', nargs='+', type=int, metavar='N', help='Recipe ID.')
+    parser_consultar.add_argument('--desde', type=fecha_argumento, metavar='FECHA',
+                                  help="Image Time Stamp mínimo (p. ej. '2024-05-01').")
+    parser_consultar.add_argument('--hasta', type=fecha_argumento, metavar='FECHA',
+                                  help='Image Time Stamp máximo, sin incluir.')
+    parser_consultar.add_argument('--resultado', choices=('Pass', 'Fail'), help='Resultado de la inspección.')
+    parser_consultar.add_argument('--parametros', metavar='P;Q',
+                                  help="Parámetros separados por ';' para obtener los datos específicos en lugar de "
+                                       "los estadísticos de blobs.")
+    parser_consultar.add_argument('--repetidas', choices=POLITICAS_REPETIDAS, default='primera',
+                                  help='Valor de un parámetro repetido en un archivo (con --parametros).')
+    parser_consultar.add_argument('--limite', type=int, metavar='N', help='Número máximo de archivos.')
+    parser_consultar.add_argument('--out', metavar='ARCHIVO',
+                                  help='Guardar las filas en un archivo .csv, .xlsx o .parquet en lugar de mostrarlas '
+                                       'como CSV por la salida estándar.')
+    parser_consultar.set_defaults(funcion=comando_consultar)
+
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    return args.funcion(args)
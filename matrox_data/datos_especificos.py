@@ -0,0 +1,113 @@
+"""
+Specific Data Statistics
+========================
+
+GUI-free search of result .txt files containing a set of parameters and export of their values.
+
+Parameters are matched against the exact text before ': ' in each line, and each file is read only once.
+
+Functions:
+----------
+- normalizar_parametros(parametros)
+    Returns the base parameters followed by the given ones (a list or a ';' separated string), stripped and unique.
+
+- buscar_datos_especificos(carpeta, parametros, repetidas='primera', progreso=None, cancelado=None)
+    Reads every .txt file once and returns one row per file that has every parameter as a 'key: value' line.
+    progreso(read, 0) is called after each file (the total is not known in advance), and the search stops
+    with CancelledError once the 'cancelado' event is set.
+    A parameter repeated in a file keeps its first value ('primera'), its last one ('ultima') or all of them
+    as extra columns 'parameter (2)', 'parameter (3)', ... ('todas').
+
+- generar_excel_datos_especificos(filas, parametros, carpeta, cache=None)
+    Writes '<carpeta>_datos_especificos.xlsx' once, with the value of each parameter per file.
+    With cache='parquet' or 'feather' the typed columnar cache is saved next to it.
+
+- generar_estadisticos_datos_especificos(carpeta, parametros, cache=None, repetidas='primera', progreso=None, cancelado=None)
+    Runs the search and the export, returns the workbook path or None if nothing matched.
+"""
+import os
+import pandas as pd
+
+from . import cache_columnar, escaner
+from .analizador import leer_pares_clave_valor
+from .excel import guardar_excel_estadisticos
+from .trabajos import comprobar_cancelacion
+
+PARAMETROS_BASE = ["Recipe ID", "Exposure Time", "Image Time Stamp"]
+
+
+# Función para obtener la lista de parámetros: los de base más los indicados, sin vacíos ni repetidos
+def normalizar_parametros(parametros):
+    if isinstance(parametros, str):
+        parametros = parametros.split(';')
+    normalizados = list(PARAMETROS_BASE)
+    for parametro in parametros:
+        parametro = parametro.strip()
+        if parametro and parametro not in normalizados:
+            normalizados.append(parametro)
+    return normalizados
+
+
+# Función para construir la fila de un archivo a partir de sus pares 'clave: valor'
+# Con la política 'todas', las repeticiones van a columnas 'parámetro (2)', 'parámetro (3)', ...
+def construir_fila(archivo, pares, parametros, repetidas='primera'):
+    fila = {'Camaras': archivo[:19], 'Archivo': archivo}
+    for parametro in parametros:
+        if repetidas == 'todas':
+            valores = pares[parametro]
+            fila[parametro] = valores[0]
+            for numero, valor in enumerate(valores[1:], start=2):
+                fila[f'{parametro} ({numero})'] = valor
+        else:
+            fila[parametro] = pares[parametro]
+    return fila
+
+
+# Función para buscar los archivos .txt que contienen todos los parámetros y extraer sus valores
+# Cada archivo se lee una sola vez: el mismo diccionario 'clave: valor' sirve para filtrar y para extraer
+def buscar_datos_especificos(carpeta, parametros, repetidas='primera', progreso=None, cancelado=None):
+    filas = []
+    for leidos, archivo in enumerate(escaner.escanear(carpeta, lambda nombre: nombre.endswith('.txt'), estado=False),
+                                     start=1):
+        comprobar_cancelacion(cancelado)
+        if progreso is not None:
+            progreso(leidos, 0)
+        pares = leer_pares_clave_valor(archivo.ruta, repetidas)
+        if all(parametro in pares for parametro in parametros):
+            filas.append(construir_fila(archivo.nombre, pares, parametros, repetidas))
+    return filas
+
+
+# Función para ordenar las columnas: cada parámetro seguido de sus repeticiones
+def columnas_datos_especificos(filas, parametros):
+    presentes = set()
+    for fila in filas:
+        presentes.update(fila)
+    columnas = ['Camaras', 'Archivo']
+    for parametro in parametros:
+        columnas.append(parametro)
+        numero = 2
+        while f'{parametro} ({numero})' in presentes:
+            columnas.append(f'{parametro} ({numero})')
+            numero += 1
+    return columnas
+
+
+# Función para generar un archivo Excel con los datos de los archivos encontrados
+def generar_excel_datos_especificos(filas, parametros, carpeta, cache=None):
+    df = pd.DataFrame(filas, columns=columnas_datos_especificos(filas, parametros))
+    nombre_carpeta = os.path.basename(os.path.normpath(carpeta))
+    ruta_excel = os.path.join(carpeta, f'{nombre_carpeta}_datos_especificos.xlsx')
+    if cache:
+        cache_columnar.guardar_cache(df, cache_columnar.ruta_cache(ruta_excel, cache))
+    return guardar_excel_estadisticos(df, ruta_excel, resaltar_vacios=False)
+
+
+# Función para buscar los parámetros en la carpeta y generar el Excel de datos específicos
+def generar_estadisticos_datos_especificos(carpeta, parametros, cache=None, repetidas='primera', progreso=None,
+                                           cancelado=None):
+    parametros = normalizar_parametros(parametros)
+    filas = buscar_datos_especificos(carpeta, parametros, repetidas, progreso, cancelado)
+    if not filas:
+        return None
+    return generar_excel_datos_especificos(filas, parametros, carpeta, cache)
@@ -0,0 +1,97 @@
+"""
+Directory Scanner
+=================
+
+Single directory scanner based on os.scandir, shared by the statistics, classification, specific-data and
+extraction functions so each operation lists every folder only once.
+
+The scanner is a generator of Entrada records (path, name, parent folder, whether it is a folder, size and
+modification time). Right after a folder is listed its entries are yielded, then its subfolders are scanned in
+the order they were listed, which is the same order as os.walk. The size and modification time come from the
+DirEntry stat, which Windows already returns with the listing, and are only requested for the files that pass
+the filter. Folders can be pruned, and with hilos > 1 the sibling subfolders are listed in parallel by a thread
+pool (useful on network shares, where each listing is a round trip) while the output keeps the same order.
+Folders are listed with os.scandir unless another 'listar' function is given, such as the one of a camera
+transport (see matrox_data.transporte).
+
+Functions:
+----------
+- escanear(raiz, filtro=None, podar=None, carpetas=False, estado=True, hilos=1, listar=None)
+    Yields an Entrada for every file under 'raiz' whose name passes filtro(name), and for every folder too
+    if carpetas=True. Folders for which podar(entrada) is True are neither yielded nor scanned.
+"""
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Hilos para listar carpetas hermanas en paralelo en recursos compartidos de red
+HILOS_ESCANEO = 8
+
+Entrada = namedtuple('Entrada', ['ruta', 'nombre', 'carpeta', 'es_carpeta', 'tamano', 'mtime'])
+
+
+# Función para listar una carpeta y devolver sus entradas y las subcarpetas que hay que recorrer
+def listar_carpeta(carpeta, filtro=None, podar=None, carpetas=False, estado=True, listar=None):
+    try:
+        if listar is None:
+            with os.scandir(carpeta) as iterador:
+                entradas_carpeta = list(iterador)
+        else:
+            entradas_carpeta = listar(carpeta)
+    except OSError:
+        return [], []
+
+    entradas = []
+    subcarpetas = []
+    for entrada in entradas_carpeta:
+        try:
+            if entrada.is_dir():
+                registro = Entrada(entrada.path, entrada.name, carpeta, True, None, None)
+                if podar is not None and podar(registro):
+                    continue
+                if carpetas:
+                    entradas.append(registro)
+                # Como os.walk, los enlaces simbólicos a carpetas no se recorren
+                if not entrada.is_symlink():
+                    subcarpetas.append(entrada.path)
+            elif filtro is None or filtro(entrada.name):
+                if estado:
+                    estado_archivo = entrada.stat()
+                    entradas.append(Entrada(entrada.path, entrada.name, carpeta, False, estado_archivo.st_size,
+                                            estado_archivo.st_mtime_ns))
+                else:
+                    entradas.append(Entrada(entrada.path, entrada.name, carpeta, False, None, None))
+        except OSError:
+            # El archivo desapareció o no se puede consultar mientras se recorría la carpeta
+            continue
+    return entradas, subcarpetas
+
+
+# Función para recorrer un árbol de carpetas listando cada carpeta una sola vez
+def escanear(raiz, filtro=None, podar=None, carpetas=False, estado=True, hilos=1, listar=None):
+    def recorrer(carpeta):
+        entradas, subcarpetas = listar_carpeta(carpeta, filtro, podar, carpetas, estado, listar)
+        yield from entradas
+        for subcarpeta in subcarpetas:
+            yield from recorrer(subcarpeta)
+
+    def recorrer_en_paralelo(executor, futuro):
+        entradas, subcarpetas = futuro.result()
+        # Las subcarpetas hermanas se listan en paralelo mientras se entregan las entradas en orden
+        futuros = [executor.submit(listar_carpeta, subcarpeta, filtro, podar, carpetas, estado, listar)
+                   for subcarpeta in subcarpetas]
+        yield from entradas
+        for futuro_subcarpeta in futuros:
+            yield from recorrer_en_paralelo(executor, futuro_subcarpeta)
+
+    if hilos <= 1:
+        yield from recorrer(raiz)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=hilos)
+    try:
+        futuro = executor.submit(listar_carpeta, raiz, filtro, podar, carpetas, estado, listar)
+        yield from recorrer_en_paralelo(executor, futuro)
+    finally:
+        # Si se deja de consumir el generador no se siguen listando carpetas
+        executor.shutdown(wait=True, cancel_futures=True)
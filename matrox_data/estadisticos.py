@@ -0,0 +1,349 @@
+"""
+Blob Statistics
+===============
+
+GUI-free generation of the blob statistics workbook from Matrox result .txt files.
+
+Functions:
+----------
+- buscar_subcarpetas_txt(carpeta)
+    Searches for all subfolders named 'TXT' within the specified directory.
+
+- listar_archivos_txt(subcarpetas_txt)
+    Returns the paths of the .txt files under the 'TXT' subfolders, in walk order.
+
+- escanear_archivos_txt(carpeta, subcarpetas_txt=None, estado=True, hilos=1)
+    Finds the 'TXT' subfolders and their .txt files in a single scan of the directory and returns both.
+    The files are escaner.Entrada records (with size and modification time if estado=True), in the same
+    order as listing the 'TXT' subfolders one after another.
+
+- leer_resultados(rutas, procesos=1, tamano_lote=TAMANO_LOTE, incompletos=False, progreso=None, cancelado=None,
+                  leer_lote=leer_lote_resultados)
+    Parses the files serially or in batches across a process pool, keeping their order. leer_lote(rutas,
+    incompletos) reads one batch; it must be a module-level function so it can be sent to the processes.
+    progreso(read, total) is called after each batch, and the reading stops with CancelledError between
+    batches once the 'cancelado' event is set.
+
+- calcular_estadisticos(carpeta, subcarpetas_txt=None, procesos=1, tamano_lote=TAMANO_LOTE, progreso=None, cancelado=None)
+    Parses every .txt file under the 'TXT' subfolders of a directory and returns a DataFrame with compact column
+    types (see matrox_data.registros).
+    With procesos > 1 (or None for one per CPU) the files are parsed in parallel.
+
+- calcular_estadisticos_incremental(carpeta, ruta_manifiesto, subcarpetas_txt=None, procesos=1, tamano_lote=TAMANO_LOTE,
+                                    progreso=None, cancelado=None)
+    Same as calcular_estadisticos, but only parses files that are new or changed since the manifest was saved.
+    Returns the DataFrame and a dict with the number of files read and reused.
+
+- leer_resultados_por_bloques(subcarpetas_txt, procesos=1, tamano_lote=TAMANO_LOTE, filas_bloque=FILAS_BLOQUE,
+                              progreso=None, cancelado=None)
+    Yields the compact records (analizador.Registro) of the .txt files under the 'TXT' subfolders in lists of at
+    most filas_bloque records, listing the folders as it goes. progreso(read, 0) is called after each batch.
+
+- generar_estadisticos_por_bloques(carpeta, ruta_excel=None, subcarpetas_txt=None, procesos=1, tamano_lote=TAMANO_LOTE,
+                                   filas_bloque=FILAS_BLOQUE, filas_hoja=MAX_FILAS_EXCEL, progreso=None, cancelado=None)
+    Writes the statistics workbook through matrox_data.bloques, holding at most filas_bloque rows in memory.
+    Returns the workbook path and the number of rows.
+
+- ruta_excel_estadisticos(carpeta, carpeta_salida=None)
+    Returns the default workbook path, '<carpeta>.xlsx'.
+
+- exportar_excel_desde_cache(ruta_cache, ruta_excel=None)
+    Writes the statistics workbook from a columnar cache.
+
+- generar_estadisticos(carpeta, ruta_excel=None, subcarpetas_txt=None, procesos=1, incremental=False, cache=None, excel=True,
+                       particion=None, salida='hojas', filas_particion=MAX_FILAS_EXCEL, agregados=False, limites=None,
+                       tendencias=False, ventana=VENTANA, formato_tiempo=FORMATO_TIEMPO, filas_bloque=None, progreso=None,
+                       cancelado=None)
+    Runs the whole process and returns the path of the generated workbook.
+    With filas_bloque the workbook is built by chunks of that many rows (see generar_estadisticos_por_bloques);
+    this mode cannot be combined with incremental, cache, agregados, tendencias or other partitions than 'filas'.
+    With cache='parquet' or 'feather' the typed columnar cache is saved next to it; with excel=False only
+    the cache is written and its path is returned.
+    With particion ('camara', 'dia' or 'filas') the output is split into sheets, workbooks or gzipped CSV files
+    (salida='hojas', 'libros' or 'csv'); results larger than one sheet are always split by rows.
+    With agregados=True the per-camera and per-recipe summary (see matrox_data.agregados) is also written to
+    '<workbook>_agregados.xlsx', with Cpk against the 'limites' specification limits.
+    With tendencias=True the rolling statistics and EWMA/CUSUM drift flags per camera over 'ventana' (see
+    matrox_data.tendencias) are written to '<workbook>_tendencias.xlsx'.
+    Day partitions and trends read Image Time Stamp with 'formato_tiempo' (see matrox_data.particiones).
+
+- generar_estadisticos_con_resumen(carpeta, ruta_excel=None, subcarpetas_txt=None, procesos=1, tamano_lote=TAMANO_LOTE,
+                                   incremental=False, cache=None, excel=True, particion=None, salida='hojas',
+                                   filas_particion=MAX_FILAS_EXCEL, agregados=False, limites=None, tendencias=False,
+                                   ventana=VENTANA, formato_tiempo=FORMATO_TIEMPO, filas_bloque=None, progreso=None,
+                                   cancelado=None)
+    Same as generar_estadisticos, but returns a dict with the number of rows, the paths of the workbook, cache,
+    aggregates and trends workbooks (None if not written), the number of drift events and, with
+    incremental=True, the number of files read and reused.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from . import agregados as agregados_estadisticos
+from . import bloques, cache_columnar, escaner, manifiesto, particiones, registros
+from . import tendencias as tendencias_estadisticos
+from .analizador import leer_archivo_resultados, leer_registro_resultados
+from .bloques import FILAS_BLOQUE
+from .trabajos import comprobar_cancelacion
+from .excel import MAX_FILAS_EXCEL, guardar_excel_estadisticos
+from .particiones import FORMATO_TIEMPO
+from .tendencias import VENTANA
+
+# Archivos por lote enviado a cada proceso, para amortizar la comunicación entre procesos
+TAMANO_LOTE = 500
+
+
+# Función para buscar todas las subcarpetas llamadas 'TXT'
+def buscar_subcarpetas_txt(carpeta):
+    # El filtro descarta todos los archivos, así solo se listan carpetas y no se consulta ningún tamaño
+    entradas = escaner.escanear(carpeta, filtro=lambda nombre: False, carpetas=True, estado=False)
+    return [entrada.ruta for entrada in entradas if entrada.nombre.lower() == 'txt']
+
+
+# Función para saber si un nombre de archivo es un archivo de resultados .txt
+def es_archivo_txt(nombre):
+    return nombre.endswith('.txt')
+
+
+# Función para listar los archivos .txt de las subcarpetas 'TXT' en orden de recorrido
+def listar_archivos_txt(subcarpetas_txt):
+    _, archivos = escanear_archivos_txt(None, subcarpetas_txt, estado=False)
+    return [archivo.ruta for archivo in archivos]
+
+
+# Función para obtener las subcarpetas 'TXT' y sus archivos .txt recorriendo la carpeta una sola vez
+def escanear_archivos_txt(carpeta, subcarpetas_txt=None, estado=True, hilos=1):
+    if subcarpetas_txt is not None:
+        archivos = []
+        for subcarpeta_txt in subcarpetas_txt:
+            archivos.extend(escaner.escanear(subcarpeta_txt, es_archivo_txt, estado=estado, hilos=hilos))
+        return subcarpetas_txt, archivos
+
+    # Cada carpeta pertenece a la subcarpeta 'TXT' más cercana que la contiene (o a ninguna)
+    grupo_carpeta = {carpeta: None}
+    archivos_por_grupo = {}
+    for entrada in escaner.escanear(carpeta, es_archivo_txt, carpetas=True, estado=estado, hilos=hilos):
+        if entrada.es_carpeta:
+            if entrada.nombre.lower() == 'txt':
+                grupo_carpeta[entrada.ruta] = entrada.ruta
+                archivos_por_grupo[entrada.ruta] = []
+            else:
+                grupo_carpeta[entrada.ruta] = grupo_carpeta.get(entrada.carpeta)
+            continue
+        grupo = grupo_carpeta.get(entrada.carpeta)
+        if grupo is not None:
+            archivos_por_grupo[grupo].append(entrada)
+
+    # Las subcarpetas se registran al listar su carpeta padre, en el mismo orden que buscar_subcarpetas_txt
+    archivos = [archivo for archivos_grupo in archivos_por_grupo.values() for archivo in archivos_grupo]
+    return list(archivos_por_grupo), archivos
+
+
+# Función para leer un lote de archivos de resultados (se ejecuta en los procesos del pool)
+def leer_lote_resultados(rutas, incompletos=False):
+    valores = []
+    for ruta_archivo in rutas:
+        datos = leer_archivo_resultados(ruta_archivo)
+        if datos is not None or incompletos:
+            valores.append(datos)
+    return valores
+
+
+# Función para leer un lote de archivos como registros compactos (se ejecuta en los procesos del pool)
+def leer_lote_registros(rutas, incompletos=False):
+    valores = []
+    for ruta_archivo in rutas:
+        registro = leer_registro_resultados(ruta_archivo)
+        if registro is not None or incompletos:
+            valores.append(registro)
+    return valores
+
+
+# Función para leer todos los archivos en serie o repartidos en lotes entre varios procesos
+# 'leer_lote' permite leer otro tipo de registro por archivo con el mismo reparto en lotes
+def leer_resultados(rutas, procesos=1, tamano_lote=TAMANO_LOTE, incompletos=False, progreso=None, cancelado=None,
+                    leer_lote=leer_lote_resultados):
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    seguimiento = progreso is not None or cancelado is not None
+    if not seguimiento and (procesos <= 1 or len(rutas) <= tamano_lote):
+        return leer_lote(rutas, incompletos)
+
+    lotes = [rutas[i:i + tamano_lote] for i in range(0, len(rutas), tamano_lote)]
+    valores = []
+    leidos = 0
+    if procesos <= 1 or len(lotes) <= 1:
+        for lote in lotes:
+            comprobar_cancelacion(cancelado)
+            valores.extend(leer_lote(lote, incompletos))
+            leidos += len(lote)
+            if progreso is not None:
+                progreso(leidos, len(rutas))
+        return valores
+
+    with ProcessPoolExecutor(max_workers=min(procesos, len(lotes))) as executor:
+        # map devuelve los lotes en el orden de envío, así el orden de las filas no depende de los procesos
+        for lote, valores_lote in zip(lotes, executor.map(leer_lote, lotes, [incompletos] * len(lotes))):
+            if cancelado is not None and cancelado.is_set():
+                # No esperar a los lotes que aún no han empezado
+                executor.shutdown(wait=False, cancel_futures=True)
+                comprobar_cancelacion(cancelado)
+            valores.extend(valores_lote)
+            leidos += len(lote)
+            if progreso is not None:
+                progreso(leidos, len(rutas))
+    return valores
+
+
+# Función para calcular los estadísticos de todos los archivos .txt de las subcarpetas 'TXT'
+def calcular_estadisticos(carpeta, subcarpetas_txt=None, procesos=1, tamano_lote=TAMANO_LOTE, progreso=None,
+                          cancelado=None):
+    subcarpetas_txt, archivos = escanear_archivos_txt(carpeta, subcarpetas_txt, estado=False)
+    if not subcarpetas_txt:
+        raise FileNotFoundError(f"No 'TXT' subfolders were found in '{carpeta}'.")
+
+    # Los registros compactos ocupan menos memoria y se envían más rápido desde los procesos que los diccionarios
+    valores = leer_resultados([archivo.ruta for archivo in archivos], procesos, tamano_lote, progreso=progreso,
+                              cancelado=cancelado, leer_lote=leer_lote_registros)
+    return registros.tabla_registros(valores)
+
+
+# Función para calcular los estadísticos leyendo solo los archivos nuevos o modificados desde la última ejecución
+def calcular_estadisticos_incremental(carpeta, ruta_manifiesto, subcarpetas_txt=None, procesos=1,
+                                      tamano_lote=TAMANO_LOTE, progreso=None, cancelado=None):
+    subcarpetas_txt, archivos_txt = escanear_archivos_txt(carpeta, subcarpetas_txt)
+    if not subcarpetas_txt:
+        raise FileNotFoundError(f"No 'TXT' subfolders were found in '{carpeta}'.")
+
+    anteriores = manifiesto.cargar_manifiesto(ruta_manifiesto)
+    archivos = {}
+    pendientes = []
+    for archivo in archivos_txt:
+        ruta_relativa = os.path.relpath(archivo.ruta, carpeta)
+        anterior = anteriores.get(ruta_relativa)
+        if anterior is not None and anterior['tamano'] == archivo.tamano and anterior['mtime'] == archivo.mtime:
+            archivos[ruta_relativa] = anterior
+        else:
+            archivos[ruta_relativa] = {'tamano': archivo.tamano, 'mtime': archivo.mtime, 'datos': None}
+            pendientes.append(archivo.ruta)
+
+    # Los archivos se leen con la misma lógica que en el modo completo, incluidos los incompletos (datos = None)
+    valores = leer_resultados(pendientes, procesos, tamano_lote, True, progreso, cancelado)
+    for ruta_archivo, datos in zip(pendientes, valores):
+        archivos[os.path.relpath(ruta_archivo, carpeta)]['datos'] = datos
+
+    manifiesto.guardar_manifiesto(ruta_manifiesto, archivos)
+    df = pd.DataFrame([archivo['datos'] for archivo in archivos.values() if archivo['datos'] is not None])
+    return registros.compactar_tipos(df), {'leidos': len(pendientes), 'reutilizados': len(archivos) - len(pendientes)}
+
+
+# Función para leer los archivos .txt de las subcarpetas 'TXT' por bloques, sin listar antes todos los archivos
+def leer_resultados_por_bloques(subcarpetas_txt, procesos=1, tamano_lote=TAMANO_LOTE, filas_bloque=FILAS_BLOQUE,
+                                progreso=None, cancelado=None):
+    rutas = (archivo.ruta for subcarpeta_txt in subcarpetas_txt
+             for archivo in escaner.escanear(subcarpeta_txt, es_archivo_txt, estado=False))
+    leidos = 0
+    while True:
+        bloque = list(itertools.islice(rutas, filas_bloque))
+        if not bloque:
+            return
+        progreso_bloque = None
+        if progreso is not None:
+            # El total no se conoce hasta terminar el recorrido
+            def progreso_bloque(hechos, total, leidos=leidos):
+                progreso(leidos + hechos, 0)
+        yield leer_resultados(bloque, procesos, tamano_lote, progreso=progreso_bloque, cancelado=cancelado,
+                              leer_lote=leer_lote_registros)
+        leidos += len(bloque)
+
+
+# Función para generar el archivo de estadísticos por bloques, con la memoria limitada por 'filas_bloque'
+def generar_estadisticos_por_bloques(carpeta, ruta_excel=None, subcarpetas_txt=None, procesos=1,
+                                     tamano_lote=TAMANO_LOTE, filas_bloque=FILAS_BLOQUE, filas_hoja=MAX_FILAS_EXCEL,
+                                     progreso=None, cancelado=None):
+    if ruta_excel is None:
+        ruta_excel = ruta_excel_estadisticos(carpeta)
+    if subcarpetas_txt is None:
+        subcarpetas_txt = buscar_subcarpetas_txt(carpeta)
+    if not subcarpetas_txt:
+        raise FileNotFoundError(f"No 'TXT' subfolders were found in '{carpeta}'.")
+
+    lotes = leer_resultados_por_bloques(subcarpetas_txt, procesos, tamano_lote, filas_bloque, progreso, cancelado)
+    filas = bloques.guardar_bloques(lotes, ruta_excel, filas_bloque, filas_hoja)
+    return ruta_excel, filas
+
+
+# Función para obtener la ruta por defecto del archivo de estadísticos: '<carpeta>.xlsx'
+def ruta_excel_estadisticos(carpeta, carpeta_salida=None):
+    nombre_carpeta = os.path.basename(os.path.normpath(carpeta))
+    return os.path.join(carpeta_salida or carpeta, f'{nombre_carpeta}.xlsx')
+
+
+# Función para exportar a Excel un caché columnar de estadísticos
+def exportar_excel_desde_cache(ruta_cache, ruta_excel=None):
+    if ruta_excel is None:
+        ruta_excel = os.path.splitext(ruta_cache)[0] + '.xlsx'
+    return guardar_excel_estadisticos(cache_columnar.cargar_cache(ruta_cache), ruta_excel)
+
+
+# Función para generar los estadísticos de una carpeta y devolver lo que se ha escrito: filas, rutas de los
+# archivos generados, derivas detectadas y, en modo incremental, archivos leídos y reutilizados
+def generar_estadisticos_con_resumen(carpeta, ruta_excel=None, subcarpetas_txt=None, procesos=1,
+                                     tamano_lote=TAMANO_LOTE, incremental=False, cache=None, excel=True,
+                                     particion=None, salida='hojas', filas_particion=MAX_FILAS_EXCEL, agregados=False,
+                                     limites=None, tendencias=False, ventana=VENTANA, formato_tiempo=FORMATO_TIEMPO,
+                                     filas_bloque=None, progreso=None, cancelado=None):
+    if ruta_excel is None:
+        ruta_excel = ruta_excel_estadisticos(carpeta)
+    resumen = {'filas': 0, 'excel': None, 'cache': None, 'agregados': None, 'tendencias': None, 'derivas': 0}
+    if filas_bloque:
+        # Por bloques solo se escribe el libro de estadísticos; el resto necesita todas las filas a la vez
+        if incremental or cache or not excel or agregados or tendencias or particion not in (None, 'filas') \
+                or salida != 'hojas':
+            raise ValueError("The chunked build only writes the statistics workbook, split into sheets by rows.")
+        resumen['excel'], resumen['filas'] = generar_estadisticos_por_bloques(
+            carpeta, ruta_excel, subcarpetas_txt, procesos, tamano_lote, filas_bloque, filas_particion, progreso,
+            cancelado)
+        return resumen
+    if incremental:
+        df, lectura = calcular_estadisticos_incremental(carpeta, manifiesto.ruta_manifiesto(ruta_excel),
+                                                        subcarpetas_txt, procesos, tamano_lote, progreso, cancelado)
+        resumen.update(lectura)
+    else:
+        df = calcular_estadisticos(carpeta, subcarpetas_txt, procesos, tamano_lote, progreso, cancelado)
+    comprobar_cancelacion(cancelado)
+    resumen['filas'] = len(df)
+
+    if agregados:
+        resumen['agregados'] = agregados_estadisticos.guardar_agregados(
+            df, agregados_estadisticos.ruta_agregados(ruta_excel), limites)
+    if tendencias:
+        resumen['tendencias'] = tendencias_estadisticos.ruta_tendencias(ruta_excel)
+        derivas = tendencias_estadisticos.guardar_tendencias(df, resumen['tendencias'], ventana=ventana,
+                                                             formato_tiempo=formato_tiempo)
+        resumen['derivas'] = int(derivas['Derivas'].sum())
+    if cache:
+        resumen['cache'] = cache_columnar.guardar_cache(df, cache_columnar.ruta_cache(ruta_excel, cache))
+        if not excel:
+            return resumen
+    # Si no cabe en una hoja, particionar() lo reparte automáticamente en varias
+    resumen['excel'] = particiones.guardar_particiones(df, ruta_excel, particion, salida, filas_particion, procesos,
+                                                          formato_tiempo)
+    return resumen
+
+
+# Función para generar el archivo de estadísticos '<carpeta>.xlsx' en la raíz de la carpeta
+# Con 'cache' ('parquet' o 'feather') se guarda también el caché columnar; con excel=False solo el caché
+def generar_estadisticos(carpeta, ruta_excel=None, subcarpetas_txt=None, procesos=1, incremental=False, cache=None,
+                         excel=True, particion=None, salida='hojas', filas_particion=MAX_FILAS_EXCEL, agregados=False,
+                         limites=None, tendencias=False, ventana=VENTANA, formato_tiempo=FORMATO_TIEMPO,
+                         filas_bloque=None, progreso=None, cancelado=None):
+    resumen = generar_estadisticos_con_resumen(
+        carpeta, ruta_excel, subcarpetas_txt, procesos, incremental=incremental, cache=cache, excel=excel,
+        particion=particion, salida=salida, filas_particion=filas_particion, agregados=agregados, limites=limites,
+        tendencias=tendencias, ventana=ventana, formato_tiempo=formato_tiempo, filas_bloque=filas_bloque,
+        progreso=progreso, cancelado=cancelado)
+    return resumen['excel'] or resumen['cache']
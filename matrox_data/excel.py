@@ -0,0 +1,172 @@
+"""
+Excel Export
+============
+
+Writes the statistics DataFrames to Excel without per-cell Python loops.
+
+Column widths are computed from the DataFrame and empty cells are highlighted with a single conditional
+formatting rule. The xlsxwriter engine is used when it is installed, otherwise openpyxl.
+
+Functions:
+----------
+- calcular_anchos_columnas(df)
+    Returns the Excel width of each column, computed from the DataFrame instead of the written cells.
+
+- escribir_hoja_estadisticos(writer, df, hoja, resaltar_vacios=True)
+    Writes one sheet into an open pd.ExcelWriter, adjusting widths and optionally highlighting empty cells.
+
+- guardar_excel_estadisticos(df, ruta_excel, hoja='Sheet1', resaltar_vacios=True)
+    Writes the statistics DataFrame to a workbook with a single sheet.
+
+- guardar_excel_por_bloques(bloques, ruta_excel, columnas, anchos, filas_hoja=MAX_FILAS_EXCEL, resaltar_vacios=True)
+    Writes an iterable of DataFrames with the given columns row by row in constant-memory mode (xlsxwriter's
+    constant_memory or openpyxl's write-only workbook), starting a new sheet every filas_hoja rows. 'anchos' is
+    the list of column widths of every sheet, or a list with one such list per sheet.
+"""
+import importlib.util
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+COLOR_VACIO = "F08080"
+# Filas de datos que caben en una hoja de Excel (1.048.576 menos la fila de encabezado)
+MAX_FILAS_EXCEL = 1048575
+
+
+# Función para elegir el motor de Excel más rápido disponible
+def motor_excel():
+    return 'xlsxwriter' if importlib.util.find_spec('xlsxwriter') else 'openpyxl'
+
+
+# Función para calcular el ancho de cada columna de Excel a partir del texto más largo (sin recorrer celdas)
+def calcular_anchos_columnas(df):
+    anchos = []
+    for columna in df.columns:
+        max_length = len(str(columna))
+        # Como en la versión original, solo cuentan los valores de texto; los números y las fechas no
+        try:
+            longitudes = df[columna].str.len()
+        except AttributeError:
+            longitudes = None
+        if longitudes is not None and longitudes.notna().any():
+            max_length = max(max_length, int(longitudes.max()))
+        anchos.append((max_length + 2) * 1.2)
+    return anchos
+
+
+# Función para escribir una hoja de estadísticos en un ExcelWriter abierto
+def escribir_hoja_estadisticos(writer, df, hoja, resaltar_vacios=True):
+    anchos = calcular_anchos_columnas(df)
+    ultima_fila = len(df)
+    ultima_columna = max(len(df.columns) - 1, 0)
+
+    df.to_excel(writer, index=False, header=True, sheet_name=hoja)
+    hoja_excel = writer.sheets[hoja]
+    if writer.engine == 'xlsxwriter':
+        # Ajustar el tamaño de las columnas al contenido
+        for indice, ancho in enumerate(anchos):
+            hoja_excel.set_column(indice, indice, ancho)
+        if not resaltar_vacios:
+            return
+        # Resaltar en rojo los campos vacíos con una sola regla de formato condicional
+        formato_vacio = writer.book.add_format({'bg_color': COLOR_VACIO, 'pattern': 1})
+        hoja_excel.conditional_format(0, 0, ultima_fila, ultima_columna, {'type': 'blanks', 'format': formato_vacio})
+    else:
+        for indice, ancho in enumerate(anchos, start=1):
+            hoja_excel.column_dimensions[get_column_letter(indice)].width = ancho
+        if not resaltar_vacios:
+            return
+        rango = f'A1:{get_column_letter(ultima_columna + 1)}{ultima_fila + 1}'
+        relleno_vacio = PatternFill(start_color=COLOR_VACIO, end_color=COLOR_VACIO, fill_type="solid")
+        hoja_excel.conditional_formatting.add(rango, FormulaRule(formula=['LEN(A1)=0'], fill=relleno_vacio))
+
+
+# Función para escribir el DataFrame de estadísticos en un archivo Excel
+def guardar_excel_estadisticos(df, ruta_excel, hoja='Sheet1', resaltar_vacios=True):
+    with pd.ExcelWriter(ruta_excel, engine=motor_excel()) as writer:
+        escribir_hoja_estadisticos(writer, df, hoja, resaltar_vacios)
+    return ruta_excel
+
+
+# Función para crear una hoja del libro por bloques con los anchos de columna y el encabezado
+# (en los dos modos de memoria constante los anchos deben fijarse antes de escribir filas)
+def nueva_hoja_por_bloques(libro, nombre, columnas, anchos, formato_encabezado):
+    if formato_encabezado is not None:
+        hoja = libro.add_worksheet(nombre)
+        for indice, ancho in enumerate(anchos):
+            hoja.set_column(indice, indice, ancho)
+        hoja.write_row(0, 0, columnas, formato_encabezado)
+        return hoja
+    hoja = libro.create_sheet(nombre)
+    for indice, ancho in enumerate(anchos, start=1):
+        hoja.column_dimensions[get_column_letter(indice)].width = ancho
+    borde = Side(style='thin')
+    encabezado = []
+    for columna in columnas:
+        celda = WriteOnlyCell(hoja, value=columna)
+        celda.font = Font(bold=True)
+        celda.border = Border(left=borde, right=borde, top=borde, bottom=borde)
+        celda.alignment = Alignment(horizontal='center')
+        encabezado.append(celda)
+    hoja.append(encabezado)
+    return hoja
+
+
+# Función para escribir un libro de estadísticos bloque a bloque sin tener todas las filas en memoria
+def guardar_excel_por_bloques(bloques, ruta_excel, columnas, anchos, filas_hoja=MAX_FILAS_EXCEL, resaltar_vacios=True):
+    filas_hoja = min(filas_hoja, MAX_FILAS_EXCEL)
+    if motor_excel() == 'xlsxwriter':
+        import xlsxwriter
+        libro = xlsxwriter.Workbook(ruta_excel, {'constant_memory': True})
+        # Mismo formato de encabezado que escribe pandas
+        formato_encabezado = libro.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    else:
+        libro = Workbook(write_only=True)
+        formato_encabezado = None
+
+    # Con una lista de anchos por hoja, cada hoja usa los suyos, como al escribir cada hoja desde su DataFrame
+    if not anchos or not isinstance(anchos[0], (list, tuple)):
+        anchos = [anchos]
+    hojas = []
+    for bloque in bloques:
+        # Los valores vacíos (NA) se escriben como celdas en blanco
+        filas = bloque.astype(object).where(bloque.notna(), None).to_numpy().tolist()
+        inicio = 0
+        while inicio < len(filas):
+            if not hojas or hojas[-1][1] == filas_hoja:
+                hoja = nueva_hoja_por_bloques(libro, f'Sheet{len(hojas) + 1}', columnas,
+                                              anchos[min(len(hojas), len(anchos) - 1)], formato_encabezado)
+                hojas.append([hoja, 0])
+            hoja, escritas = hojas[-1]
+            parte = filas[inicio:inicio + filas_hoja - escritas]
+            for numero, fila in enumerate(parte, start=escritas + 1):
+                if formato_encabezado is not None:
+                    hoja.write_row(numero, 0, fila)
+                else:
+                    hoja.append(fila)
+            hojas[-1][1] = escritas + len(parte)
+            inicio += len(parte)
+    if not hojas:
+        hojas.append([nueva_hoja_por_bloques(libro, 'Sheet1', columnas, anchos[0], formato_encabezado), 0])
+
+    # Resaltar en rojo los campos vacíos con una sola regla de formato condicional por hoja
+    if resaltar_vacios:
+        ultima_columna = max(len(columnas) - 1, 0)
+        for hoja, escritas in hojas:
+            if formato_encabezado is not None:
+                formato_vacio = libro.add_format({'bg_color': COLOR_VACIO, 'pattern': 1})
+                hoja.conditional_format(0, 0, escritas, ultima_columna, {'type': 'blanks', 'format': formato_vacio})
+            else:
+                rango = f'A1:{get_column_letter(ultima_columna + 1)}{escritas + 1}'
+                relleno_vacio = PatternFill(start_color=COLOR_VACIO, end_color=COLOR_VACIO, fill_type="solid")
+                hoja.conditional_formatting.add(rango, FormulaRule(formula=['LEN(A1)=0'], fill=relleno_vacio))
+
+    if formato_encabezado is not None:
+        libro.close()
+    else:
+        libro.save(ruta_excel)
+    return ruta_excel
@@ -0,0 +1,331 @@
+"""
+Camera Extraction
+=================
+
+GUI-free connection to the Matrox cameras' SMB share and copy of their result files.
+
+Every function takes an optional 'transporte' (see matrox_data.transporte) that gives the camera folder and how
+to connect, list and copy; by default the '\\\\ip\\mtxuser' share with 'net use'. The ping and 'net use'
+helpers (hacer_ping, conectar_smb, desconectar_smb, sesiones_smb, ...) are imported from matrox_data.transporte.
+
+Functions:
+----------
+- conectar_camara(direccion_ip, usuario, contrasena, tiempo_espera=TIEMPO_ESPERA_CONEXION, sesiones=None, transporte=None)
+    Connects one camera unless it already has a session. Returns CONEXION_NUEVA, CONEXION_REUTILIZADA,
+    CONEXION_SIN_RESPUESTA or CONEXION_ERROR_CREDENCIALES.
+
+- conectar_camaras(direcciones, usuario, contrasena, hilos=HILOS_CONEXION, tiempo_espera=TIEMPO_ESPERA_CONEXION,
+                   progreso=None, cancelado=None, transporte=None)
+    Runs conectar_camara for several cameras at the same time, listing the open sessions only once, and returns
+    {ip: result}. progreso(connected, total) is called after each camera.
+
+- extraer_archivos_camara(direccion_ip, carpeta_destino_padre, extensiones, inspeccion=None, estacion="Estacion", progreso=None,
+                          hilos=HILOS_POR_CAMARA, executor=None, cancelado=None, transporte=None)
+    Copies the matching files of one camera into '<estacion>-<ip>-<fecha>' and returns the destination folder.
+    The share is listed once, with sibling folders listed in parallel, and progreso(copied, total) counts
+    the matching files. Up to 'hilos' copies are in flight at a time, in 'executor' if one is given.
+
+- sincronizar_camara(direccion_ip, carpeta_destino_padre, extensiones, inspeccion=None, estacion="Estacion", progreso=None,
+                     hilos=HILOS_POR_CAMARA, executor=None, calcular_hash=False, cancelado=None, transporte=None)
+    Keeps a mirror of the camera in '<estacion>-<ip>' and copies only the files that are new or changed since the
+    last sync, according to the manifest saved in the mirror (relative path, size, modification time and, with
+    calcular_hash=True, the SHA-256 of the copy). Each file is written to a '.parcial' file and renamed when
+    complete, and the manifest is saved every GUARDAR_CADA copies, so an interrupted sync resumes where it
+    stopped. Returns the mirror folder.
+
+- extraer_archivos_camaras(camaras, carpeta_destino_padre, extensiones, inspeccion=None, progreso=None,
+                           hilos_por_camara=HILOS_POR_CAMARA, hilos=HILOS_EXTRACCION, sincronizar=False, extraer=None,
+                           cancelado=None, transporte=None)
+    Extracts several cameras, given as (ip, estacion) pairs, at the same time. The copies of every camera share
+    one pool of 'hilos' threads and each camera keeps at most 'hilos_por_camara' of them busy. progreso(copied,
+    total) is called with the totals of all cameras, from the worker threads. With sincronizar=True each camera
+    is synced with sincronizar_camara, and 'extraer' replaces the per-camera function (same signature as
+    extraer_archivos_camara). Once the 'cancelado' event is set no more copies start and CancelledError is
+    raised. Returns {ip: result of the per-camera function}; a camera that fails (e.g. its share cannot be listed)
+    maps to the exception it raised, and the other cameras are still extracted.
+
+- errores_extraccion(resultados)
+    Returns {ip: 'Error: message'} of the cameras that failed in extraer_archivos_camaras or
+    flujo.extraer_y_procesar.
+"""
+import hashlib
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from . import escaner, manifiesto
+from .reglas import compilar_filtro
+from .trabajos import comprobar_cancelacion
+from .transporte import (
+    CONEXION_ERROR_CREDENCIALES,
+    CONEXION_NUEVA,
+    CONEXION_REUTILIZADA,
+    CONEXION_SIN_RESPUESTA,
+    CONTRASENA_CAMARA,
+    TIEMPO_ESPERA_CONEXION,
+    TRANSPORTE_POR_DEFECTO,
+    USUARIO_CAMARA,
+    argumentos_ping,
+    conectar_smb,
+    desconectar_smb,
+    hacer_ping,
+    sesiones_smb,
+)
+
+# Conexiones simultáneas al conectar una lista de cámaras
+HILOS_CONEXION = 16
+# Copias simultáneas por cámara y en total: la extracción está limitada por la latencia de la red
+HILOS_POR_CAMARA = 4
+HILOS_EXTRACCION = 16
+# Manifiesto de la copia espejo de cada cámara y copias entre guardados del manifiesto
+NOMBRE_MANIFIESTO_SINCRONIZACION = '.sincronizacion.json'
+EXTENSION_PARCIAL = '.parcial'
+GUARDAR_CADA = 200
+TAMANO_BLOQUE = 1024 * 1024
+
+
+# Función para conectar una cámara reutilizando su sesión si ya está autenticada
+def conectar_camara(direccion_ip, usuario=USUARIO_CAMARA, contrasena=CONTRASENA_CAMARA,
+                    tiempo_espera=TIEMPO_ESPERA_CONEXION, sesiones=None, transporte=None):
+    transporte = transporte or TRANSPORTE_POR_DEFECTO
+    return transporte['conectar'](direccion_ip, usuario, contrasena, tiempo_espera, sesiones)
+
+
+# Función para conectar varias cámaras a la vez
+def conectar_camaras(direcciones, usuario=USUARIO_CAMARA, contrasena=CONTRASENA_CAMARA, hilos=HILOS_CONEXION,
+                     tiempo_espera=TIEMPO_ESPERA_CONEXION, progreso=None, cancelado=None, transporte=None):
+    transporte = transporte or TRANSPORTE_POR_DEFECTO
+    direcciones = list(dict.fromkeys(direcciones))
+    if not direcciones:
+        return {}
+    sesiones = transporte['sesiones']()
+    resultados = {}
+    if progreso is not None:
+        progreso(0, len(direcciones))
+    with ThreadPoolExecutor(max_workers=min(max(hilos, 1), len(direcciones))) as executor:
+        futuros = {executor.submit(conectar_camara, direccion_ip, usuario, contrasena, tiempo_espera,
+                                   sesiones, transporte): direccion_ip
+                   for direccion_ip in direcciones}
+        for futuro in as_completed(futuros):
+            if cancelado is not None and cancelado.is_set():
+                for pendiente in futuros:
+                    pendiente.cancel()
+                comprobar_cancelacion(cancelado)
+            resultados[futuros[futuro]] = futuro.result()
+            if progreso is not None:
+                progreso(len(resultados), len(direcciones))
+    return {direccion_ip: resultados[direccion_ip] for direccion_ip in direcciones}
+
+
+# Función para obtener la ruta del recurso compartido de una cámara
+def ruta_camara(direccion_ip):
+    return f"\\\\{direccion_ip}\\mtxuser"
+
+
+# Función para crear la carpeta de una extracción: "estación", "-", "dirección IP", "-", "fecha"
+def crear_carpeta_extraccion(carpeta_destino_padre, direccion_ip, estacion="Estacion"):
+    fecha = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    carpeta_destino = os.path.join(carpeta_destino_padre, f"{estacion}-{direccion_ip}-{fecha}")
+    os.makedirs(carpeta_destino, exist_ok=True)
+    return carpeta_destino
+
+
+# Función para copiar los archivos de una cámara según su extensión y resultado de inspección
+def extraer_archivos_camara(direccion_ip, carpeta_destino_padre, extensiones, inspeccion=None, estacion="Estacion",
+                            progreso=None, hilos=HILOS_POR_CAMARA, executor=None, cancelado=None, transporte=None):
+    transporte = transporte or TRANSPORTE_POR_DEFECTO
+    ruta_origen = transporte['ruta'](direccion_ip)
+    carpeta_destino = crear_carpeta_extraccion(carpeta_destino_padre, direccion_ip, estacion)
+
+    # Un solo listado del recurso compartido da los archivos a copiar y el total para el progreso
+    filtro = compilar_filtro(extensiones, inspeccion)
+    archivos = escaner.escanear(ruta_origen, filtro, estado=False, hilos=escaner.HILOS_ESCANEO,
+                                listar=transporte['listar'])
+    copias = [(archivo.ruta, os.path.join(carpeta_destino, archivo.nombre)) for archivo in archivos]
+
+    # Copiar archivos según la inspección seleccionada
+    copiar_archivos(copias, transporte['copiar'], progreso, hilos, executor, cancelado=cancelado)
+    return carpeta_destino
+
+
+# Función para copiar una lista de archivos con como máximo 'hilos' copias a la vez
+# al_copiar(origen, resultado) y progreso(copiados, total) se llaman con un bloqueo tomado tras cada copia correcta;
+# no se imprime nada por archivo desde los hilos, solo los errores
+# Con el evento 'cancelado' activado no se empiezan más copias y, al terminar las que están en curso, se lanza
+# CancelledError
+def copiar_archivos(copias, copiar=shutil.copy2, progreso=None, hilos=HILOS_POR_CAMARA, executor=None,
+                    al_copiar=None, cancelado=None):
+    total_archivos = len(copias)
+    copiados = 0
+    if progreso is not None:
+        progreso(copiados, total_archivos)
+
+    en_curso = threading.BoundedSemaphore(max(hilos, 1))
+    bloqueo = threading.Lock()
+
+    def copiar_archivo(origen, destino):
+        nonlocal copiados
+        try:
+            resultado = copiar(origen, destino)
+            with bloqueo:
+                copiados += 1
+                if al_copiar is not None:
+                    al_copiar(origen, resultado)
+                if progreso is not None:
+                    progreso(copiados, total_archivos)
+        except Exception as e:
+            print(f"Error al copiar el archivo {origen}: {str(e)}")
+        finally:
+            en_curso.release()
+
+    executor_propio = executor is None
+    if executor_propio:
+        executor = ThreadPoolExecutor(max_workers=max(hilos, 1))
+    try:
+        futuros = []
+        for origen, destino in copias:
+            en_curso.acquire()
+            if cancelado is not None and cancelado.is_set():
+                en_curso.release()
+                break
+            futuros.append(executor.submit(copiar_archivo, origen, destino))
+        for futuro in futuros:
+            futuro.result()
+    finally:
+        if executor_propio:
+            executor.shutdown()
+    comprobar_cancelacion(cancelado)
+    return copiados
+
+
+# Función para obtener la ruta de un archivo relativa a la carpeta de la cámara con el separador local
+# (las rutas del cliente SMB usan '\' también en Linux)
+def ruta_relativa_camara(ruta, ruta_origen):
+    partes = [parte for parte in re.split(r'[\\/]', ruta[len(ruta_origen):]) if parte]
+    return os.path.join(*partes)
+
+
+# Función para copiar un archivo a un '.parcial' y renombrarlo al terminar, opcionalmente calculando su hash
+def copiar_parcial(origen, destino, calcular_hash=False, transporte=None):
+    transporte = transporte or TRANSPORTE_POR_DEFECTO
+    ruta_parcial = destino + EXTENSION_PARCIAL
+    if not calcular_hash:
+        transporte['copiar'](origen, ruta_parcial)
+        os.replace(ruta_parcial, destino)
+        return None
+
+    resumen = hashlib.sha256()
+    with transporte['abrir'](origen) as archivo_origen, open(ruta_parcial, 'wb') as archivo_destino:
+        for bloque in iter(lambda: archivo_origen.read(TAMANO_BLOQUE), b''):
+            resumen.update(bloque)
+            archivo_destino.write(bloque)
+    estado_origen = transporte['estado'](origen)
+    os.utime(ruta_parcial, ns=(estado_origen.st_atime_ns, estado_origen.st_mtime_ns))
+    os.replace(ruta_parcial, destino)
+    return resumen.hexdigest()
+
+
+# Función para sincronizar la copia espejo de una cámara copiando solo los archivos nuevos o modificados
+def sincronizar_camara(direccion_ip, carpeta_destino_padre, extensiones, inspeccion=None, estacion="Estacion",
+                       progreso=None, hilos=HILOS_POR_CAMARA, executor=None, calcular_hash=False, cancelado=None,
+                       transporte=None):
+    transporte = transporte or TRANSPORTE_POR_DEFECTO
+    ruta_origen = transporte['ruta'](direccion_ip)
+    carpeta_espejo = os.path.join(carpeta_destino_padre, f"{estacion}-{direccion_ip}")
+    os.makedirs(carpeta_espejo, exist_ok=True)
+    ruta_manifiesto = os.path.join(carpeta_espejo, NOMBRE_MANIFIESTO_SINCRONIZACION)
+    archivos = manifiesto.cargar_manifiesto(ruta_manifiesto)
+
+    # Comparar el listado de la cámara con el manifiesto: solo se copian los archivos nuevos o modificados
+    filtro = compilar_filtro(extensiones, inspeccion)
+    copias = []
+    pendientes = {}
+    for archivo in escaner.escanear(ruta_origen, filtro, estado=True, hilos=escaner.HILOS_ESCANEO,
+                                    listar=transporte['listar']):
+        ruta_relativa = ruta_relativa_camara(archivo.ruta, ruta_origen)
+        anterior = archivos.get(ruta_relativa)
+        if anterior is not None and anterior['tamano'] == archivo.tamano and anterior['mtime'] == archivo.mtime:
+            continue
+        copias.append((archivo.ruta, os.path.join(carpeta_espejo, ruta_relativa)))
+        pendientes[archivo.ruta] = (ruta_relativa, archivo.tamano, archivo.mtime)
+
+    # Crear cada subcarpeta de la copia espejo una sola vez antes de copiar
+    for subcarpeta in {os.path.dirname(destino) for _, destino in copias}:
+        os.makedirs(subcarpeta, exist_ok=True)
+
+    # Registrar cada copia terminada y guardar el manifiesto cada GUARDAR_CADA copias para poder reanudar
+    copiados = 0
+
+    def registrar_copia(origen, resumen):
+        nonlocal copiados
+        ruta_relativa, tamano, mtime = pendientes[origen]
+        archivos[ruta_relativa] = {'tamano': tamano, 'mtime': mtime}
+        if resumen is not None:
+            archivos[ruta_relativa]['hash'] = resumen
+        copiados += 1
+        if copiados % GUARDAR_CADA == 0:
+            manifiesto.guardar_manifiesto(ruta_manifiesto, archivos)
+
+    def copiar(origen, destino):
+        return copiar_parcial(origen, destino, calcular_hash, transporte)
+
+    try:
+        copiar_archivos(copias, copiar, progreso, hilos, executor, registrar_copia, cancelado)
+    finally:
+        manifiesto.guardar_manifiesto(ruta_manifiesto, archivos)
+    return carpeta_espejo
+
+
+# Función para extraer los archivos de varias cámaras a la vez compartiendo un pool de copias
+def extraer_archivos_camaras(camaras, carpeta_destino_padre, extensiones, inspeccion=None, progreso=None,
+                             hilos_por_camara=HILOS_POR_CAMARA, hilos=HILOS_EXTRACCION, sincronizar=False, extraer=None,
+                             cancelado=None, transporte=None):
+    camaras = list(camaras)
+    if not camaras:
+        return {}
+    hilos = max(hilos, 1)
+    progreso_camaras = {}
+    bloqueo = threading.Lock()
+
+    # Sumar el progreso de todas las cámaras
+    def progreso_camara(direccion_ip):
+        def actualizar(copiados, total_archivos):
+            with bloqueo:
+                progreso_camaras[direccion_ip] = (copiados, total_archivos)
+                if progreso is not None:
+                    progreso(sum(c for c, _ in progreso_camaras.values()),
+                             sum(t for _, t in progreso_camaras.values()))
+        return actualizar
+
+    # Cada cámara ocupa como mucho 'hilos_por_camara' hilos, así caben hilos // hilos_por_camara cámaras a la vez
+    camaras_simultaneas = min(len(camaras), max(hilos // max(hilos_por_camara, 1), 1))
+    if extraer is None:
+        extraer = sincronizar_camara if sincronizar else extraer_archivos_camara
+    with ThreadPoolExecutor(max_workers=hilos) as executor_copias, \
+            ThreadPoolExecutor(max_workers=camaras_simultaneas) as executor_camaras:
+        futuros = {
+            direccion_ip: executor_camaras.submit(extraer, direccion_ip, carpeta_destino_padre,
+                                                  extensiones, inspeccion, estacion, progreso_camara(direccion_ip),
+                                                  hilos_por_camara, executor_copias, cancelado=cancelado,
+                                                  transporte=transporte)
+            for direccion_ip, estacion in camaras
+        }
+        # Un error de una cámara se guarda como su resultado y no detiene las demás; la cancelación sí
+        resultados = {}
+        for direccion_ip, futuro in futuros.items():
+            try:
+                resultados[direccion_ip] = futuro.result()
+            except CancelledError:
+                raise
+            except Exception as e:
+                resultados[direccion_ip] = e
+    return resultados
+
+
+# Función para obtener las cámaras cuya extracción ha fallado y el mensaje de su error
+def errores_extraccion(resultados):
+    return {direccion_ip: f'{type(resultado).__name__}: {resultado}'
+            for direccion_ip, resultado in resultados.items() if isinstance(resultado, Exception)}
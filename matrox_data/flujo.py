@@ -0,0 +1,152 @@
+"""
+Streaming Extraction
+====================
+
+Extraction pipeline that classifies and parses the files while they download, so the statistics workbook is
+ready when the copy ends without reading the .txt files again.
+
+The cameras are copied as in extraccion.extraer_archivos_camaras, but every file is written straight into its
+classified subfolder (see matrox_data.reglas), and the content of each .txt file that lands in a 'TXT' subfolder,
+already in memory after the copy, is put in a bounded queue. A parser thread takes the contents from the queue
+while the downloads go on, so network and CPU time overlap; when the queue is full the copies wait for the
+parser. At the end the rows of each camera are written to '<carpeta>/<carpeta>.xlsx', the same workbook that
+classifying the folder and running generar_estadisticos on it would produce.
+
+Functions:
+----------
+- copiar_y_leer(origen, destino, transporte=None)
+    Copies one file and returns its content as text, decoded from the bytes read for the copy.
+
+- extraer_y_procesar(camaras, carpeta_destino_padre, extensiones, inspeccion=None, reglas=None, progreso=None,
+                     hilos_por_camara=HILOS_POR_CAMARA, hilos=HILOS_EXTRACCION, tamano_cola=TAMANO_COLA,
+                     cancelado=None, transporte=None)
+    Extracts, classifies and parses several cameras, given as (ip, estacion) pairs, and writes their statistics
+    workbooks. Returns {ip: {'carpeta': folder, 'excel': workbook or None, 'filas': number of rows}}; a camera
+    that fails maps to the exception it raised, as in extraccion.extraer_archivos_camaras.
+    Once the 'cancelado' event is set no more copies start and CancelledError is raised.
+"""
+import io
+import os
+import queue
+import re
+import threading
+
+from . import escaner, particiones, registros
+from . import reglas as reglas_archivos
+from .analizador import analizar_registro
+from .estadisticos import ruta_excel_estadisticos
+from .extraccion import (
+    HILOS_EXTRACCION,
+    HILOS_POR_CAMARA,
+    copiar_archivos,
+    crear_carpeta_extraccion,
+    extraer_archivos_camaras,
+)
+from .transporte import TRANSPORTE_POR_DEFECTO
+
+# Contenidos de archivos .txt que pueden esperar en memoria a ser analizados
+TAMANO_COLA = 256
+FIN_COLA = None
+
+
+# Función para copiar un archivo leyéndolo una sola vez y devolver su contenido como texto
+def copiar_y_leer(origen, destino, transporte=None):
+    transporte = transporte or TRANSPORTE_POR_DEFECTO
+    with transporte['abrir'](origen) as archivo_origen:
+        datos = archivo_origen.read()
+    with open(destino, 'wb') as archivo_destino:
+        archivo_destino.write(datos)
+    estado_origen = transporte['estado'](origen)
+    os.utime(destino, ns=(estado_origen.st_atime_ns, estado_origen.st_mtime_ns))
+    # Decodificar igual que open(ruta, 'r') en leer_archivo_resultados
+    return io.TextIOWrapper(io.BytesIO(datos)).read()
+
+
+# Función para saber si una subcarpeta destino queda dentro de una carpeta 'TXT'
+def en_subcarpeta_txt(destino):
+    return destino is not None and any(parte.lower() == 'txt' for parte in re.split(r'[\\/]', destino))
+
+
+# Función para extraer, clasificar y analizar varias cámaras a la vez y generar sus estadísticos
+def extraer_y_procesar(camaras, carpeta_destino_padre, extensiones, inspeccion=None, reglas=None, progreso=None,
+                       hilos_por_camara=HILOS_POR_CAMARA, hilos=HILOS_EXTRACCION, tamano_cola=TAMANO_COLA,
+                       cancelado=None, transporte=None):
+    transporte = transporte or TRANSPORTE_POR_DEFECTO
+    if reglas is None:
+        reglas = reglas_archivos.cargar_reglas()
+    cola = queue.Queue(maxsize=tamano_cola)
+    filas = {}
+    archivos_txt = {}
+
+    # Analizar los contenidos de la cola mientras siguen las descargas
+    def analizar_cola():
+        while True:
+            elemento = cola.get()
+            if elemento is FIN_COLA:
+                return
+            direccion_ip, indice, nombre, contenido = elemento
+            try:
+                datos = analizar_registro(contenido, nombre)
+            except Exception as e:
+                print(f"Error al analizar el archivo {nombre}: {str(e)}")
+                continue
+            if datos is not None:
+                filas[direccion_ip][indice] = datos
+
+    # Misma firma que extraccion.extraer_archivos_camara, para usarla con extraer_archivos_camaras
+    def extraer_camara(direccion_ip, carpeta_destino_padre, extensiones, inspeccion=None, estacion="Estacion",
+                       progreso=None, hilos=HILOS_POR_CAMARA, executor=None, cancelado=None, transporte=None):
+        ruta_origen = transporte['ruta'](direccion_ip)
+        carpeta_destino = crear_carpeta_extraccion(carpeta_destino_padre, direccion_ip, estacion)
+
+        # Cada archivo se copia directamente a su subcarpeta clasificada
+        filtro = reglas_archivos.compilar_filtro(extensiones, inspeccion)
+        copias = []
+        indices = {}
+        for archivo in escaner.escanear(ruta_origen, filtro, estado=False, hilos=escaner.HILOS_ESCANEO,
+                                        listar=transporte['listar']):
+            destino = reglas_archivos.destino_archivo(reglas, archivo.nombre)
+            carpeta = carpeta_destino if destino is None else os.path.join(carpeta_destino, destino)
+            if archivo.nombre.endswith('.txt') and en_subcarpeta_txt(destino):
+                indices[archivo.ruta] = (len(copias), archivo.nombre)
+            copias.append((archivo.ruta, os.path.join(carpeta, archivo.nombre)))
+        for subcarpeta in {os.path.dirname(destino) for _, destino in copias}:
+            os.makedirs(subcarpeta, exist_ok=True)
+        filas[direccion_ip] = {}
+        archivos_txt[direccion_ip] = len(indices)
+
+        def copiar(origen, destino):
+            if origen not in indices:
+                return transporte['copiar'](origen, destino)
+            contenido = copiar_y_leer(origen, destino, transporte)
+            indice, nombre = indices[origen]
+            # Si el análisis va por detrás, la copia espera a que haya sitio en la cola
+            cola.put((direccion_ip, indice, nombre, contenido))
+            return destino
+
+        copiar_archivos(copias, copiar, progreso, hilos, executor, cancelado=cancelado)
+        return carpeta_destino
+
+    hilo_analisis = threading.Thread(target=analizar_cola, daemon=True)
+    hilo_analisis.start()
+    try:
+        carpetas = extraer_archivos_camaras(camaras, carpeta_destino_padre, extensiones, inspeccion, progreso,
+                                            hilos_por_camara, hilos, extraer=extraer_camara, cancelado=cancelado,
+                                            transporte=transporte)
+    finally:
+        cola.put(FIN_COLA)
+        hilo_analisis.join()
+
+    # Las filas de cada cámara se escriben en el orden del listado de la cámara
+    resultados = {}
+    for direccion_ip, carpeta_destino in carpetas.items():
+        if isinstance(carpeta_destino, Exception):
+            resultados[direccion_ip] = carpeta_destino
+            continue
+        filas_camara = filas.get(direccion_ip, {})
+        ruta_excel = None
+        if archivos_txt.get(direccion_ip):
+            df = registros.tabla_registros([filas_camara[indice] for indice in sorted(filas_camara)])
+            ruta_excel = particiones.guardar_particiones(df, ruta_excel_estadisticos(carpeta_destino))
+        resultados[direccion_ip] = {'carpeta': carpeta_destino, 'excel': ruta_excel, 'filas': len(filas_camara)}
+    return resultados
@@ -0,0 +1,51 @@
+"""
+Statistics Manifest
+===================
+
+Persistent per-file manifest used by the incremental statistics mode.
+
+The manifest is a JSON file saved next to the statistics workbook. For every parsed .txt file it keeps the path
+relative to the inspection folder, its size, its modification time and the parsed row (null if the file was
+incomplete), so later runs only parse new or changed files.
+
+Functions:
+----------
+- ruta_manifiesto(ruta_excel)
+    Returns the manifest path that belongs to a statistics workbook.
+
+- cargar_manifiesto(ruta)
+    Loads a manifest, or returns an empty one if it does not exist or is not valid.
+
+- guardar_manifiesto(ruta, archivos)
+    Writes the manifest atomically.
+"""
+import json
+import os
+
+VERSION_MANIFIESTO = 1
+
+
+# Función para obtener la ruta del manifiesto asociado a un archivo de estadísticos
+def ruta_manifiesto(ruta_excel):
+    return os.path.splitext(ruta_excel)[0] + '.manifiesto.json'
+
+
+# Función para cargar el manifiesto; si no existe o no es válido se empieza de cero
+def cargar_manifiesto(ruta):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as file:
+            contenido = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(contenido, dict) or contenido.get('version') != VERSION_MANIFIESTO:
+        return {}
+    return contenido.get('archivos', {})
+
+
+# Función para guardar el manifiesto sin dejarlo a medias si el proceso se interrumpe
+def guardar_manifiesto(ruta, archivos):
+    ruta_temporal = ruta + '.tmp'
+    with open(ruta_temporal, 'w', encoding='utf-8') as file:
+        json.dump({'version': VERSION_MANIFIESTO, 'archivos': archivos}, file, ensure_ascii=False)
+    os.replace(ruta_temporal, ruta)
+
@@ -0,0 +1,180 @@
+"""
+Connection Monitor
+==================
+
+Single monitor of the connection to every camera in use.
+
+One scheduler thread runs an asyncio loop that checks all the cameras at the same time every 'intervalo' seconds,
+by default with a TCP connection to the SMB port (445), which needs no extra process, or with ping processes
+started concurrently. The monitor keeps a status table with the state, the last latency and a short latency
+history of each camera, and puts every state change in a thread-safe queue that the GUI reads from its own
+thread (with Tk's after), so no widget is touched from the monitor thread.
+
+Functions:
+----------
+- sondear_tcp(direccion_ip, puerto=PUERTO_SMB, tiempo_espera=TIEMPO_ESPERA)
+    Returns the time in seconds to open a TCP connection to the camera, or None if it does not answer.
+
+- iniciar_monitor(direcciones=(), intervalo=INTERVALO_MONITOR, metodo='tcp', puerto=PUERTO_SMB, tiempo_espera=TIEMPO_ESPERA)
+    Starts the monitor thread and returns the monitor dict. metodo is 'tcp' or 'ping'.
+
+- agregar_camara(monitor, direccion_ip) / quitar_camara(monitor, direccion_ip)
+    Adds or removes a camera from the monitor.
+
+- estado_camaras(monitor)
+    Returns a copy of the status table: {ip: {'estado', 'latencia', 'historial', 'cambio'}}.
+
+- leer_cambios(monitor)
+    Returns the (ip, previous state, new state) changes queued since the last call.
+
+- detener_monitor(monitor)
+    Stops the monitor thread.
+"""
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+
+from .transporte import argumentos_ping
+
+PUERTO_SMB = 445
+INTERVALO_MONITOR = 5
+TIEMPO_ESPERA = 2.0
+# Latencias guardadas por cámara
+MAX_HISTORIAL = 20
+METODOS_MONITOR = ('tcp', 'ping')
+
+CONECTADO = 'conectado'
+DESCONECTADO = 'desconectado'
+DESCONOCIDO = 'desconocido'
+
+
+# Función para medir el tiempo de conexión TCP a un puerto de la cámara
+async def sondear_tcp_async(direccion_ip, puerto=PUERTO_SMB, tiempo_espera=TIEMPO_ESPERA):
+    inicio = time.perf_counter()
+    try:
+        _, escritor = await asyncio.wait_for(asyncio.open_connection(direccion_ip, puerto), tiempo_espera)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    latencia = time.perf_counter() - inicio
+    escritor.close()
+    try:
+        await escritor.wait_closed()
+    except OSError:
+        pass
+    return latencia
+
+
+# Función para medir el tiempo de respuesta de un ping a la cámara
+async def sondear_ping_async(direccion_ip, puerto=PUERTO_SMB, tiempo_espera=TIEMPO_ESPERA):
+    inicio = time.perf_counter()
+    try:
+        proceso = await asyncio.create_subprocess_exec(*argumentos_ping(direccion_ip),
+                                                       stdout=asyncio.subprocess.DEVNULL,
+                                                       stderr=asyncio.subprocess.DEVNULL)
+    except OSError:
+        return None
+    try:
+        codigo = await asyncio.wait_for(proceso.wait(), tiempo_espera)
+    except asyncio.TimeoutError:
+        proceso.kill()
+        await proceso.wait()
+        return None
+    return time.perf_counter() - inicio if codigo == 0 else None
+
+
+# Función para comprobar una cámara con una conexión TCP fuera del monitor
+def sondear_tcp(direccion_ip, puerto=PUERTO_SMB, tiempo_espera=TIEMPO_ESPERA):
+    return asyncio.run(sondear_tcp_async(direccion_ip, puerto, tiempo_espera))
+
+
+# Función para comprobar todas las cámaras a la vez
+async def sondear_camaras(direcciones, metodo='tcp', puerto=PUERTO_SMB, tiempo_espera=TIEMPO_ESPERA):
+    sondear = sondear_tcp_async if metodo == 'tcp' else sondear_ping_async
+    latencias = await asyncio.gather(*(sondear(direccion_ip, puerto, tiempo_espera) for direccion_ip in direcciones))
+    return dict(zip(direcciones, latencias))
+
+
+# Función para actualizar la tabla de estados y encolar los cambios
+def registrar_latencias(monitor, latencias):
+    with monitor['bloqueo']:
+        for direccion_ip, latencia in latencias.items():
+            camara = monitor['tabla'].get(direccion_ip)
+            if camara is None:
+                # La cámara se quitó mientras se comprobaba
+                continue
+            estado = DESCONECTADO if latencia is None else CONECTADO
+            camara['latencia'] = latencia
+            camara['historial'].append(latencia)
+            if estado != camara['estado']:
+                monitor['cambios'].put((direccion_ip, camara['estado'], estado))
+                camara['estado'] = estado
+                camara['cambio'] = time.time()
+
+
+# Función para iniciar el monitor de conexión en un único hilo
+def iniciar_monitor(direcciones=(), intervalo=INTERVALO_MONITOR, metodo='tcp', puerto=PUERTO_SMB,
+                    tiempo_espera=TIEMPO_ESPERA):
+    if metodo not in METODOS_MONITOR:
+        raise ValueError(f"Unknown monitor method '{metodo}', use one of {METODOS_MONITOR}.")
+    monitor = {
+        'tabla': {},
+        'cambios': queue.Queue(),
+        'bloqueo': threading.Lock(),
+        'detener': threading.Event(),
+    }
+    for direccion_ip in direcciones:
+        agregar_camara(monitor, direccion_ip)
+
+    def ejecutar():
+        while not monitor['detener'].is_set():
+            with monitor['bloqueo']:
+                direcciones_actuales = list(monitor['tabla'])
+            if direcciones_actuales:
+                registrar_latencias(monitor, asyncio.run(
+                    sondear_camaras(direcciones_actuales, metodo, puerto, tiempo_espera)))
+            monitor['detener'].wait(intervalo)
+
+    monitor['hilo'] = threading.Thread(target=ejecutar, daemon=True)
+    monitor['hilo'].start()
+    return monitor
+
+
+# Función para añadir una cámara al monitor
+def agregar_camara(monitor, direccion_ip):
+    with monitor['bloqueo']:
+        monitor['tabla'].setdefault(direccion_ip, {
+            'estado': DESCONOCIDO,
+            'latencia': None,
+            'historial': deque(maxlen=MAX_HISTORIAL),
+            'cambio': time.time(),
+        })
+
+
+# Función para quitar una cámara del monitor
+def quitar_camara(monitor, direccion_ip):
+    with monitor['bloqueo']:
+        monitor['tabla'].pop(direccion_ip, None)
+
+
+# Función para obtener una copia de la tabla de estados
+def estado_camaras(monitor):
+    with monitor['bloqueo']:
+        return {direccion_ip: dict(camara, historial=list(camara['historial']))
+                for direccion_ip, camara in monitor['tabla'].items()}
+
+
+# Función para leer los cambios de estado pendientes
+def leer_cambios(monitor):
+    cambios = []
+    while True:
+        try:
+            cambios.append(monitor['cambios'].get_nowait())
+        except queue.Empty:
+            return cambios
+
+
+# Función para detener el monitor
+def detener_monitor(monitor):
+    monitor['detener'].set()
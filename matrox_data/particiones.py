@@ -0,0 +1,143 @@
+"""
+Output Sharding
+===============
+
+Splits the statistics output so it never exceeds Excel's row limit.
+
+The rows can be split by camera (the first 19 characters of the file name), by day of Image Time Stamp or by a
+fixed number of rows. Any part that is still larger than the row limit is split again into numbered parts. The
+parts are written as sheets of one workbook, as separate workbooks, or as gzipped CSV files; separate files can
+be written in parallel.
+
+Functions:
+----------
+- convertir_tiempos(tiempos, formato=FORMATO_TIEMPO)
+    Returns the Image Time Stamp texts as naive datetimes with the clock time written by the camera (a UTC offset
+    is dropped, not applied). Every value is parsed with the same 'formato' (ISO 8601 by default, or a strftime
+    format such as '%d/%m/%Y %H:%M'), and NaT is returned where a time stamp does not match it.
+
+- particionar(df, por=None, filas=MAX_FILAS_EXCEL, formato_tiempo=FORMATO_TIEMPO)
+    Returns a list of (name, DataFrame) parts.
+
+- guardar_particiones(df, ruta_excel, por=None, salida='hojas', filas=MAX_FILAS_EXCEL, procesos=1,
+                      formato_tiempo=FORMATO_TIEMPO)
+    Writes the parts and returns the workbook path ('hojas') or the folder holding the parts ('libros', 'csv').
+"""
+import os
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .excel import MAX_FILAS_EXCEL, escribir_hoja_estadisticos, guardar_excel_estadisticos, motor_excel
+
+CRITERIOS_PARTICION = ('camara', 'dia', 'filas')
+SALIDAS_PARTICION = ('hojas', 'libros', 'csv')
+PATRON_CARACTERES_INVALIDOS = re.compile(r'[\[\]:*?/\\]')
+MAX_LONGITUD_HOJA = 31
+# Formato de Image Time Stamp: 'ISO8601' acepta fecha y hora ISO con o sin 'T', fracciones de segundo y desfase UTC.
+# Se usa el mismo para todos los valores, así '05/01/2024' nunca se lee como 1 de mayo en una fila y 5 de enero en otra
+FORMATO_TIEMPO = 'ISO8601'
+
+
+# Función para obtener un nombre válido de hoja de Excel y de archivo
+def nombre_particion_valido(nombre):
+    nombre = PATRON_CARACTERES_INVALIDOS.sub('_', str(nombre)).strip() or 'Sheet'
+    return nombre[:MAX_LONGITUD_HOJA]
+
+
+# Función para convertir una marca de tiempo con o sin zona horaria a la hora escrita por la cámara
+def fecha_local(tiempo, formato=FORMATO_TIEMPO):
+    fecha = pd.to_datetime(tiempo, errors='coerce', format=formato)
+    if pd.isna(fecha):
+        return pd.NaT
+    return fecha.tz_localize(None) if fecha.tzinfo is not None else fecha
+
+
+# Función para convertir Image Time Stamp a fechas sin zona horaria con un único formato; NaT si no coincide
+def convertir_tiempos(tiempos, formato=FORMATO_TIEMPO):
+    tiempos = pd.Series(tiempos, dtype='object')
+    try:
+        # Versiones anteriores de pandas avisan (en lugar de fallar) y devuelven objetos con desfases distintos
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            fechas = pd.to_datetime(tiempos, errors='coerce', format=formato)
+    except ValueError:
+        fechas = None
+    if fechas is None or not pd.api.types.is_datetime64_any_dtype(fechas):
+        # Marcas de tiempo con desfases UTC distintos (p. ej. en un cambio de hora): se convierten una a una
+        return pd.to_datetime(tiempos.map(lambda tiempo: fecha_local(tiempo, formato)))
+    if fechas.dt.tz is not None:
+        fechas = fechas.dt.tz_localize(None)
+    return fechas
+
+
+# Función para dividir un DataFrame en trozos de como máximo 'filas' filas, numerados desde 1
+def dividir_por_filas(nombre, df, filas, separador='_'):
+    if len(df) <= filas:
+        return [(nombre, df)]
+    return [(f'{nombre}{separador}{numero}', df.iloc[inicio:inicio + filas])
+            for numero, inicio in enumerate(range(0, len(df), filas), start=1)]
+
+
+# Función para dividir el DataFrame de estadísticos según el criterio indicado
+def particionar(df, por=None, filas=MAX_FILAS_EXCEL, formato_tiempo=FORMATO_TIEMPO):
+    if por not in (None,) + CRITERIOS_PARTICION:
+        raise ValueError(f"Unknown partition criterion '{por}', use one of {CRITERIOS_PARTICION}.")
+    filas = min(filas, MAX_FILAS_EXCEL)
+    if df.empty:
+        return [('Sheet1', df)]
+
+    if por == 'camara':
+        grupos = df.groupby(df['Archivo'].str[:19], sort=True)
+    elif por == 'dia':
+        dias = convertir_tiempos(df['Image Time Stamp'], formato_tiempo).dt.strftime('%Y-%m-%d')
+        grupos = df.groupby(dias.fillna('sin_fecha'), sort=True)
+    elif len(df) <= filas:
+        return [('Sheet1', df)]
+    else:
+        return dividir_por_filas('Sheet', df, filas, separador='')
+
+    partes = []
+    for nombre, grupo in grupos:
+        partes.extend(dividir_por_filas(nombre, grupo, filas))
+    return partes
+
+
+# Función para escribir una parte como libro de Excel o CSV comprimido (se ejecuta en los procesos del pool)
+def escribir_parte(df, ruta):
+    if ruta.endswith('.csv.gz'):
+        df.to_csv(ruta, index=False, compression='gzip')
+        return ruta
+    return guardar_excel_estadisticos(df, ruta)
+
+
+# Función para guardar las particiones como hojas de un libro, como libros separados o como CSV comprimidos
+def guardar_particiones(df, ruta_excel, por=None, salida='hojas', filas=MAX_FILAS_EXCEL, procesos=1,
+                        formato_tiempo=FORMATO_TIEMPO):
+    if salida not in SALIDAS_PARTICION:
+        raise ValueError(f"Unknown output '{salida}', use one of {SALIDAS_PARTICION}.")
+    partes = [(nombre_particion_valido(nombre), parte) for nombre, parte in particionar(df, por, filas, formato_tiempo)]
+
+    if salida == 'hojas':
+        with pd.ExcelWriter(ruta_excel, engine=motor_excel()) as writer:
+            for nombre, parte in partes:
+                escribir_hoja_estadisticos(writer, parte, nombre)
+        return ruta_excel
+
+    carpeta_partes = os.path.splitext(ruta_excel)[0] + '_partes'
+    os.makedirs(carpeta_partes, exist_ok=True)
+    extension = '.csv.gz' if salida == 'csv' else '.xlsx'
+    rutas = [os.path.join(carpeta_partes, nombre + extension) for nombre, _ in partes]
+    dataframes = [parte for _, parte in partes]
+
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    if procesos <= 1 or len(partes) == 1:
+        for parte, ruta in zip(dataframes, rutas):
+            escribir_parte(parte, ruta)
+    else:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(partes))) as executor:
+            list(executor.map(escribir_parte, dataframes, rutas))
+    return carpeta_partes
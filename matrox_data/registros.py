@@ -0,0 +1,89 @@
+"""
+Compact Result Tables
+=====================
+
+Builds the statistics DataFrame from the compact records of the parser (see analizador.Registro) with the smallest
+column types that hold the values, instead of from one dict per file with object and float64 columns:
+
+- Camara and Recipe ID are categorical, so each camera name and recipe is stored once;
+- Exposure Time and the 'Blob N Threshold/Min/Max/Area' values are nullable Int16 or Int32 (Int64 only if a value
+  needs it), with missing values as <NA> instead of turning the column into float64;
+- Image Time Stamp keeps the text of the file, so the workbook shows it exactly as the camera wrote it.
+
+The blob columns are filled column by column from preallocated arrays, in the same order as a DataFrame built
+from the dict rows.
+
+Functions:
+----------
+- tabla_registros(registros)
+    Returns the compact statistics DataFrame of a list of Registro.
+
+- compactar_tipos(df)
+    Returns a copy of a statistics DataFrame with the compact column types.
+"""
+import numpy as np
+import pandas as pd
+
+from .cache_columnar import PATRON_COLUMNA_BLOB
+
+TIPOS_ENTEROS = ('Int16', 'Int32', 'Int64')
+COLUMNAS_CATEGORIA = ('Camara', 'Recipe ID')
+CAMPOS_BLOB = ('Threshold', 'Min', 'Max', 'Area')
+
+
+# Función para elegir el tipo entero con signo más pequeño que contiene todos los valores
+def tipo_entero_minimo(valores):
+    if valores.isna().all():
+        return TIPOS_ENTEROS[0]
+    minimo, maximo = valores.min(), valores.max()
+    for tipo in TIPOS_ENTEROS:
+        limites = np.iinfo(tipo.lower())
+        if limites.min <= minimo and maximo <= limites.max:
+            return tipo
+    return TIPOS_ENTEROS[-1]
+
+
+# Función para dar a las columnas de estadísticos los tipos más compactos
+def compactar_tipos(df):
+    df = df.copy()
+    for columna in df.columns:
+        if columna == 'Exposure Time' or PATRON_COLUMNA_BLOB.fullmatch(columna):
+            valores = pd.to_numeric(df[columna], errors='coerce').astype('Int64')
+            df[columna] = valores.astype(tipo_entero_minimo(valores))
+        elif columna == 'Recipe ID':
+            df[columna] = pd.to_numeric(df[columna], errors='coerce').astype('Int64').astype('category')
+        elif columna in COLUMNAS_CATEGORIA:
+            df[columna] = df[columna].astype('category')
+    return df
+
+
+# Función para construir el DataFrame de estadísticos a partir de los registros compactos
+def tabla_registros(registros):
+    if not registros:
+        return pd.DataFrame()
+    filas = len(registros)
+    archivos = [registro.archivo for registro in registros]
+    columnas = {
+        'Camara': [archivo[:19] for archivo in archivos],
+        'Archivo': archivos,
+        'Recipe ID': [registro.recipe_id for registro in registros],
+        'Exposure Time': [registro.exposure_time for registro in registros],
+        'Image Time Stamp': [registro.image_time_stamp for registro in registros],
+    }
+
+    # Por cada blob, las filas donde está activo y sus valores; se copian de una vez a una matriz (filas x campos)
+    # que empieza vacía (NaN) para los archivos donde el blob no está activo
+    blobs = {}
+    for fila, registro in enumerate(registros):
+        for blob in registro.blobs:
+            filas_blob = blobs.get(blob[0])
+            if filas_blob is None:
+                filas_blob = blobs[blob[0]] = ([], [])
+            filas_blob[0].append(fila)
+            filas_blob[1].append(blob[1:])
+    for numero_blob, (posiciones, valores_blob) in blobs.items():
+        valores = np.full((filas, len(CAMPOS_BLOB)), np.nan)
+        valores[posiciones] = np.array(valores_blob, dtype=np.float64)
+        for indice, campo in enumerate(CAMPOS_BLOB):
+            columnas[f'Blob {numero_blob} {campo}'] = pd.array(valores[:, indice], dtype='Int64')
+    return compactar_tipos(pd.DataFrame(columnas))
@@ -0,0 +1,135 @@
+"""
+File Rules
+==========
+
+Configurable rules that decide where each file is classified and which files are extracted from the cameras.
+
+The rules are loaded from a JSON file such as:
+
+    {
+        "reglas": [
+            {"extensiones": ["png", "jpg", "bmp"], "patron": "(?i)_(?P<resultado>pass|fail)", "destino": "{extension}/{resultado}"},
+            {"extensiones": ["txt", "csv", "mim"], "destino": "{extension}"}
+        ]
+    }
+
+Each rule has a set of extensions, an optional regular expression the file name must match and a destination
+template relative to the folder of the file. Templates can use {extension}, {camara} (first 19 characters of the
+name), {resultado} (Pass/Fail), {fecha} (YYYY-MM-DD or YYYYMMDD found in the name) and the named groups of the
+rule pattern. The first matching rule wins. The rules are compiled once into a table indexed by extension, so
+each file name is resolved with one dictionary lookup regardless of how many rules there are.
+
+Functions:
+----------
+- cargar_reglas(ruta=None)
+    Loads and compiles the rules of a JSON file, or the default rules if ruta is None.
+
+- compilar_reglas(configuracion)
+    Compiles a rules dict ({"reglas": [...]}) into the lookup table used by destino_archivo.
+
+- destino_archivo(reglas, nombre)
+    Returns the destination subfolder of a file name, or None if no rule applies.
+
+- compilar_filtro(extensiones, inspeccion=None)
+    Returns a predicate that tells whether a file name has one of the extensions and contains the inspection
+    result (e.g. 'Pass'), evaluated with a set lookup and a precompiled expression.
+"""
+import json
+import re
+import string
+
+REGLAS_POR_DEFECTO = {
+    'reglas': [
+        {'extensiones': ['png', 'jpg', 'txt', 'bmp', 'mim', 'csv'], 'destino': '{extension}'},
+    ]
+}
+PATRON_RESULTADO = re.compile(r'(?i)(pass|fail)')
+PATRON_FECHA = re.compile(r'(\d{4}-\d{2}-\d{2}|\d{8})')
+
+
+# Función para obtener la extensión de un nombre de archivo en minúsculas y sin el punto
+def extension_archivo(nombre):
+    _, punto, extension = nombre.rpartition('.')
+    return extension.lower() if punto else ''
+
+
+# Función para compilar la configuración de reglas en una tabla indexada por extensión
+def compilar_reglas(configuracion):
+    por_extension = {}
+    carpetas_destino = set()
+    for numero, regla in enumerate(configuracion.get('reglas', []), start=1):
+        extensiones = [extension.lower().lstrip('.') for extension in regla.get('extensiones', [])]
+        if not extensiones:
+            raise ValueError(f"Rule {numero} has no 'extensiones'.")
+        destino = regla.get('destino', '{extension}')
+        campos = {campo for _, campo, _, _ in string.Formatter().parse(destino) if campo}
+        compilada = {
+            'patron': re.compile(regla['patron']) if regla.get('patron') else None,
+            'destino': destino,
+            'campos': campos,
+        }
+        for extension in extensiones:
+            por_extension.setdefault(extension, []).append(compilada)
+
+        # Carpetas que ya son resultado de clasificar y que no hay que volver a recorrer
+        primera_carpeta = re.split(r'[\\/]', destino)[0]
+        if primera_carpeta == '{extension}':
+            carpetas_destino.update(extensiones)
+        elif '{' not in primera_carpeta:
+            carpetas_destino.add(primera_carpeta.lower())
+    return {'por_extension': por_extension, 'carpetas_destino': carpetas_destino}
+
+
+# Función para cargar las reglas de un archivo JSON (o las reglas por defecto)
+def cargar_reglas(ruta=None):
+    if ruta is None:
+        return compilar_reglas(REGLAS_POR_DEFECTO)
+    with open(ruta, 'r', encoding='utf-8') as file:
+        return compilar_reglas(json.load(file))
+
+
+# Función para obtener la subcarpeta destino de un archivo según las reglas
+def destino_archivo(reglas, nombre):
+    extension = extension_archivo(nombre)
+    candidatas = reglas['por_extension'].get(extension)
+    if not candidatas:
+        return None
+    for regla in candidatas:
+        grupos = {}
+        if regla['patron'] is not None:
+            coincidencia = regla['patron'].search(nombre)
+            if coincidencia is None:
+                continue
+            grupos = {clave: valor for clave, valor in coincidencia.groupdict().items() if valor is not None}
+
+        campos = regla['campos']
+        if not campos:
+            return regla['destino']
+        valores = {'extension': extension}
+        if 'camara' in campos:
+            valores['camara'] = nombre[:19]
+        if 'resultado' in campos and 'resultado' not in grupos:
+            coincidencia = PATRON_RESULTADO.search(nombre)
+            valores['resultado'] = coincidencia[1].capitalize() if coincidencia else 'Sin_resultado'
+        if 'fecha' in campos and 'fecha' not in grupos:
+            coincidencia = PATRON_FECHA.search(nombre)
+            valores['fecha'] = coincidencia[1] if coincidencia else 'Sin_fecha'
+        valores.update(grupos)
+        try:
+            return regla['destino'].format(**valores)
+        except KeyError:
+            continue
+    return None
+
+
+# Función para compilar el filtro de archivos a extraer según extensión y resultado de la inspección
+def compilar_filtro(extensiones, inspeccion=None):
+    extensiones = frozenset(extension.lower().lstrip('.') for extension in extensiones)
+    patron_inspeccion = re.compile(re.escape(inspeccion), re.IGNORECASE) if inspeccion else None
+
+    def filtro(nombre):
+        if extension_archivo(nombre) not in extensiones:
+            return False
+        return patron_inspeccion is None or patron_inspeccion.search(nombre) is not None
+
+    return filtro
@@ -0,0 +1,194 @@
+"""
+Time Trends
+===========
+
+Time-indexed view of the blob statistics and rolling drift detection per camera.
+
+'Image Time Stamp' is parsed once into a DatetimeIndex with the clock time written by the camera, using one format
+for every row (see matrox_data.particiones.convertir_tiempos; rows whose time stamp does not match it are left out), the rows are ordered by camera and time, and the metrics are computed per
+camera:
+
+- moving average and standard deviation over a time window ('ventana', e.g. '15min');
+- EWMA E = (1 - alfa) * E + alfa * x started at mu0, flagged when it leaves the control limits
+  mu0 +/- L * sigma0 * sqrt(alfa / (2 - alfa) * (1 - (1 - alfa)^2i)) of the i-th value of the camera;
+- two-sided CUSUM S = max(0, S + z - k) in sigma units, flagged when it goes above h and started again at zero
+  after each alarm, so an alarm marks the image where the drift was detected and not every image after it.
+
+mu0 and sigma0 are the mean and standard deviation of the first 'referencia' images of each camera. By default
+the metrics are computed for Exposure Time and every 'Blob N Area' column; the images where a column has no
+value (e.g. a blob that is not enabled) are skipped by its EWMA and CUSUM and are never flagged.
+
+Functions:
+----------
+- indexar_por_tiempo(df, formato_tiempo=FORMATO_TIEMPO)
+    Returns the rows with a valid Image Time Stamp, indexed by it and sorted by camera and time.
+
+- calcular_tendencias(df, columnas=None, ventana=VENTANA, alfa=ALFA_EWMA, limite_ewma=LIMITE_EWMA, k=K_CUSUM,
+                      h=H_CUSUM, referencia=REFERENCIA, formato_tiempo=FORMATO_TIEMPO)
+    Returns the time-indexed DataFrame with Camara, Archivo, the columns and, for each of them, 'Media movil',
+    'Desv movil', 'EWMA', 'CUSUM+', 'CUSUM-' and 'Deriva' (True when the EWMA or CUSUM flags it).
+
+- resumir_derivas(tendencias)
+    Returns one row per camera and column with the number of images, the number of drift events (runs of
+    consecutive flagged images) and the time of the first and last event.
+
+- ruta_tendencias(ruta_excel)
+    Returns the trends workbook path, '<workbook>_tendencias.xlsx'.
+
+- guardar_tendencias(df, ruta_excel, **opciones)
+    Computes the trends and writes the 'Tendencias' and 'Derivas' sheets. Returns the drift summary.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .excel import MAX_FILAS_EXCEL, escribir_hoja_estadisticos, motor_excel
+from .particiones import FORMATO_TIEMPO, convertir_tiempos, dividir_por_filas
+
+VENTANA = '15min'
+ALFA_EWMA = 0.2
+LIMITE_EWMA = 3.0
+# CUSUM en unidades de sigma: holgura k y umbral de decisión h
+K_CUSUM = 0.5
+H_CUSUM = 5.0
+# Imágenes iniciales de cada cámara que fijan la media y la desviación de referencia
+REFERENCIA = 30
+COLUMNA_TIEMPO = 'Image Time Stamp'
+
+
+# Función para indexar los resultados por Image Time Stamp, ordenados por cámara y tiempo
+def indexar_por_tiempo(df, formato_tiempo=FORMATO_TIEMPO):
+    if df.empty:
+        return pd.DataFrame(columns=['Camara', 'Archivo'], index=pd.DatetimeIndex([], name=COLUMNA_TIEMPO))
+    tiempos = convertir_tiempos(df[COLUMNA_TIEMPO], formato_tiempo)
+    datos = df.assign(**{COLUMNA_TIEMPO: tiempos})
+    if 'Camara' not in datos.columns:
+        datos['Camara'] = datos['Archivo'].str[:19]
+    datos = datos[tiempos.notna()].sort_values(['Camara', COLUMNA_TIEMPO], kind='stable')
+    return datos.set_index(COLUMNA_TIEMPO)
+
+
+# Función para obtener las columnas por defecto: Exposure Time y el área de cada blob
+def columnas_tendencia(df):
+    return [columna for columna in df.columns
+            if columna == 'Exposure Time' or (columna.startswith('Blob ') and columna.endswith(' Area'))]
+
+
+# Función para calcular S = max(0, S + incremento) de cada columna, que vuelve a cero al empezar cada cámara y
+# después de cada alarma (S > h); el reinicio depende del valor anterior, así que se recorre fila a fila
+def cusum_por_grupo(incrementos, inicios, h):
+    cusum = np.empty(incrementos.shape)
+    for indice in range(incrementos.shape[1]):
+        estadistico = 0.0
+        valores = []
+        for incremento, inicio in zip(incrementos[:, indice].tolist(), inicios.tolist()):
+            if inicio:
+                estadistico = 0.0
+            estadistico = max(0.0, estadistico + incremento)
+            valores.append(estadistico)
+            if estadistico > h:
+                estadistico = 0.0
+        cusum[:, indice] = valores
+    return cusum
+
+
+# Función para calcular las medias y desviaciones móviles, el EWMA y el CUSUM de cada cámara
+def calcular_tendencias(df, columnas=None, ventana=VENTANA, alfa=ALFA_EWMA, limite_ewma=LIMITE_EWMA, k=K_CUSUM,
+                        h=H_CUSUM, referencia=REFERENCIA, formato_tiempo=FORMATO_TIEMPO):
+    datos = indexar_por_tiempo(df, formato_tiempo)
+    if columnas is None:
+        columnas = columnas_tendencia(datos)
+    valores = datos[columnas].apply(pd.to_numeric, errors='coerce').astype('float64')
+    camaras = datos['Camara']
+    resultado = datos[['Camara', 'Archivo']].copy()
+    if datos.empty:
+        return resultado
+
+    # Las filas ya están ordenadas por cámara y tiempo, así cada resultado agrupado se alinea por posición
+    # (se agrupa por el array de cámaras porque el índice de tiempos puede tener duplicados)
+    grupos = camaras.to_numpy()
+    agrupados = valores.groupby(grupos, sort=False, observed=True)
+    moviles = agrupados.rolling(ventana)
+    media_movil = moviles.mean().to_numpy()
+    desviacion_movil = moviles.std().to_numpy()
+
+    # Referencia de cada cámara: sus primeras 'referencia' imágenes
+    posiciones = agrupados.cumcount().to_numpy()
+    iniciales = posiciones < referencia
+    referencias = valores[iniciales].groupby(grupos[iniciales], sort=False, observed=True)
+    media_referencia = referencias.mean().reindex(grupos).to_numpy()
+    desviacion_referencia = referencias.std().reindex(grupos).to_numpy()
+    desviacion_referencia = np.where(desviacion_referencia > 0, desviacion_referencia, np.nan)
+
+    # EWMA empezando en mu0: con adjust=False pandas empieza en el primer valor, así que el primer valor de cada
+    # cámara se escala por alfa para que E1 = mu0 + alfa * (x1 - mu0)
+    presentes = valores.notna()
+    observadas = presentes.groupby(grupos, sort=False, observed=True).cumsum().to_numpy()
+    desviaciones = valores.to_numpy() - media_referencia
+    desviaciones_ewma = pd.DataFrame(np.where(observadas == 1, alfa * desviaciones, desviaciones), index=valores.index,
+                                  columns=columnas)
+    ewma = media_referencia + desviaciones_ewma.groupby(grupos, sort=False, observed=True).ewm(
+        alpha=alfa, adjust=False, ignore_na=True).mean().to_numpy()
+
+    # Límites exactos del EWMA, más estrechos en los primeros valores de cada cámara
+    factor = np.sqrt(alfa / (2 - alfa) * (1 - (1 - alfa) ** (2 * observadas)))
+    deriva_ewma = np.abs(ewma - media_referencia) > limite_ewma * desviacion_referencia * factor
+    z = np.nan_to_num(desviaciones / desviacion_referencia)
+    presentes = presentes.to_numpy() & ~np.isnan(desviacion_referencia)
+    inicios = posiciones == 0
+    cusum_superior = cusum_por_grupo(np.where(presentes, z - k, 0.0), inicios, h)
+    cusum_inferior = cusum_por_grupo(np.where(presentes, -z - k, 0.0), inicios, h)
+    deriva = presentes & (deriva_ewma | (cusum_superior > h) | (cusum_inferior > h))
+
+    for indice, columna in enumerate(columnas):
+        resultado[columna] = valores[columna]
+        resultado[f'{columna} Media movil'] = media_movil[:, indice]
+        resultado[f'{columna} Desv movil'] = desviacion_movil[:, indice]
+        resultado[f'{columna} EWMA'] = ewma[:, indice]
+        resultado[f'{columna} CUSUM+'] = cusum_superior[:, indice]
+        resultado[f'{columna} CUSUM-'] = cusum_inferior[:, indice]
+        resultado[f'{columna} Deriva'] = deriva[:, indice]
+    return resultado
+
+
+# Función para resumir por cámara y columna las derivas: cada racha de imágenes marcadas seguidas es una deriva
+def resumir_derivas(tendencias):
+    columnas = [columna[:-len(' Deriva')] for columna in tendencias.columns if columna.endswith(' Deriva')]
+    tendencias = tendencias.reset_index()
+    camaras = tendencias['Camara']
+    grupos = tendencias.groupby('Camara', sort=True, observed=True)
+    resumenes = []
+    for columna in columnas:
+        marcadas = tendencias[f'{columna} Deriva'].astype(bool)
+        anteriores = marcadas.groupby(camaras, sort=True, observed=True).shift(fill_value=False).astype(bool)
+        inicios = marcadas & ~anteriores
+        tiempos_inicio = tendencias[COLUMNA_TIEMPO].where(inicios)
+        resumen = pd.DataFrame({
+            'Imagenes': grupos.size(),
+            'Derivas': inicios.groupby(camaras, sort=True, observed=True).sum(),
+            'Primera deriva': tiempos_inicio.groupby(camaras, sort=True, observed=True).min(),
+            'Ultima deriva': tiempos_inicio.groupby(camaras, sort=True, observed=True).max(),
+        })
+        resumen.insert(0, 'Medida', columna)
+        resumenes.append(resumen)
+    if not resumenes:
+        return pd.DataFrame(columns=['Camara', 'Medida', 'Imagenes', 'Derivas', 'Primera deriva', 'Ultima deriva'])
+    return pd.concat(resumenes).rename_axis('Camara').reset_index()
+
+
+# Función para obtener la ruta del libro de tendencias: '<libro>_tendencias.xlsx'
+def ruta_tendencias(ruta_excel):
+    return os.path.splitext(ruta_excel)[0] + '_tendencias.xlsx'
+
+
+# Función para calcular las tendencias y escribirlas junto con el resumen de derivas en un libro aparte
+def guardar_tendencias(df, ruta_excel, **opciones):
+    tendencias = calcular_tendencias(df, **opciones)
+    derivas = resumir_derivas(tendencias)
+    with pd.ExcelWriter(ruta_excel, engine=motor_excel()) as writer:
+        escribir_hoja_estadisticos(writer, derivas, 'Derivas', resaltar_vacios=False)
+        # Si no caben en una hoja, las tendencias se reparten en varias
+        for nombre, parte in dividir_por_filas('Tendencias', tendencias.reset_index(), MAX_FILAS_EXCEL):
+            escribir_hoja_estadisticos(writer, parte, nombre, resaltar_vacios=False)
+    return derivas
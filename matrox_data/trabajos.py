@@ -0,0 +1,90 @@
+"""
+Background Jobs
+===============
+
+Runs the long operations (statistics, classification, specific data, extraction) in a worker thread so the GUI
+stays responsive.
+
+The operation receives a 'progreso' callback and a 'cancelado' event. Progress is passed to the GUI through a
+thread-safe queue and throttled to one update every 'intervalo' seconds; the GUI reads it periodically (with
+Tk's after) instead of being refreshed by the worker after every file. Setting the event makes the operation
+stop at its next check with concurrent.futures.CancelledError.
+
+Functions:
+----------
+- iniciar_trabajo(funcion, *args, intervalo=INTERVALO_PROGRESO, **kwargs)
+    Starts funcion(*args, progreso=..., cancelado=..., **kwargs) in a worker thread and returns the job dict.
+
+- leer_trabajo(trabajo)
+    Returns the latest (done, total) progress sent since the last call (or None), and whether the job finished.
+    When it finished, trabajo['resultado'] or trabajo['error'] hold the outcome.
+
+- cancelar_trabajo(trabajo)
+    Asks the job to stop at its next check.
+
+- comprobar_cancelacion(cancelado)
+    Raises CancelledError if the event is set. Used by the operations between files or batches.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError
+
+# Segundos mínimos entre dos actualizaciones de progreso enviadas a la interfaz
+INTERVALO_PROGRESO = 0.1
+FIN_TRABAJO = 'fin'
+
+
+# Función para detener una operación si se ha pedido cancelarla
+def comprobar_cancelacion(cancelado):
+    if cancelado is not None and cancelado.is_set():
+        raise CancelledError("The operation was cancelled.")
+
+
+# Función para ejecutar una operación en un hilo con progreso limitado en frecuencia y cancelación
+def iniciar_trabajo(funcion, *args, intervalo=INTERVALO_PROGRESO, **kwargs):
+    trabajo = {
+        'cola': queue.Queue(),
+        'cancelado': threading.Event(),
+        'resultado': None,
+        'error': None,
+        'terminado': False,
+    }
+    ultimo_envio = [0.0]
+
+    # Solo se envía el progreso si ha pasado 'intervalo' o si es el último archivo
+    def progreso(hechos, total):
+        ahora = time.monotonic()
+        if ahora - ultimo_envio[0] >= intervalo or hechos == total:
+            ultimo_envio[0] = ahora
+            trabajo['cola'].put((hechos, total))
+
+    def ejecutar():
+        try:
+            trabajo['resultado'] = funcion(*args, progreso=progreso, cancelado=trabajo['cancelado'], **kwargs)
+        except BaseException as e:
+            trabajo['error'] = e
+        trabajo['cola'].put(FIN_TRABAJO)
+
+    trabajo['hilo'] = threading.Thread(target=ejecutar, daemon=True)
+    trabajo['hilo'].start()
+    return trabajo
+
+
+# Función para leer el último progreso del trabajo y saber si ha terminado
+def leer_trabajo(trabajo):
+    ultimo = None
+    while True:
+        try:
+            elemento = trabajo['cola'].get_nowait()
+        except queue.Empty:
+            return ultimo, trabajo['terminado']
+        if elemento == FIN_TRABAJO:
+            trabajo['terminado'] = True
+        else:
+            ultimo = elemento
+
+
+# Función para pedir que el trabajo se detenga
+def cancelar_trabajo(trabajo):
+    trabajo['cancelado'].set()
@@ -0,0 +1,352 @@
+"""
+Camera Transports
+=================
+
+Access to the cameras' result files behind one interface, so extraction does not depend on Windows UNC paths
+and 'net use'.
+
+A transport is a dict of functions:
+
+    'nombre'        'montado', 'smb' or 'simulado'
+    'ruta'          ruta(ip) -> root folder of the camera
+    'conectar'      conectar(ip, usuario, contrasena, tiempo_espera, sesiones) -> CONEXION_* result
+    'desconectar'   desconectar(ip)
+    'sesiones'      sesiones() -> set of the IPs that are already connected
+    'listar'        listar(carpeta) -> list of os.DirEntry-like entries (name, path, is_dir(), is_symlink(), stat())
+    'abrir'         abrir(ruta) -> binary file object opened for reading
+    'estado'        estado(ruta) -> stat result with st_size, st_atime_ns and st_mtime_ns
+    'copiar'        copiar(origen, destino) -> copies one file to a local path keeping its modification time
+
+Backends:
+
+- montado: a folder reachable through the file system, by default the '\\\\ip\\mtxuser' share authenticated
+  with 'net use' on Windows, or any path template such as '/mnt/camaras/{ip}' mounted by the system on Linux.
+- smb: pure-Python SMB client (optional 'smbprotocol' package). Each camera gets one registered session, and
+  all the listings and copies reuse its pooled connection.
+- simulado: local folder with one subfolder per IP that adds a fixed latency to every request and limits the
+  transfer rate of each camera, to measure and tune extraction throughput offline.
+
+Functions:
+----------
+- argumentos_ping(direccion_ip, tiempo_espera=None)
+    Returns the command line of one ping for the current system ('-n 1' on Windows, '-c 1' elsewhere), waiting
+    at most 'tiempo_espera' seconds for the reply if given.
+
+- hacer_ping(direccion_ip, tiempo_espera=None)
+    Returns True if the camera answers one ping.
+
+- conectar_smb(direccion_ip, usuario, contrasena, tiempo_espera=None)
+    Authenticates against '\\\\ip\\IPC$' with 'net use'. Raises subprocess.CalledProcessError on failure and
+    subprocess.TimeoutExpired if 'net use' takes longer than 'tiempo_espera' seconds.
+
+- desconectar_smb(direccion_ip)
+    Closes the 'net use' session opened with conectar_smb.
+
+- sesiones_smb()
+    Returns the IPs with a usable '\\\\ip\\IPC$' session: the ones that 'net use' lists with status OK
+    (Disconnected or Unavailable sessions are not reused), or, if 'net use' cannot be run, the ones opened by
+    conectar_smb in this process.
+
+- transporte_montado(plantilla=PLANTILLA_UNC, net_use=None)
+    Transport over a file system path. 'net_use' defaults to True on Windows with a UNC template.
+
+- transporte_smb(recurso='mtxuser', puerto=PUERTO_SMB)
+    Transport over the pure-Python SMB client.
+
+- transporte_simulado(carpeta, latencia=0.0, ancho_banda=None)
+    Local stand-in with 'latencia' seconds per request and 'ancho_banda' bytes per second per camera.
+
+- crear_transporte(tipo='montado', **opciones) / cargar_transporte(ruta=None)
+    Builds a transport by name, or from a JSON file such as {"tipo": "simulado", "carpeta": "...",
+    "latencia": 0.02, "ancho_banda": 2000000}. Without a file the default transport is returned.
+"""
+import io
+import json
+import math
+import os
+import platform
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+USUARIO_CAMARA = "NAM\\mtxuser"
+CONTRASENA_CAMARA = "Matrox"
+PLANTILLA_UNC = "\\\\{ip}\\mtxuser"
+PUERTO_SMB = 445
+# Segundos máximos del ping y de 'net use' de cada cámara
+TIEMPO_ESPERA_CONEXION = 5
+CONEXION_NUEVA = 'conectada'
+CONEXION_REUTILIZADA = 'reutilizada'
+CONEXION_SIN_RESPUESTA = 'sin_respuesta'
+CONEXION_ERROR_CREDENCIALES = 'error_credenciales'
+TIPOS_TRANSPORTE = ('montado', 'smb', 'simulado')
+TAMANO_BLOQUE = 1024 * 1024
+# Línea de 'net use' con su estado y una sesión '\\ip\IPC$', como "OK           \\10.0.0.1\IPC$   Microsoft..."
+PATRON_SESION_NET_USE = re.compile(r'^(\S*)[ \t]+(?:[A-Z]:[ \t]+)?\\\\([^\\\s]+)\\IPC\$',
+                                   re.IGNORECASE | re.MULTILINE)
+ESTADO_SESION_OK = 'OK'
+# Sesiones 'net use' abiertas por este proceso
+sesiones_abiertas = set()
+bloqueo_sesiones = threading.Lock()
+
+
+# Función para obtener el comando de un ping: Windows usa '-n' para el número de paquetes, Linux y macOS '-c'
+# La espera de la respuesta es '-w' en milisegundos en Windows y '-W' en segundos en Linux
+def argumentos_ping(direccion_ip, tiempo_espera=None):
+    if platform.system() == 'Windows':
+        espera = [] if tiempo_espera is None else ['-w', str(int(tiempo_espera * 1000))]
+        return ['ping', '-n', '1', *espera, direccion_ip]
+    espera = [] if tiempo_espera is None else ['-W', str(max(math.ceil(tiempo_espera), 1))]
+    return ['ping', '-c', '1', *espera, direccion_ip]
+
+
+# Función para comprobar si una cámara responde al ping
+def hacer_ping(direccion_ip, tiempo_espera=None):
+    try:
+        ping_exit_code = subprocess.call(argumentos_ping(direccion_ip, tiempo_espera), stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.DEVNULL,
+                                         timeout=None if tiempo_espera is None else tiempo_espera + 1)
+    except subprocess.TimeoutExpired:
+        return False
+    return ping_exit_code == 0
+
+
+# Función para establecer la conexión SMB con una cámara
+def conectar_smb(direccion_ip, usuario=USUARIO_CAMARA, contrasena=CONTRASENA_CAMARA, tiempo_espera=None):
+    comando = f"net use \\\\{direccion_ip}\\IPC$ /user:{usuario} {contrasena}"
+    subprocess.run(comando, shell=True, check=True, timeout=tiempo_espera)
+    with bloqueo_sesiones:
+        sesiones_abiertas.add(direccion_ip)
+
+
+# Función para cerrar la conexión SMB con una cámara
+def desconectar_smb(direccion_ip):
+    with bloqueo_sesiones:
+        sesiones_abiertas.discard(direccion_ip)
+    comando_desconectar = f"net use \\\\{direccion_ip}\\IPC$ /delete"
+    subprocess.run(comando_desconectar, shell=True, check=True)
+
+
+# Función para obtener las cámaras que ya tienen una sesión SMB abierta y utilizable
+def sesiones_smb():
+    try:
+        salida = subprocess.run("net use", shell=True, capture_output=True, text=True,
+                                timeout=TIEMPO_ESPERA_CONEXION).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        with bloqueo_sesiones:
+            return set(sesiones_abiertas)
+    # Solo las sesiones en estado OK; las 'Disconnected' o 'Unavailable' se vuelven a conectar
+    return {direccion_ip for estado, direccion_ip in PATRON_SESION_NET_USE.findall(salida)
+            if estado.upper() == ESTADO_SESION_OK}
+
+
+# Función para listar una carpeta del sistema de archivos
+def listar_carpeta_local(carpeta):
+    with os.scandir(carpeta) as iterador:
+        return list(iterador)
+
+
+# Función para abrir un archivo del sistema de archivos en modo binario
+def abrir_local(ruta):
+    return open(ruta, 'rb')
+
+
+# Función para copiar un archivo leyendo el origen con las funciones de un transporte
+def copiar_con(abrir, estado, origen, destino):
+    with abrir(origen) as archivo_origen, open(destino, 'wb') as archivo_destino:
+        shutil.copyfileobj(archivo_origen, archivo_destino, TAMANO_BLOQUE)
+    estado_origen = estado(origen)
+    os.utime(destino, ns=(estado_origen.st_atime_ns, estado_origen.st_mtime_ns))
+    return destino
+
+
+# Transporte sobre una ruta del sistema de archivos: recurso UNC con 'net use' o carpeta montada
+def transporte_montado(plantilla=PLANTILLA_UNC, net_use=None):
+    if net_use is None:
+        net_use = platform.system() == 'Windows' and plantilla.startswith('\\\\')
+
+    def ruta(direccion_ip):
+        return plantilla.format(ip=direccion_ip)
+
+    # Ping y 'net use' con tiempo máximo; si la cámara ya tiene sesión SMB se reutiliza
+    def conectar(direccion_ip, usuario=USUARIO_CAMARA, contrasena=CONTRASENA_CAMARA,
+                 tiempo_espera=TIEMPO_ESPERA_CONEXION, sesiones=None):
+        if not net_use:
+            # El sistema ya ha montado la carpeta de la cámara
+            return CONEXION_REUTILIZADA if os.path.isdir(ruta(direccion_ip)) else CONEXION_SIN_RESPUESTA
+        if not hacer_ping(direccion_ip, tiempo_espera):
+            return CONEXION_SIN_RESPUESTA
+        if sesiones is None:
+            sesiones = sesiones_smb()
+        if direccion_ip in sesiones:
+            return CONEXION_REUTILIZADA
+        try:
+            conectar_smb(direccion_ip, usuario, contrasena, tiempo_espera)
+        except subprocess.CalledProcessError:
+            return CONEXION_ERROR_CREDENCIALES
+        except subprocess.TimeoutExpired:
+            return CONEXION_SIN_RESPUESTA
+        return CONEXION_NUEVA
+
+    def desconectar(direccion_ip):
+        if net_use:
+            desconectar_smb(direccion_ip)
+
+    def sesiones():
+        return sesiones_smb() if net_use else set()
+
+    return {
+        'nombre': 'montado',
+        'ruta': ruta,
+        'conectar': conectar,
+        'desconectar': desconectar,
+        'sesiones': sesiones,
+        'listar': listar_carpeta_local,
+        'abrir': abrir_local,
+        'estado': os.stat,
+        'copiar': shutil.copy2,
+    }
+
+
+# Transporte con el cliente SMB en Python puro (paquete opcional 'smbprotocol')
+def transporte_smb(recurso='mtxuser', puerto=PUERTO_SMB):
+    import smbclient
+    from smbprotocol.exceptions import LogonFailure, SMBAuthenticationError, SMBException
+
+    registradas = set()
+    bloqueo = threading.Lock()
+
+    def ruta(direccion_ip):
+        return f"\\\\{direccion_ip}\\{recurso}"
+
+    # Una sesión registrada por cámara: smbclient reutiliza su conexión en todas las operaciones
+    def conectar(direccion_ip, usuario=USUARIO_CAMARA, contrasena=CONTRASENA_CAMARA,
+                 tiempo_espera=TIEMPO_ESPERA_CONEXION, sesiones=None):
+        with bloqueo:
+            if direccion_ip in registradas:
+                return CONEXION_REUTILIZADA
+        try:
+            smbclient.register_session(direccion_ip, username=usuario, password=contrasena, port=puerto,
+                                       connection_timeout=tiempo_espera)
+        except (LogonFailure, SMBAuthenticationError):
+            return CONEXION_ERROR_CREDENCIALES
+        except (OSError, ValueError, SMBException):
+            return CONEXION_SIN_RESPUESTA
+        with bloqueo:
+            registradas.add(direccion_ip)
+        return CONEXION_NUEVA
+
+    def desconectar(direccion_ip):
+        with bloqueo:
+            registradas.discard(direccion_ip)
+        smbclient.delete_session(direccion_ip, port=puerto)
+
+    def sesiones():
+        with bloqueo:
+            return set(registradas)
+
+    def listar(carpeta):
+        return list(smbclient.scandir(carpeta))
+
+    def abrir(ruta_archivo):
+        return smbclient.open_file(ruta_archivo, mode='rb')
+
+    def copiar(origen, destino):
+        return copiar_con(abrir, smbclient.stat, origen, destino)
+
+    return {
+        'nombre': 'smb',
+        'ruta': ruta,
+        'conectar': conectar,
+        'desconectar': desconectar,
+        'sesiones': sesiones,
+        'listar': listar,
+        'abrir': abrir,
+        'estado': smbclient.stat,
+        'copiar': copiar,
+    }
+
+
+# Transporte simulado sobre una carpeta local con latencia por petición y ancho de banda por cámara
+def transporte_simulado(carpeta, latencia=0.0, ancho_banda=None):
+    carpeta = os.path.abspath(carpeta)
+    # Momento en el que el enlace de cada cámara queda libre
+    enlace_libre = {}
+    bloqueo = threading.Lock()
+
+    def ruta(direccion_ip):
+        return os.path.join(carpeta, direccion_ip)
+
+    # Las transferencias de una misma cámara comparten su ancho de banda, las de cámaras distintas no
+    def esperar_transferencia(ruta_archivo, tamano):
+        if not ancho_banda:
+            return
+        direccion_ip = os.path.relpath(ruta_archivo, carpeta).split(os.sep)[0]
+        with bloqueo:
+            inicio = max(time.monotonic(), enlace_libre.get(direccion_ip, 0.0))
+            fin = inicio + tamano / ancho_banda
+            enlace_libre[direccion_ip] = fin
+        time.sleep(max(fin - time.monotonic(), 0.0))
+
+    def conectar(direccion_ip, usuario=USUARIO_CAMARA, contrasena=CONTRASENA_CAMARA,
+                 tiempo_espera=TIEMPO_ESPERA_CONEXION, sesiones=None):
+        time.sleep(latencia)
+        return CONEXION_NUEVA if os.path.isdir(ruta(direccion_ip)) else CONEXION_SIN_RESPUESTA
+
+    def desconectar(direccion_ip):
+        pass
+
+    def listar(carpeta_listada):
+        time.sleep(latencia)
+        return listar_carpeta_local(carpeta_listada)
+
+    def abrir(ruta_archivo):
+        time.sleep(latencia)
+        with open(ruta_archivo, 'rb') as archivo:
+            datos = archivo.read()
+        esperar_transferencia(ruta_archivo, len(datos))
+        return io.BytesIO(datos)
+
+    def estado(ruta_archivo):
+        time.sleep(latencia)
+        return os.stat(ruta_archivo)
+
+    def copiar(origen, destino):
+        return copiar_con(abrir, estado, origen, destino)
+
+    return {
+        'nombre': 'simulado',
+        'ruta': ruta,
+        'conectar': conectar,
+        'desconectar': desconectar,
+        'sesiones': set,
+        'listar': listar,
+        'abrir': abrir,
+        'estado': estado,
+        'copiar': copiar,
+    }
+
+
+# Función para crear un transporte por su nombre
+def crear_transporte(tipo='montado', **opciones):
+    if tipo == 'montado':
+        return transporte_montado(**opciones)
+    if tipo == 'smb':
+        return transporte_smb(**opciones)
+    if tipo == 'simulado':
+        return transporte_simulado(**opciones)
+    raise ValueError(f"Unknown transport '{tipo}', use one of {TIPOS_TRANSPORTE}.")
+
+
+# Función para cargar el transporte de un archivo JSON, o el transporte por defecto si ruta es None
+def cargar_transporte(ruta=None):
+    if ruta is None:
+        return transporte_montado()
+    with open(ruta, 'r', encoding='utf-8') as file:
+        opciones = json.load(file)
+    return crear_transporte(**opciones)
+
+
+TRANSPORTE_POR_DEFECTO = transporte_montado()